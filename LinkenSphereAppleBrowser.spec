@@ -5,7 +5,7 @@ a = Analysis(
     ['simple_linken_gui.py'],
     pathex=[],
     binaries=[],
-    datas=[('linken_sphere_playwright_browser.py', '.'), ('linken_sphere_api.py', '.'), ('linken_sphere_config.json', '.')],
+    datas=[('linken_sphere_playwright_browser.py', '.'), ('browse_engine.py', '.'), ('linken_sphere_api.py', '.'), ('cdp_connection_pool.py', '.'), ('session_watcher.py', '.'), ('session_records.py', '.'), ('session_scheduler.py', '.'), ('profile_leases.py', '.'), ('metrics.py', '.'), ('profiling.py', '.'), ('resource_watchdog.py', '.'), ('listening_ports.py', '.'), ('checkpoints.py', '.'), ('config_service.py', '.'), ('linken_sphere_config.json', '.')],
     hiddenimports=['tkinter', 'tkinter.ttk', 'tkinter.messagebox', 'tkinter.filedialog', 'requests', 'json', 'threading', 'asyncio', 'pathlib'],
     hookspath=[],
     hooksconfig={},
@@ -14,11 +14,24 @@ from datetime import datetime
 import platform
 import subprocess
 
-# 尝试导入主程序
-try:
-    from apple_website_browser import AppleWebsiteBrowser
-except ImportError:
-    AppleWebsiteBrowser = None
+# 主程序模块（Playwright 等）较重，延迟到第一次使用时再导入，窗口可以立即显示
+AppleWebsiteBrowser = None
+_browser_import_error = None
+_browser_import_lock = threading.Lock()
+
+
+def load_browser_modules():
+    """导入主程序模块（只导入一次，线程安全），成功返回 True"""
+    global AppleWebsiteBrowser, _browser_import_error
+    with _browser_import_lock:
+        if AppleWebsiteBrowser is None and _browser_import_error is None:
+            try:
+                from apple_website_browser import AppleWebsiteBrowser as browser_class
+            except ImportError as e:
+                _browser_import_error = e
+            else:
+                AppleWebsiteBrowser = browser_class
+        return AppleWebsiteBrowser is not None
 
 class AppleBrowserGUI:
     def __init__(self):
@@ -360,7 +373,7 @@ class AppleBrowserGUI:
         
     def start_browsing(self):
         """开始浏览"""
-        if AppleWebsiteBrowser is None:
+        if not load_browser_modules():
             messagebox.showerror("错误", "无法导入主程序模块，请确保 apple_website_browser.py 存在")
             return
             
@@ -495,6 +508,8 @@ class AppleBrowserGUI:
         """运行GUI"""
         self.log_message("🎉 Apple Website Browser GUI 已启动")
         self.log_message("请配置参数后点击'开始浏览'")
+        # 窗口显示后在后台预先导入主程序模块
+        self.root.after(200, lambda: threading.Thread(target=load_browser_modules, daemon=True).start())
         self.root.mainloop()
 
 class TestWindow:
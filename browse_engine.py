@@ -0,0 +1,874 @@
+#!/usr/bin/env python3
+"""
+统一的双层循环浏览引擎
+AppleWebsiteBrowser 和 LinkenSphereAppleBrowser 共用同一套重试、导航、滚动、链接获取和循环逻辑，
+浏览器的获取方式由可插拔的后端提供：
+- LocalBrowserBackend: 本机启动 Playwright 浏览器
+- LinkenSphereCDPBackend: 通过调试端口连接 Linken Sphere 会话（复用连接注册表中的 CDP 连接）
+- ExistingSessionBackend: 连接已在运行的 Linken Sphere 会话（按会话端口 / 配置端口范围 / 常用端口依次尝试）
+热循环的性能改进只需要在这里修改一次。
+每次页面访问后由资源看门狗（resource_watchdog）检查页面内存，超过阈值时通过后端的 recycle_page() 换用新页面。
+每次页面访问后写入检查点（checkpoints），以 resume=True 运行时从上次停下的位置继续。
+设置 config_service 后运行中实时使用配置文件中新的浏览时长和重试参数（见 config_service）。
+"""
+
+import abc
+import asyncio
+import logging
+import platform
+import random
+import time
+
+import metrics
+from cdp_connection_pool import get_registry
+from checkpoints import get_checkpoint_store
+from linken_sphere_api import DecorrelatedJitter
+from resource_watchdog import ResourceWatchdog
+
+try:
+    from blocked_urls import filter_links
+except ImportError:
+    # 如果导入失败，使用内置的屏蔽逻辑
+    def filter_links(links):
+        blocked_patterns = ['search']
+        filtered = []
+        for link in links:
+            url = link.get('url', '') if isinstance(link, dict) else str(link)
+            if not any(pattern in url.lower() for pattern in blocked_patterns):
+                filtered.append(link)
+        return filtered
+
+logger = logging.getLogger(__name__)
+
+# 预先取出热路径上使用的子指标
+_NAVIGATION_OK = metrics.NAVIGATION_SECONDS.labels("success")
+_NAVIGATION_FAILED = metrics.NAVIGATION_SECONDS.labels("failure")
+
+DEFAULT_VIEWPORT = {"width": 1920, "height": 1080}
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# 运行中可以实时修改的配置字段（配置服务中的字段名与引擎属性同名）
+LIVE_CONFIG_KEYS = ('browse_duration', 'retry_delay', 'max_retries')
+
+# 会话没有记录调试端口时依次尝试的常用端口
+COMMON_DEBUG_PORTS = (9222, 9223, 9224, 9225, 10001, 10002, 10003, 10004)
+
+# 一次调用完成一个滚动步骤：读取页面高度、判断是否到底、滚动并返回新位置
+SCROLL_STEP_SCRIPT = """
+([position, distance]) => {
+    const maxScroll = document.body.scrollHeight - window.innerHeight;
+    if (position >= maxScroll) {
+        return {done: true, position: position, maxScroll: maxScroll};
+    }
+    const target = Math.min(position + distance, maxScroll);
+    window.scrollTo({top: target, behavior: 'smooth'});
+    return {done: false, position: target, maxScroll: maxScroll};
+}
+"""
+
+NAVIGATION_LINKS_SCRIPT = """
+() => {
+    const links = [];
+    try {
+        // 获取主导航菜单链接
+        const navLinks = document.querySelectorAll('nav a, .globalnav a, .ac-gn-link');
+        navLinks.forEach(link => {
+            if (link.href && link.href.includes('apple.com/jp/') &&
+                !link.href.includes('#') &&
+                link.href !== window.location.href) {
+                links.push({
+                    url: link.href,
+                    text: link.textContent.trim()
+                });
+            }
+        });
+
+        // 获取产品页面链接
+        const productLinks = document.querySelectorAll('.tile a, .product-tile a, .hero a');
+        productLinks.forEach(link => {
+            if (link.href && link.href.includes('apple.com/jp/') &&
+                !link.href.includes('#') &&
+                link.href !== window.location.href) {
+                links.push({
+                    url: link.href,
+                    text: link.textContent.trim()
+                });
+            }
+        });
+
+        return links;
+    } catch (error) {
+        console.error('获取链接时出错:', error);
+        return [];
+    }
+}
+"""
+
+
+class BrowserBackend(abc.ABC):
+    """浏览器获取后端：acquire() 返回 Playwright 页面（失败返回 None），release() 归还资源"""
+
+    name = "backend"
+    port = None  # 浏览器调试端口（资源看门狗据此查找渲染进程，未知时为 None）
+
+    @abc.abstractmethod
+    async def acquire(self):
+        """获取页面，失败返回 None"""
+
+    async def release(self):
+        pass
+
+    async def recycle_page(self, page):
+        """在同一浏览器上下文中新建页面并关闭旧页面，返回新页面"""
+        new_page = await page.context.new_page()
+        try:
+            await page.close()
+        except Exception as e:
+            logger.warning(f"关闭旧页面失败 ({self.name}): {e}")
+        return new_page
+
+
+class LocalBrowserBackend(BrowserBackend):
+    """在本机启动 Playwright 浏览器（macOS 默认 WebKit，其他系统默认 Chromium）"""
+
+    name = "local"
+
+    def __init__(self, headless=False, browser_type=None, viewport=DEFAULT_VIEWPORT, user_agent=DEFAULT_USER_AGENT):
+        """
+        Args:
+            headless (bool): 是否无头运行
+            browser_type (str): chromium / webkit / firefox，None 按系统选择
+        """
+        self.headless = headless
+        self.browser_type = browser_type or ("webkit" if platform.system() == "Darwin" else "chromium")
+        self.viewport = viewport
+        self.user_agent = user_agent
+        self._playwright = None
+        self.browser = None
+
+    async def acquire(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self.browser = await getattr(self._playwright, self.browser_type).launch(headless=self.headless)
+        context = await self.browser.new_context(viewport=self.viewport, user_agent=self.user_agent)
+        return await context.new_page()
+
+    async def recycle_page(self, page):
+        """本机浏览器连同上下文一起回收，释放该上下文的全部缓存"""
+        context = await self.browser.new_context(viewport=self.viewport, user_agent=self.user_agent)
+        new_page = await context.new_page()
+        try:
+            await page.context.close()
+        except Exception as e:
+            logger.warning(f"关闭旧上下文失败: {e}")
+        return new_page
+
+    async def release(self):
+        try:
+            if self.browser:
+                await self.browser.close()
+        finally:
+            self.browser = None
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+class LinkenSphereCDPBackend(BrowserBackend):
+    """通过调试端口连接 Linken Sphere 浏览器（同一端口的连接由注册表复用）"""
+
+    name = "linken_sphere_cdp"
+
+    def __init__(self, debug_port):
+        self.debug_port = debug_port
+        self.registry = None  # 注册表按事件循环区分，连接时再获取
+        self.browser = None
+        self.port = None
+
+    async def candidate_ports(self):
+        return [self.debug_port]
+
+    async def connect(self):
+        """依次尝试候选端口，返回 Browser 或 None"""
+        self.registry = get_registry()
+        ports = await self.candidate_ports()
+        for port in ports:
+            try:
+                self.browser = await self.registry.acquire(port)
+                self.port = port
+                logger.info(f"✅ 成功连接到 Linken Sphere 浏览器 (端口: {port})")
+                return self.browser
+            except Exception as e:
+                logger.debug(f"连接调试端口 {port} 失败: {e}")
+        logger.error(f"❌ 无法连接到 Linken Sphere 浏览器 (端口: {ports})")
+        return None
+
+    @staticmethod
+    async def page_from_browser(browser):
+        """使用会话已有的页面，没有时新建"""
+        contexts = browser.contexts
+        if contexts:
+            context = contexts[0]
+            if context.pages:
+                return context.pages[0]
+            return await context.new_page()
+        context = await browser.new_context(viewport=DEFAULT_VIEWPORT, user_agent=DEFAULT_USER_AGENT)
+        return await context.new_page()
+
+    async def acquire(self):
+        browser = await self.connect()
+        if browser is None:
+            return None
+        return await self.page_from_browser(browser)
+
+    async def release(self):
+        # 归还连接而不是关闭，同一会话的下一次运行可以直接复用
+        if self.browser is not None:
+            await self.registry.release(self.browser)
+            self.browser = None
+
+
+class ExistingSessionBackend(LinkenSphereCDPBackend):
+    """连接已在运行的 Linken Sphere 会话"""
+
+    name = "existing_session"
+
+    def __init__(self, session_uuid=None, port_resolver=None, debug_port_start=12345, debug_port_range=10):
+        """
+        Args:
+            session_uuid (str): 会话 UUID
+            port_resolver: port_resolver(session_uuid) -> 会话的调试端口或 None（阻塞调用，在线程中执行）
+            debug_port_start (int): 配置的调试端口起始值
+            debug_port_range (int): 配置的调试端口数量
+        """
+        super().__init__(None)
+        self.session_uuid = session_uuid
+        self.port_resolver = port_resolver
+        self.debug_port_start = debug_port_start
+        self.debug_port_range = debug_port_range
+
+    async def candidate_ports(self):
+        ports = []
+        if self.session_uuid and self.port_resolver:
+            # 解析器会请求 Linken Sphere API，不能阻塞共享事件循环
+            specific_port = await asyncio.to_thread(self.port_resolver, self.session_uuid)
+            if specific_port:
+                ports.append(int(specific_port))
+
+        # 配置的端口优先，常用调试端口作为备用
+        configured = range(self.debug_port_start, self.debug_port_start + self.debug_port_range)
+        for port in list(configured) + list(COMMON_DEBUG_PORTS):
+            if port not in ports:
+                ports.append(port)
+        return ports
+
+
+class BrowseEngine:
+    """双层循环浏览引擎（大循环刷新链接，每个大循环 8 次页面访问）"""
+
+    def __init__(self, browse_duration=60, major_cycles=3, max_retries=3, retry_delay=5):
+        """
+        Args:
+            browse_duration (int): 每个页面的浏览时间（秒）
+            major_cycles (int): 大循环次数，每个大循环包含8次页面访问
+            max_retries (int): 最大重试次数
+            retry_delay (int): 重试间隔时间（秒）
+        """
+        self.browse_duration = browse_duration
+        self.major_cycles = major_cycles
+        self.minor_cycles_per_major = 8
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.base_url = "https://www.apple.com/jp/"
+
+        self.available_links = []
+        self.visited_links = set()
+        self.current_major_cycle = 0
+        self.current_minor_cycle = 0
+
+        self.retry_stats = {
+            'total_retries': 0,
+            'successful_retries': 0,
+            'failed_operations': 0
+        }
+
+        # 页面资源看门狗（check_every=0 可关闭）
+        self.watchdog = ResourceWatchdog()
+
+        # 检查点：worker_name 或 session_uuid 作为检查点名称，两者都为空时不写检查点
+        self.checkpoints = get_checkpoint_store()
+        self.worker_name = None
+        self.session_uuid = None
+        self.link_catalog_version = 0
+
+        # 配置服务（可选）：运行期间订阅 LIVE_CONFIG_KEYS 的变化
+        self.config_service = None
+
+        # GUI 控制信号 (可选)
+        self.stop_event = None
+        self.pause_event = None
+        self.thread_info = None
+        self.gui_log_callback = None
+        self.gui_update_callback = None
+
+    # ---- 控制信号 ----
+
+    def stop_requested(self):
+        return bool(self.stop_event and self.stop_event.is_set())
+
+    def notify(self, message):
+        """把消息发送到 GUI 日志（没有 GUI 时忽略）"""
+        if self.gui_log_callback:
+            self.gui_log_callback(message)
+
+    async def interruptible_sleep(self, seconds, step=0.2):
+        """分段等待并检查停止信号，被停止时返回 False"""
+        deadline = time.monotonic() + seconds
+        while True:
+            if self.stop_requested():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            await asyncio.sleep(min(step, remaining))
+
+    async def wait_if_paused(self):
+        """暂停时等待恢复信号，等待中被停止时返回 False"""
+        if not self.pause_event or self.pause_event.is_set():
+            return True
+
+        if self.thread_info:
+            self.thread_info['status'] = 'paused'
+        self.notify("⏸️ 已暂停，等待恢复信号...")
+        if self.gui_update_callback:
+            self.gui_update_callback()
+
+        while self.pause_event and not self.pause_event.is_set():
+            if self.stop_requested():
+                logger.info("在暂停中收到停止信号")
+                self.notify("🛑 在暂停中收到停止信号")
+                return False
+            await asyncio.sleep(0.5)
+
+        if self.thread_info:
+            self.thread_info['status'] = 'running'
+        self.notify("▶️ 已恢复运行")
+        if self.gui_update_callback:
+            self.gui_update_callback()
+        return True
+
+    # ---- 扩展点 ----
+
+    def on_navigation(self, url, elapsed, success):
+        """每次导航完成后调用（子类可用于反馈会话健康状况）"""
+
+    def on_acquire_failed(self, backend):
+        """后端无法提供页面时调用"""
+        logger.error(f"❌ 无法获取浏览器页面 ({backend.name})")
+
+    def on_run_finished(self):
+        """run_with_backend 结束（无论成败）时调用"""
+
+    def checkpoint_key(self):
+        """检查点名称（None 表示不写检查点）"""
+        return self.worker_name or self.session_uuid
+
+    def has_checkpoint(self):
+        """是否有未完成的检查点可以恢复"""
+        key = self.checkpoint_key()
+        return key is not None and self.checkpoints.load(key)[0] is not None
+
+    # ---- 实时配置 ----
+
+    def apply_config(self, changes):
+        """应用配置变化 {字段: (旧值, 新值)}，只处理 LIVE_CONFIG_KEYS"""
+        for key in LIVE_CONFIG_KEYS:
+            if key in changes and changes[key][1] is not None:
+                old_value, new_value = getattr(self, key), changes[key][1]
+                if old_value != new_value:
+                    setattr(self, key, new_value)
+                    logger.info(f"⚙️ 配置已更新: {key} {old_value} → {new_value}")
+                    self.notify(f"⚙️ {key} 已更新为 {new_value}")
+
+    def follow_config(self):
+        """开始跟随配置服务（先应用当前值），没有配置服务时不做任何事"""
+        if self.config_service is None:
+            return
+        current = self.config_service.snapshot()
+        self.apply_config({key: (None, current[key]) for key in LIVE_CONFIG_KEYS if key in current})
+        self.config_service.subscribe(self.apply_config)
+
+    def unfollow_config(self):
+        if self.config_service is not None:
+            self.config_service.unsubscribe(self.apply_config)
+
+    # ---- 检查点 ----
+
+    def restore_checkpoint(self, key):
+        """
+        从检查点恢复进度、重试统计和链接目录
+
+        Returns:
+            (开始的大循环下标, 该大循环中开始的小循环下标)，均从 0 开始
+        """
+        checkpoint, links = self.checkpoints.load(key)
+        if checkpoint is None:
+            logger.info(f"没有可恢复的检查点 ({key})，从头开始")
+            return 0, 0
+
+        self.retry_stats.update(checkpoint.get('retry_stats') or {})
+        self.link_catalog_version = checkpoint.get('catalog_version') or 0
+        major_index = checkpoint['major_cycle'] - 1
+        minor_index = checkpoint['minor_cycle']
+        if minor_index >= self.minor_cycles_per_major:
+            major_index, minor_index = major_index + 1, 0
+        elif links:
+            self.available_links = links
+        else:
+            # 链接目录没有保存完整，重新开始这个大循环的剩余访问前需要刷新链接
+            self.available_links = []
+
+        logger.info(f"♻️ 从检查点恢复 ({key}): 大循环 {major_index + 1}, 已完成 {minor_index} 次访问")
+        self.notify(f"♻️ 从大循环 {major_index + 1} 第 {minor_index + 1} 页继续")
+        return major_index, minor_index
+
+    def save_checkpoint(self, key):
+        """记录当前页面访问完成后的进度"""
+        try:
+            self.checkpoints.save(key, self.current_major_cycle, self.current_minor_cycle,
+                                  self.link_catalog_version, self.retry_stats, self.session_uuid)
+        except OSError as e:
+            logger.warning(f"写入检查点失败: {e}")
+
+    # ---- 热循环 ----
+
+    async def retry_operation(self, operation_name, operation_func, *args, **kwargs):
+        """
+        重试机制
+
+        Args:
+            operation_name (str): 操作名称
+            operation_func: 要执行的异步函数
+            *args, **kwargs: 传递给函数的参数
+
+        Returns:
+            操作结果，失败时返回None
+        """
+        # 去相关抖动退避：平均首次等待约为 retry_delay，多个工作线程的重试时间自然错开
+        backoff = DecorrelatedJitter(base=self.retry_delay / 2, cap=self.retry_delay * 3)
+
+        for attempt in range(self.max_retries):
+            if self.stop_requested():
+                logger.info(f"在重试操作 '{operation_name}' 中收到停止信号")
+                self.notify("🛑 在重试操作中收到停止信号")
+                return None
+
+            try:
+                self.retry_stats['total_retries'] += 1
+                result = await operation_func(*args, **kwargs)
+                if attempt > 0:
+                    self.retry_stats['successful_retries'] += 1
+                    logger.info(f"✅ {operation_name} - 重试成功 (第 {attempt + 1} 次)")
+                return result
+
+            except Exception as e:
+                if attempt < self.max_retries - 1:
+                    logger.warning(f"⚠️ {operation_name} - 第 {attempt + 1} 次尝试失败: {e}")
+                    # 操作名称中的 URL 不作为标签，避免标签基数无限增长
+                    metrics.RETRIES.labels(operation_name.split(' ', 1)[0]).inc()
+                    retry_delay = backoff.next_delay()
+                    logger.info(f"⏳ 等待 {retry_delay:.1f} 秒后重试...")
+
+                    if not await self.interruptible_sleep(retry_delay, step=0.5):
+                        logger.info("在重试等待中收到停止信号")
+                        return None
+                else:
+                    logger.error(f"❌ {operation_name} - 所有重试都失败: {e}")
+                    self.retry_stats['failed_operations'] += 1
+                    return None
+
+    async def safe_goto(self, page, url, timeout=30000):
+        """
+        安全的页面导航，带重试机制
+
+        Args:
+            page: Playwright 页面对象
+            url (str): 目标URL
+            timeout (int): 超时时间（毫秒）
+
+        Returns:
+            bool: 是否成功导航
+        """
+        async def _goto_operation():
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            await page.wait_for_load_state("networkidle", timeout=10000)
+            return True
+
+        start_time = time.time()
+        result = await self.retry_operation(f"导航到 {url}", _goto_operation)
+        elapsed = time.time() - start_time
+        (_NAVIGATION_OK if result is not None else _NAVIGATION_FAILED).observe(elapsed)
+        self.on_navigation(url, elapsed, result is not None)
+        return result is not None
+
+    async def safe_evaluate(self, page, script, description="执行脚本", arg=None):
+        """
+        安全的页面脚本执行，带重试机制
+
+        Args:
+            page: Playwright 页面对象
+            script (str): 要执行的JavaScript代码
+            description (str): 操作描述
+            arg: 传给脚本函数的参数（None 表示不传）
+
+        Returns:
+            脚本执行结果，失败时返回None
+        """
+        async def _evaluate_operation():
+            if arg is None:
+                return await page.evaluate(script)
+            return await page.evaluate(script, arg)
+
+        return await self.retry_operation(description, _evaluate_operation)
+
+    async def precise_browse_page(self, page, duration):
+        """
+        精确控制页面浏览时间：滚动阶段 + 等待阶段
+
+        Args:
+            page: Playwright 页面对象
+            duration (int): 总浏览时间（秒）
+        """
+        total_start_time = time.time()
+        logger.info(f"开始精确浏览页面，总时长: {duration}秒")
+
+        # 阶段1: 滚动到底部
+        scroll_start_time = time.time()
+        await self._scroll_to_bottom(page)
+        scroll_duration = time.time() - scroll_start_time
+        metrics.SCROLL_SECONDS.observe(scroll_duration)
+
+        logger.info(f"滚动阶段完成，耗时: {scroll_duration:.2f}秒")
+
+        # 阶段2: 在底部等待剩余时间（每0.5秒检查一次停止信号）
+        remaining_time = max(0, duration - (time.time() - total_start_time))
+        if remaining_time > 0:
+            logger.info(f"在页面底部等待剩余时间: {remaining_time:.2f}秒")
+            if not await self.interruptible_sleep(remaining_time, step=0.5):
+                logger.info("在等待阶段收到停止信号，提前结束")
+                self.notify("🛑 在等待阶段收到停止信号")
+
+        total_duration = time.time() - total_start_time
+        metrics.VISIT_LATENESS_SECONDS.observe(max(0.0, total_duration - duration))
+        logger.info(f"页面浏览完成，实际总耗时: {total_duration:.2f}秒")
+
+        return total_duration
+
+    async def _scroll_to_bottom(self, page):
+        """
+        向下滚动直到页面底部（带重试机制）
+
+        Args:
+            page: Playwright 页面对象
+
+        Returns:
+            bool: 是否成功滚动到底部
+        """
+        logger.info("开始向下滚动到页面底部")
+
+        scroll_position = 0
+        scroll_count = 0
+        consecutive_failures = 0
+        max_consecutive_failures = 3
+
+        while True:
+            if self.stop_requested():
+                logger.info("在滚动阶段收到停止信号，停止滚动")
+                self.notify("🛑 在滚动阶段收到停止信号")
+                return False
+
+            # 每个滚动步骤只有一次脚本调用（获取高度 + 判断底部 + 滚动）
+            scroll_distance = random.randint(100, 250)
+            step = await self.safe_evaluate(page, SCROLL_STEP_SCRIPT, "滚动页面",
+                                            arg=[scroll_position, scroll_distance])
+
+            if step is None:
+                consecutive_failures += 1
+                logger.warning(f"滚动步骤失败，连续失败次数: {consecutive_failures}")
+
+                if consecutive_failures >= max_consecutive_failures:
+                    logger.error("连续滚动失败，停止滚动")
+                    return False
+
+                await asyncio.sleep(2)  # 等待后重试
+                continue
+
+            consecutive_failures = 0
+
+            if step['done']:
+                logger.info(f"已到达页面底部，总共滚动 {scroll_count} 次")
+                break
+
+            scroll_position = step['position']
+            scroll_count += 1
+
+            # 随机停顿，模拟真实用户行为
+            if not await self.interruptible_sleep(random.uniform(0.5, 1.5)):
+                logger.info("在滚动停顿中收到停止信号")
+                return False
+
+            # 偶尔长时间停顿，模拟阅读
+            if random.random() < 0.1:  # 10% 概率
+                if not await self.interruptible_sleep(random.uniform(1.0, 3.0)):
+                    logger.info("在阅读停顿中收到停止信号")
+                    return False
+
+        return True
+
+    async def refresh_links(self, page):
+        """
+        刷新链接列表：返回主页并重新获取所有可用链接（带重试机制）
+
+        Args:
+            page: Playwright 页面对象
+
+        Returns:
+            bool: 是否成功刷新链接
+        """
+        logger.info("=== 开始刷新链接列表 ===")
+
+        homepage_success = await self.safe_goto(page, self.base_url)
+        if not homepage_success:
+            logger.error("无法返回主页，链接刷新失败")
+            return False
+
+        logger.info("已返回主页")
+
+        self.visited_links.clear()
+        logger.info("已清空访问记录")
+
+        async def _get_links_operation():
+            return await self.get_navigation_links(page)
+
+        self.available_links = await self.retry_operation("获取导航链接", _get_links_operation)
+
+        if self.available_links is None:
+            self.available_links = []
+            logger.error("获取链接失败，使用空链接列表")
+            return False
+
+        logger.info(f"重新获取到 {len(self.available_links)} 个可用链接")
+        return len(self.available_links) > 0
+
+    async def get_navigation_links(self, page):
+        """
+        获取页面中的导航链接（带重试机制）
+
+        Args:
+            page: Playwright 页面对象
+
+        Returns:
+            list: 链接列表，失败时返回空列表
+        """
+        links = await self.safe_evaluate(page, NAVIGATION_LINKS_SCRIPT, "获取页面导航链接")
+
+        if links is None:
+            logger.error("获取链接失败")
+            return []
+
+        # 去重并过滤屏蔽的链接
+        unique_links = []
+        seen_urls = set()
+        for link in links:
+            if link['url'] not in seen_urls:
+                unique_links.append(link)
+                seen_urls.add(link['url'])
+
+        filtered_links = filter_links(unique_links)
+
+        logger.info(f"找到 {len(unique_links)} 个唯一链接，过滤后剩余 {len(filtered_links)} 个")
+        return filtered_links
+
+    async def browse_page(self, page, url, duration):
+        """
+        精确浏览指定页面（带重试机制）
+
+        Args:
+            page: Playwright 页面对象
+            url (str): 目标URL
+            duration (int): 浏览时间（秒）
+
+        Returns:
+            float: 实际浏览时间，失败时返回duration
+        """
+        logger.info(f"准备浏览页面: {url}")
+
+        navigation_success = await self.safe_goto(page, url)
+        if not navigation_success:
+            logger.error(f"导航到页面失败: {url}")
+            # 即使导航失败，也要等待指定时间，保持时间一致性
+            logger.info(f"导航失败，但仍等待 {duration} 秒保持时间一致性")
+            await self.interruptible_sleep(duration, step=0.5)
+            return duration
+
+        logger.info(f"成功导航到页面: {url}")
+        self.visited_links.add(url)
+
+        try:
+            return await self.precise_browse_page(page, duration)
+        except Exception as e:
+            logger.error(f"浏览页面时出错: {e}")
+            logger.info(f"浏览失败，但仍等待 {duration} 秒保持时间一致性")
+            await self.interruptible_sleep(duration, step=0.5)
+            return duration
+
+    async def browse_cycles(self, page, backend=None, resume=False):
+        """
+        在页面上执行双层循环浏览
+
+        Args:
+            page: Playwright 页面对象
+            backend: 提供页面的后端（None 表示不回收页面）
+            resume (bool): 是否从检查点继续（否则清除旧检查点从头开始）
+
+        Returns:
+            bool: 是否正常结束（收到停止信号也视为正常结束）
+        """
+        total_pages = self.major_cycles * self.minor_cycles_per_major
+        checkpoint_key = self.checkpoint_key()
+        start_major, start_minor = 0, 0
+        if checkpoint_key is not None:
+            if resume:
+                start_major, start_minor = self.restore_checkpoint(checkpoint_key)
+            else:
+                self.checkpoints.clear(checkpoint_key)
+
+        try:
+            for major_cycle in range(start_major, self.major_cycles):
+                if self.stop_requested():
+                    logger.info("收到停止信号，退出浏览循环")
+                    self.notify("🛑 收到停止信号，正在退出...")
+                    break
+
+                self.current_major_cycle = major_cycle + 1
+                logger.info(f"=== 大循环 {self.current_major_cycle}/{self.major_cycles} 开始 ===")
+
+                first_minor = start_minor if major_cycle == start_major else 0
+                if first_minor and self.available_links:
+                    logger.info(f"使用检查点中的链接目录 (版本 {self.link_catalog_version}, {len(self.available_links)} 个链接)")
+                else:
+                    links_available = await self.refresh_links(page)
+                    if not links_available:
+                        logger.error("无法获取可用链接，跳过此大循环")
+                        continue
+                    self.link_catalog_version += 1
+                    if checkpoint_key is not None:
+                        self.checkpoints.save_catalog(checkpoint_key, self.link_catalog_version, self.available_links)
+
+                # 内层循环：8次页面访问
+                for minor_cycle in range(first_minor, self.minor_cycles_per_major):
+                    if self.stop_requested():
+                        logger.info("收到停止信号，退出浏览循环")
+                        self.notify("🛑 收到停止信号，正在退出...")
+                        break
+
+                    if not await self.wait_if_paused():
+                        return True
+
+                    self.current_minor_cycle = minor_cycle + 1
+                    page_number = major_cycle * self.minor_cycles_per_major + minor_cycle + 1
+
+                    logger.info(f"--- 大循环 {self.current_major_cycle}, 小循环 {self.current_minor_cycle}/8 (总第 {page_number}/{total_pages} 页) ---")
+                    self.notify(f"📄 正在浏览第 {page_number}/{total_pages} 页")
+
+                    if self.available_links:
+                        selected_link = random.choice(self.available_links)
+                        logger.info(f"随机选择链接: {selected_link['text']} ({selected_link['url']})")
+
+                        actual_duration = await self.browse_page(page, selected_link['url'], self.browse_duration)
+                        logger.info(f"页面浏览完成，实际耗时: {actual_duration:.2f}秒")
+                    else:
+                        logger.warning("没有可用链接，浏览主页")
+                        await self.browse_page(page, self.base_url, self.browse_duration)
+
+                    # 被停止信号打断的访问不计入检查点，恢复时重新访问
+                    if checkpoint_key is not None and not self.stop_requested():
+                        self.save_checkpoint(checkpoint_key)
+
+                    if backend is not None:
+                        page = await self.watchdog.after_visit(page, backend.recycle_page, backend.port)
+
+                if self.stop_requested():
+                    break
+
+                logger.info(f"=== 大循环 {self.current_major_cycle}/{self.major_cycles} 完成 ===")
+
+            # 全部完成后删除检查点；收到停止信号时保留，下次可以继续
+            if checkpoint_key is not None and not self.stop_requested():
+                self.checkpoints.clear(checkpoint_key)
+
+            logger.info("🎉 所有浏览循环完成！")
+            self.log_retry_stats()
+            return True
+
+        except Exception as e:
+            logger.error(f"浏览过程中出错: {e}")
+            logger.info("程序异常结束，输出重试统计:")
+            logger.info(f"总重试次数: {self.retry_stats['total_retries']}")
+            logger.info(f"失败操作次数: {self.retry_stats['failed_operations']}")
+            return False
+        finally:
+            if checkpoint_key is not None:
+                self.checkpoints.close(checkpoint_key)
+
+    def log_retry_stats(self):
+        """输出重试统计信息"""
+        logger.info("=" * 50)
+        logger.info("📊 重试机制统计报告")
+        logger.info("=" * 50)
+        logger.info(f"总重试次数: {self.retry_stats['total_retries']}")
+        logger.info(f"成功重试次数: {self.retry_stats['successful_retries']}")
+        logger.info(f"失败操作次数: {self.retry_stats['failed_operations']}")
+
+        if self.retry_stats['total_retries'] > 0:
+            success_rate = (self.retry_stats['successful_retries'] / self.retry_stats['total_retries']) * 100
+            logger.info(f"重试成功率: {success_rate:.1f}%")
+        else:
+            logger.info("重试成功率: 100% (无需重试)")
+
+        logger.info("=" * 50)
+
+    async def run_with_backend(self, backend, resume=False):
+        """
+        通过后端获取页面并执行双层循环浏览
+
+        Args:
+            backend: BrowserBackend 实例
+            resume (bool): 是否从检查点继续
+
+        Returns:
+            bool: 是否成功
+        """
+        metrics.ACTIVE_WORKERS.inc()
+        self.follow_config()
+        try:
+            try:
+                page = await backend.acquire()
+            except Exception as e:
+                logger.error(f"❌ 启动浏览器失败 ({backend.name}): {e}")
+                page = None
+
+            if page is None:
+                self.on_acquire_failed(backend)
+                return False
+
+            return await self.browse_cycles(page, backend, resume)
+        finally:
+            try:
+                await backend.release()
+            except Exception as e:
+                logger.warning(f"释放浏览器失败 ({backend.name}): {e}")
+            metrics.ACTIVE_WORKERS.dec()
+            self.unfollow_config()
+            self.on_run_finished()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+跨平台构建脚本的增量构建缓存
+每个构建阶段以输入文件的内容哈希作为缓存键，键和输出都未变化的阶段直接跳过，
+每次构建的各阶段耗时记录在清单文件中
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+def installed_packages_fingerprint():
+    """已安装依赖包 (name==version) 的哈希，作为依赖锁定的指纹"""
+    try:
+        from importlib import metadata
+        packages = sorted(
+            f"{(dist.metadata['Name'] or '').lower()}=={dist.version}"
+            for dist in metadata.distributions()
+        )
+    except Exception:
+        packages = []
+    return hashlib.sha256("\n".join(packages).encode('utf-8')).hexdigest()
+
+
+class BuildCache:
+    """基于内容哈希的构建缓存（JSON 清单）"""
+
+    def __init__(self, cache_dir=".build_cache"):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.manifest = self._load_manifest()
+        self.timings = []
+        self._started = time.time()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict):
+                manifest.setdefault('stages', {})
+                manifest.setdefault('file_hashes', {})
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'stages': {}, 'file_hashes': {}, 'builds': []}
+
+    def hash_file(self, path):
+        """文件的 SHA256（按 大小+修改时间 缓存），文件不存在返回 None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        abs_path = os.path.abspath(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        cached = self.manifest['file_hashes'].get(abs_path)
+        if cached and cached['signature'] == signature:
+            return cached['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self.manifest['file_hashes'][abs_path] = {'signature': signature, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def compute_key(self, files=(), extra=None):
+        """
+        计算阶段的缓存键
+
+        Args:
+            files: 输入文件路径（文件缺失也会反映在键中）
+            extra: 其他可 JSON 序列化的输入（选项、版本、命令行等）
+        """
+        digest = hashlib.sha256()
+        for path in sorted(set(files)):
+            digest.update(f"{path}\0{self.hash_file(path)}\n".encode('utf-8'))
+        digest.update(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _output_signature(path):
+        """输出的轻量签名（大小 + 修改时间，目录会遍历）"""
+        if os.path.isdir(path):
+            total_size, latest = 0, 0
+            for dirpath, _, filenames in os.walk(path):
+                for filename in filenames:
+                    try:
+                        stat = os.stat(os.path.join(dirpath, filename))
+                    except OSError:
+                        continue
+                    total_size += stat.st_size
+                    latest = max(latest, stat.st_mtime_ns)
+            return [total_size, latest]
+        try:
+            stat = os.stat(path)
+            return [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            return None
+
+    def is_fresh(self, stage, key):
+        """阶段以相同的键运行过且输出未被改动时返回 True"""
+        entry = self.manifest['stages'].get(stage)
+        if not entry or entry.get('key') != key:
+            return False
+        outputs = entry.get('outputs', {})
+        return all(self._output_signature(path) == signature for path, signature in outputs.items())
+
+    def outputs_of(self, stage):
+        entry = self.manifest['stages'].get(stage) or {}
+        return list(entry.get('outputs', {}))
+
+    def record(self, stage, key, outputs=()):
+        """记录一次成功的阶段运行"""
+        self.manifest['stages'][stage] = {
+            'key': key,
+            'outputs': {path: self._output_signature(path) for path in outputs if os.path.exists(path)},
+            'timestamp': time.time()
+        }
+
+    def invalidate(self, stage=None):
+        """使某个阶段（或所有阶段）的缓存失效"""
+        if stage is None:
+            self.manifest['stages'].clear()
+        else:
+            self.manifest['stages'].pop(stage, None)
+
+    @contextmanager
+    def timed(self, stage):
+        """
+        记录阶段耗时，命中缓存时把 timing['skipped'] 设为 True
+
+            with cache.timed('icons') as timing:
+                if fresh:
+                    timing['skipped'] = True
+        """
+        timing = {'stage': stage, 'skipped': False, 'success': True}
+        start = time.perf_counter()
+        try:
+            yield timing
+        except Exception:
+            timing['success'] = False
+            raise
+        finally:
+            timing['duration'] = round(time.perf_counter() - start, 3)
+            self.timings.append(timing)
+
+    def save(self, success=True):
+        """写入清单（包含本次构建的阶段耗时）"""
+        builds = self.manifest.setdefault('builds', [])
+        builds.append({
+            'timestamp': self._started,
+            'duration': round(time.time() - self._started, 3),
+            'success': success,
+            'python': sys.version.split()[0],
+            'stages': self.timings
+        })
+        # 只保留最近 20 次构建记录
+        del builds[:-20]
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+    def print_timings(self):
+        """打印本次构建的阶段耗时"""
+        print("⏱️ 构建阶段耗时:")
+        for timing in self.timings:
+            state = "跳过(缓存)" if timing['skipped'] else ("完成" if timing['success'] else "失败")
+            print(f"  - {timing['stage']}: {timing['duration']:.2f}s [{state}]")
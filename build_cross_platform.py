@@ -12,6 +12,8 @@ import shutil
 import json
 from pathlib import Path
 
+from build_cache import BuildCache, installed_packages_fingerprint
+
 class CrossPlatformBuilder:
     def __init__(self):
         self.system = platform.system()
@@ -20,6 +22,17 @@ class CrossPlatformBuilder:
         self.build_dir = "dist"
         self.work_dir = "build"
         self.spec_dir = "build"
+        self.spec_file = "LinkenSphereAppleBrowser.spec"
+
+        # 增量构建缓存：输入未变化的阶段直接跳过；clean=True 时完整重建
+        self.cache = BuildCache()
+        self.clean = False
+
+        # 依赖锁定文件（内容变化时重新运行 PyInstaller）
+        self.lock_files = ["requirements.txt"]
+
+        # 图标生成脚本及其输入
+        self.icon_sources = ["simple_icon_creator.py", "icon_pipeline.py", "app_icon.svg"]
 
         # Platform-specific configurations
         self.icon_files = {
@@ -31,7 +44,19 @@ class CrossPlatformBuilder:
         # Required data files for all platforms
         self.data_files = [
             "linken_sphere_playwright_browser.py",
+            "browse_engine.py",
             "linken_sphere_api.py",
+            "cdp_connection_pool.py",
+            "session_watcher.py",
+            "session_records.py",
+            "session_scheduler.py",
+            "profile_leases.py",
+            "metrics.py",
+            "profiling.py",
+            "resource_watchdog.py",
+            "listening_ports.py",
+            "checkpoints.py",
+            "config_service.py",
             "app_icon.ico",
             "app_icon.png"
         ]
@@ -114,29 +139,73 @@ class CrossPlatformBuilder:
 
         return True
     
+    def run_cached_stage(self, stage, key, run, outputs):
+        """
+        执行一个可缓存的构建阶段
+
+        Args:
+            stage (str): 阶段名称
+            key (str): 输入内容哈希（BuildCache.compute_key）
+            run: run(force) -> bool，force 表示之前构建过但输入已变化
+            outputs: 成功后记录的输出路径列表（或返回列表的函数）
+
+        Returns:
+            阶段是否成功（命中缓存视为成功）
+        """
+        with self.cache.timed(stage) as timing:
+            if self.cache.is_fresh(stage, key):
+                print(f"⏭️ {stage}: 输入未变化，跳过")
+                timing['skipped'] = True
+                return True
+
+            force = bool(self.cache.outputs_of(stage))
+            success = bool(run(force))
+            timing['success'] = success
+            if success:
+                self.cache.record(stage, key, outputs() if callable(outputs) else outputs)
+            else:
+                self.cache.invalidate(stage)
+            return success
+
     def ensure_icons(self):
-        """确保图标文件存在"""
+        """确保图标文件存在（图标源文件未变化时跳过）"""
+        icon_file = self.icon_files.get(self.system, "app_icon.png")
+        key = self.cache.compute_key(self.icon_sources, extra={'icon': icon_file})
+        if not self.run_cached_stage("icons", key, self._ensure_icons, ["app_icon.ico", "app_icon.png"]):
+            return False
+
+        # 特殊处理macOS的ICNS文件：PNG变化时重新转换
+        if self.system == "Darwin" and icon_file.endswith('.icns'):
+            key = self.cache.compute_key(["app_icon.png"])
+            return self.run_cached_stage("icns", key, self._ensure_icns, [icon_file])
+        return True
+
+    def _ensure_icns(self, force=False):
+        icon_file = self.icon_files["Darwin"]
+        if force or not os.path.exists(icon_file):
+            self.create_icns_from_png()
+        return os.path.exists(icon_file)
+
+    def _ensure_icons(self, force=False):
+        """确保图标文件存在（force=True 时重新生成）"""
         print("🎨 检查图标文件...")
         
-        icon_file = self.icon_files.get(self.system, "app_icon.png")
+        # macOS 的 ICNS 由 icns 阶段从 PNG 转换，这里只需要 PNG
+        icon_file = "app_icon.png" if self.system == "Darwin" else self.icon_files.get(self.system, "app_icon.png")
         
-        if not os.path.exists(icon_file):
-            print(f"⚠️ 图标文件不存在: {icon_file}")
+        if force or not os.path.exists(icon_file):
+            print(f"⚠️ 图标需要重新生成: {icon_file}")
             print("🎨 创建默认图标...")
             
-            # 运行图标创建脚本
-            if os.path.exists("simple_icon_creator.py"):
-                subprocess.run([sys.executable, "simple_icon_creator.py"], check=True)
+            # 主图渲染一次，PNG/ICO/ICNS 从同一组图像写出（按源哈希缓存）
+            try:
+                from icon_pipeline import generate_icons
+                generate_icons()
                 print("✅ 图标创建完成")
-            else:
-                print("❌ 图标创建脚本不存在")
+            except ImportError as e:
+                print(f"❌ 图标生成失败: {e}")
                 return False
         
-        # 特殊处理macOS的ICNS文件
-        if self.system == "Darwin" and icon_file.endswith('.icns'):
-            if not os.path.exists(icon_file):
-                self.create_icns_from_png()
-
         if os.path.exists(icon_file):
             print(f"✅ 图标文件就绪: {icon_file}")
             return True
@@ -154,34 +223,9 @@ class CrossPlatformBuilder:
             return False
 
         try:
-            # 方法1: 使用macOS的sips命令
-            if self.system == "Darwin":
-                subprocess.run([
-                    "sips", "-s", "format", "icns",
-                    png_path, "--out", icns_path
-                ], check=True, capture_output=True)
-                print(f"✅ 使用sips创建ICNS: {icns_path}")
-                return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-
-        try:
-            # 方法2: 使用PIL创建多尺寸图标
-            from PIL import Image
-            import struct
-
-            # 创建多个尺寸的图标
-            sizes = [16, 32, 64, 128, 256, 512, 1024]
-            images = []
-
-            with Image.open(png_path) as img:
-                for size in sizes:
-                    resized = img.resize((size, size), Image.Resampling.LANCZOS)
-                    images.append(resized)
-
-            # 保存为ICNS (简化版本)
-            # 注意：这是一个简化的实现，真正的ICNS格式更复杂
-            images[0].save(icns_path, format='ICNS', append_images=images[1:])
+            # 与 PNG/ICO 共用图标流水线（按 PNG 内容哈希缓存，不依赖 sips）
+            from icon_pipeline import IconPipeline
+            IconPipeline(source=png_path).write_icns(icns_path)
             print(f"✅ 使用PIL创建ICNS: {icns_path}")
             return True
 
@@ -230,6 +274,49 @@ class CrossPlatformBuilder:
             imports.extend(["--hidden-import", module])
         return imports
 
+    def run_pyinstaller(self, cmd):
+        """运行PyInstaller（非 clean 构建时保留 work 目录中的分析缓存）"""
+        if not self.clean:
+            cmd = [arg for arg in cmd if arg != "--clean"]
+        subprocess.run(cmd, check=True)
+
+    def get_build_inputs(self):
+        """影响PyInstaller输出的所有输入文件"""
+        return ([self.script_name, self.spec_file] + self.data_files + self.optional_files
+                + list(self.icon_files.values()) + self.lock_files)
+
+    def get_pyinstaller_key(self):
+        """PyInstaller阶段的缓存键：源文件、spec、图标、依赖锁定和构建选项的内容哈希"""
+        return self.cache.compute_key(self.get_build_inputs(), extra={
+            'system': self.system,
+            'host': platform.system(),
+            'app_name': self.app_name,
+            'hidden_imports': self.hidden_imports,
+            'python': sys.version,
+            'packages': installed_packages_fingerprint()
+        })
+
+    def collect_artifacts(self):
+        """PyInstaller生成的产物路径（不含DMG）"""
+        candidates = [f"{self.app_name}.exe", self.app_name, f"{self.app_name}.app"]
+        return [os.path.join(self.build_dir, name) for name in candidates
+                if os.path.exists(os.path.join(self.build_dir, name))]
+
+    def build_dmg_stage(self):
+        """DMG阶段：仅在原生macOS上、应用包存在时运行，应用包未变化时由缓存跳过"""
+        app_bundle_path = os.path.join(self.build_dir, f"{self.app_name}.app")
+        if self.system != "Darwin" or platform.system() != "Darwin" or not os.path.exists(app_bundle_path):
+            return True
+
+        dmg_key = self.cache.compute_key(extra=BuildCache._output_signature(app_bundle_path))
+        dmg_path = os.path.join(self.build_dir, f"{self.app_name}.dmg")
+        if self.run_cached_stage("dmg", dmg_key, lambda force: self.create_dmg(), [dmg_path]):
+            print("✅ DMG安装包创建成功")
+            return True
+        # DMG 失败不影响应用包本身
+        print("⚠️ DMG安装包创建失败")
+        return False
+
     def build_windows(self):
         """构建Windows可执行文件"""
         print("🪟 构建Windows可执行文件...")
@@ -254,6 +341,7 @@ class CrossPlatformBuilder:
             "--distpath", self.build_dir,
             "--workpath", self.work_dir,
             "--specpath", self.spec_dir,
+            "--noconfirm",
             "--clean",
             "--icon", icon_abs_path
         ]
@@ -269,7 +357,7 @@ class CrossPlatformBuilder:
         cmd.append(script_abs_path)
         
         try:
-            subprocess.run(cmd, check=True)
+            self.run_pyinstaller(cmd)
             
             # 复制图标到输出目录
             if os.path.exists(icon_path):
@@ -329,6 +417,7 @@ class CrossPlatformBuilder:
             "--distpath", self.build_dir,
             "--workpath", self.work_dir,
             "--specpath", self.spec_dir,
+            "--noconfirm",
             "--clean"
         ]
 
@@ -356,7 +445,7 @@ class CrossPlatformBuilder:
 
         try:
             print("🔨 开始PyInstaller构建...")
-            subprocess.run(cmd, check=True)
+            self.run_pyinstaller(cmd)
 
             # 复制图标到输出目录
             if os.path.exists(icon_path):
@@ -380,10 +469,7 @@ class CrossPlatformBuilder:
                         os.chmod(executable_path, 0o755)
                         print("✅ 可执行权限已设置")
 
-                    # 创建DMG文件
-                    if self.create_dmg():
-                        print("✅ DMG安装包创建成功")
-
+                    # DMG 由独立的 dmg 阶段创建（见 build_dmg_stage）
                     return True
 
                 elif os.path.exists(app_path):
@@ -458,6 +544,7 @@ class CrossPlatformBuilder:
             "--distpath", self.build_dir,
             "--workpath", self.work_dir,
             "--specpath", self.spec_dir,
+            "--noconfirm",
             "--clean"
         ]
 
@@ -472,7 +559,7 @@ class CrossPlatformBuilder:
         cmd.append(script_abs_path)
         
         try:
-            subprocess.run(cmd, check=True)
+            self.run_pyinstaller(cmd)
             
             # 复制图标到输出目录
             if os.path.exists(icon_path):
@@ -580,33 +667,12 @@ class CrossPlatformBuilder:
     def create_icns_from_png(self):
         """从PNG创建ICNS图标文件"""
         try:
-            if platform.system() == "Darwin":
-                # 在macOS上使用sips命令
-                cmd = [
-                    "sips", "-s", "format", "icns",
-                    "app_icon.png", "--out", "app_icon.icns"
-                ]
-                subprocess.run(cmd, check=True, capture_output=True)
-                return True
-            else:
-                # 在其他系统上尝试使用PIL
-                try:
-                    from PIL import Image
-                    img = Image.open("app_icon.png")
-                    # 创建多个尺寸的图标
-                    sizes = [16, 32, 64, 128, 256, 512, 1024]
-                    icons = []
-                    for size in sizes:
-                        resized = img.resize((size, size), Image.Resampling.LANCZOS)
-                        icons.append(resized)
-
-                    # 保存为ICNS（需要pillow-heif支持）
-                    icons[0].save("app_icon.icns", format="ICNS",
-                                append_images=icons[1:], save_all=True)
-                    return True
-                except ImportError:
-                    print("⚠️ PIL不可用，无法创建ICNS图标")
-                    return False
+            from icon_pipeline import IconPipeline
+            IconPipeline(source="app_icon.png").write_icns("app_icon.icns")
+            return True
+        except ImportError:
+            print("⚠️ PIL不可用，无法创建ICNS图标")
+            return False
         except Exception as e:
             print(f"⚠️ 创建ICNS图标失败: {e}")
             return False
@@ -758,9 +824,12 @@ xattr -d com.apple.quarantine {self.app_name}
                 ], check=True, capture_output=True)
 
                 print(f"✅ 创建DMG安装包: {dmg_name}")
+                return True
+            return False
 
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("⚠️ 无法创建DMG安装包")
+            return False
     
     def create_usage_guide(self):
         """创建使用说明"""
@@ -804,39 +873,58 @@ xattr -d com.apple.quarantine {self.app_name}
         print(f"🚀 开始构建 {self.app_name} for {self.system}")
         print("=" * 60)
 
+        success = self._build_stages()
+        self.cache.print_timings()
+        try:
+            self.cache.save(success)
+        except OSError as e:
+            print(f"⚠️ 保存构建缓存清单失败: {e}")
+        return success
+
+    def _build_stages(self):
+        """按阶段执行构建（输入未变化的阶段由缓存跳过）"""
         # 验证跨平台兼容性
-        if not self.verify_cross_platform_compatibility():
+        with self.cache.timed("verify"):
+            compatible = self.verify_cross_platform_compatibility()
+        if not compatible:
             print("❌ 跨平台兼容性验证失败")
             return False
 
         # 检查依赖
-        if not self.check_dependencies():
+        with self.cache.timed("dependencies"):
+            dependencies_ok = self.check_dependencies()
+        if not dependencies_ok:
             print("❌ 依赖检查失败")
             return False
 
+        # 完整重建时清理旧的构建文件和缓存
+        if self.clean:
+            if os.path.exists(self.build_dir):
+                shutil.rmtree(self.build_dir)
+            if os.path.exists(self.work_dir):
+                shutil.rmtree(self.work_dir)
+            self.cache.invalidate()
+
         # 确保图标存在
         if not self.ensure_icons():
             print("⚠️ 图标准备失败，继续构建...")
 
-        # 清理旧的构建文件
-        if os.path.exists(self.build_dir):
-            shutil.rmtree(self.build_dir)
-        if os.path.exists("build"):
-            shutil.rmtree("build")
-
         os.makedirs(self.build_dir, exist_ok=True)
         
         # 根据平台构建
-        success = False
-        if self.system == "Windows":
-            success = self.build_windows()
-        elif self.system == "Darwin":
-            success = self.build_macos()
-        elif self.system == "Linux":
-            success = self.build_linux()
-        else:
+        builders = {
+            "Windows": self.build_windows,
+            "Darwin": self.build_macos,
+            "Linux": self.build_linux
+        }
+        if self.system not in builders:
             print(f"❌ 不支持的平台: {self.system}")
             return False
+
+        success = self.run_cached_stage("pyinstaller", self.get_pyinstaller_key(),
+                                        lambda force: builders[self.system](), self.collect_artifacts)
+        if success:
+            self.build_dmg_stage()
         
         if success:
             # 创建使用说明
@@ -864,9 +952,13 @@ xattr -d com.apple.quarantine {self.app_name}
 def main():
     """主函数"""
     builder = CrossPlatformBuilder()
+
+    # --clean: 忽略构建缓存，完整重建
+    args = [arg for arg in sys.argv[1:] if arg != "--clean"]
+    builder.clean = len(args) != len(sys.argv) - 1
     
-    if len(sys.argv) > 1:
-        target_platform = sys.argv[1].lower()
+    if args:
+        target_platform = args[0].lower()
         if target_platform in ["windows", "macos", "linux"]:
             # 强制指定平台
             platform_map = {
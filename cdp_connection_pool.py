@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+CDP 连接注册表
+按调试端口复用 Playwright 驱动和 connect_over_cdp 得到的 Browser 句柄，
+同一会话的重启/重连不再重复启动驱动进程和 CDP 握手
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+class _CDPEntry:
+    """单个调试端口上的连接记录"""
+
+    __slots__ = ('port', 'browser', 'refcount', 'last_used', 'last_checked')
+
+    def __init__(self, port, browser):
+        self.port = port
+        self.browser = browser
+        self.refcount = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+
+
+class CDPConnectionRegistry:
+    """
+    CDP 连接注册表 - 引用计数 + 健康检查
+
+    Playwright 对象绑定在创建它的事件循环上，所以每个事件循环一个注册表
+    （见 get_registry）。GUI 工作线程通过 run_in_shared_loop 共用同一个循环，
+    这样重启同一会话的线程时可以直接拿到已连接的 Browser。
+    """
+
+    def __init__(self, host="127.0.0.1", idle_timeout=300, health_check_interval=30, health_check_timeout=5):
+        """
+        Args:
+            host (str): 调试端口所在主机
+            idle_timeout (int): 引用计数归零后保留连接的时间（秒）
+            health_check_interval (int): 超过该时间未检查的连接在复用前做一次 CDP 往返检查（秒）
+            health_check_timeout (int): 健康检查超时时间（秒）
+        """
+        self.host = host
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+
+        self._playwright = None
+        self._driver_lock = None
+        self._port_locks = {}
+        self._entries = {}          # {port: _CDPEntry}
+        self._browser_ports = {}    # {id(browser): port}
+        self._reaper_task = None
+
+        self.stats = {
+            'connects': 0,
+            'reuses': 0,
+            'health_failures': 0,
+            'closed': 0
+        }
+
+    async def _get_playwright(self):
+        """启动（或复用）Playwright 驱动"""
+        if self._driver_lock is None:
+            self._driver_lock = asyncio.Lock()
+
+        async with self._driver_lock:
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                logger.info("🚗 Playwright 驱动已启动（共享）")
+            return self._playwright
+
+    def _port_lock(self, port):
+        lock = self._port_locks.get(port)
+        if lock is None:
+            lock = self._port_locks[port] = asyncio.Lock()
+        return lock
+
+    async def _is_healthy(self, entry):
+        """检查连接是否仍然可用"""
+        if not entry.browser.is_connected():
+            return False
+
+        # 最近检查过的连接只看 is_connected，避免每次复用都做往返
+        if time.monotonic() - entry.last_checked < self.health_check_interval:
+            return True
+
+        try:
+            cdp = await asyncio.wait_for(entry.browser.new_browser_cdp_session(), self.health_check_timeout)
+            try:
+                await asyncio.wait_for(cdp.send("Browser.getVersion"), self.health_check_timeout)
+            finally:
+                await cdp.detach()
+            entry.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"端口 {entry.port} 的 CDP 连接健康检查失败: {e}")
+            return False
+
+    async def acquire(self, port, timeout=30000):
+        """
+        获取指定调试端口上的 Browser 句柄
+
+        Args:
+            port (int): 调试端口
+            timeout (int): 新建连接的超时时间（毫秒）
+
+        Returns:
+            Browser 对象；连接失败时抛出异常
+        """
+        port = int(port)
+        async with self._port_lock(port):
+            entry = self._entries.get(port)
+            if entry is not None:
+                if await self._is_healthy(entry):
+                    entry.refcount += 1
+                    entry.last_used = time.monotonic()
+                    self.stats['reuses'] += 1
+                    logger.info(f"♻️ 复用端口 {port} 的 CDP 连接 (引用数: {entry.refcount})")
+                    return entry.browser
+
+                self.stats['health_failures'] += 1
+                await self._close_entry(entry)
+
+            playwright = await self._get_playwright()
+            browser = await playwright.chromium.connect_over_cdp(f"http://{self.host}:{port}", timeout=timeout)
+
+            entry = _CDPEntry(port, browser)
+            entry.refcount = 1
+            self._entries[port] = entry
+            self._browser_ports[id(browser)] = port
+            self.stats['connects'] += 1
+            logger.info(f"🔗 新建端口 {port} 的 CDP 连接")
+
+        self._ensure_reaper()
+        return browser
+
+    async def release(self, browser, discard=False):
+        """
+        归还 Browser 句柄
+
+        Args:
+            browser: acquire 返回的 Browser 对象
+            discard (bool): 是否直接关闭连接（例如连接已损坏）
+        """
+        port = self._browser_ports.get(id(browser))
+        entry = self._entries.get(port) if port is not None else None
+        if entry is None or entry.browser is not browser:
+            return
+
+        entry.refcount = max(0, entry.refcount - 1)
+        entry.last_used = time.monotonic()
+
+        if discard or not browser.is_connected():
+            async with self._port_lock(port):
+                if self._entries.get(port) is entry:
+                    await self._close_entry(entry)
+
+    async def invalidate(self, port):
+        """关闭并移除指定端口的连接（例如会话已被停止）"""
+        port = int(port)
+        async with self._port_lock(port):
+            entry = self._entries.get(port)
+            if entry is not None:
+                await self._close_entry(entry)
+
+    async def _close_entry(self, entry):
+        self._entries.pop(entry.port, None)
+        self._browser_ports.pop(id(entry.browser), None)
+        self.stats['closed'] += 1
+        try:
+            # 对 connect_over_cdp 得到的 Browser，close 只断开连接，不会关闭 Linken Sphere 的浏览器
+            await entry.browser.close()
+        except Exception as e:
+            logger.debug(f"关闭端口 {entry.port} 的 CDP 连接时出错: {e}")
+
+    def _ensure_reaper(self):
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.get_running_loop().create_task(self._reap_idle())
+
+    async def _reap_idle(self):
+        """定期关闭空闲超时的连接"""
+        while self._entries:
+            await asyncio.sleep(min(30, max(1, self.idle_timeout / 2)))
+            now = time.monotonic()
+            for entry in list(self._entries.values()):
+                if entry.refcount == 0 and now - entry.last_used >= self.idle_timeout:
+                    async with self._port_lock(entry.port):
+                        if self._entries.get(entry.port) is entry and entry.refcount == 0:
+                            logger.info(f"⏲️ 端口 {entry.port} 的 CDP 连接空闲超时，已断开")
+                            await self._close_entry(entry)
+
+    async def close_all(self):
+        """关闭所有连接并停止驱动"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+
+        for entry in list(self._entries.values()):
+            await self._close_entry(entry)
+
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            finally:
+                self._playwright = None
+                logger.info("🚗 Playwright 驱动已停止")
+
+
+_registries = weakref.WeakKeyDictionary()
+
+
+def get_registry():
+    """获取当前事件循环的连接注册表（必须在协程中调用）"""
+    loop = asyncio.get_running_loop()
+    registry = _registries.get(loop)
+    if registry is None:
+        registry = _registries[loop] = CDPConnectionRegistry()
+    return registry
+
+
+_shared_loop = None
+_shared_loop_lock = threading.Lock()
+
+
+def get_shared_loop():
+    """获取后台共享事件循环（首次调用时在守护线程中启动）"""
+    global _shared_loop
+
+    with _shared_loop_lock:
+        if _shared_loop is None or _shared_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="cdp-shared-loop", daemon=True)
+            thread.start()
+            _shared_loop = loop
+        return _shared_loop
+
+
+def run_in_shared_loop(coro):
+    """
+    在共享事件循环中运行协程并阻塞等待结果
+
+    各 GUI 工作线程调用此函数代替 new_event_loop + run_until_complete，
+    从而共享同一个 Playwright 驱动和 CDP 连接注册表。
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_shared_loop())
+    return future.result()
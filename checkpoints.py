@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+双层循环的检查点
+每个工作者（通常以配置文件/会话 UUID 命名）一个只追加的 JSON Lines 文件（默认 checkpoints/<工作者>.jsonl）：
+- visit 记录：每次页面访问后一行，包含大/小循环序号、链接目录版本、重试统计和会话 UUID
+- catalog 记录：每次刷新链接后一行，保存该版本的链接列表，恢复时不必重新回到主页获取链接
+每条记录用一次 O_APPEND 的 os.write 写入，进程崩溃时最多留下一行不完整的记录，读取时跳过；
+文件超过一定行数时用临时文件 + os.replace 原子地压缩为最新的检查点、最新的目录及检查点所用的目录。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+# 文件超过多少行后压缩
+COMPACT_AFTER = 500
+
+
+class CheckpointStore:
+    """按工作者保存和读取检查点"""
+
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR, compact_after=COMPACT_AFTER):
+        self.directory = directory
+        self.compact_after = compact_after
+        self._files = {}  # 工作者 -> [文件描述符, 行数, 最新的 catalog 记录, 最新的 visit 记录]
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        """工作者的检查点文件路径"""
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', str(key)) + ".jsonl")
+
+    def _open(self, key):
+        entry = self._files.get(key)
+        if entry is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(key)
+            state = self._read(path)
+            if state['torn']:
+                # 去掉崩溃时写了一半的最后一行，新记录才能从完整的一行开始
+                os.truncate(path, state['size'])
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            entry = self._files[key] = [fd, state['lines'], state['catalog'], state['checkpoint']]
+        return entry
+
+    def _append(self, key, record):
+        data = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        with self._lock:
+            entry = self._open(key)
+            if record['type'] == 'catalog':
+                entry[2] = record
+            else:
+                entry[3] = record
+            if entry[1] >= self.compact_after:
+                self._compact(key, entry)
+                return
+            os.write(entry[0], data)
+            entry[1] += 1
+
+    def _compact(self, key, entry):
+        """用最新的 catalog 记录和最新的 visit 记录（包括本条）原子地替换检查点文件"""
+        path = self.path(key)
+        temp_path = path + ".tmp"
+        # 检查点可能引用较早版本的目录，该版本也要保留
+        records = []
+        checkpoint = entry[3]
+        if checkpoint is not None and entry[2] is not None \
+                and checkpoint.get('catalog_version') != entry[2].get('version'):
+            old_catalog = self._read(path)['catalogs'].get(checkpoint.get('catalog_version'))
+            if old_catalog is not None:
+                records.append(old_catalog)
+        records += [record for record in (entry[2], checkpoint) if record is not None]
+        lines = [(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+                 for record in records]
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.close(entry[0])
+        os.replace(temp_path, path)
+        entry[0] = os.open(path, os.O_WRONLY | os.O_APPEND)
+        entry[1] = len(lines)
+
+    def save_catalog(self, key, version, links):
+        """记录一个版本的链接目录（每次刷新链接后调用）"""
+        self._append(key, {'type': 'catalog', 'version': version, 'links': links})
+
+    def save(self, key, major_cycle, minor_cycle, catalog_version, retry_stats, session_uuid=None):
+        """
+        记录一次页面访问后的检查点
+
+        Args:
+            key: 工作者名称
+            major_cycle (int): 当前大循环序号（从 1 开始）
+            minor_cycle (int): 当前大循环中已完成的访问次数
+            catalog_version (int): 本次访问使用的链接目录版本
+            retry_stats (dict): 重试统计
+            session_uuid (str): 会话 UUID
+        """
+        self._append(key, {
+            'type': 'visit',
+            'time': round(time.time(), 3),
+            'major_cycle': major_cycle,
+            'minor_cycle': minor_cycle,
+            'catalog_version': catalog_version,
+            'retry_stats': retry_stats,
+            'session_uuid': session_uuid,
+        })
+
+    @staticmethod
+    def _read(path):
+        state = {'lines': 0, 'size': 0, 'torn': False, 'checkpoint': None, 'catalog': None, 'catalogs': {}}
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return state
+
+        state['size'] = data.rfind(b'\n') + 1
+        state['torn'] = state['size'] < len(data)
+        for line in data.splitlines():
+            state['lines'] += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 崩溃时写了一半的记录
+                continue
+            if record.get('type') == 'visit':
+                state['checkpoint'] = record
+            elif record.get('type') == 'catalog':
+                state['catalog'] = record
+                state['catalogs'][record.get('version')] = record
+        return state
+
+    def load(self, key):
+        """
+        读取工作者最近的检查点
+
+        Returns:
+            (检查点, 该检查点使用的链接列表或 None)，没有检查点时返回 (None, None)
+        """
+        with self._lock:
+            state = self._read(self.path(key))
+        checkpoint = state['checkpoint']
+        if checkpoint is None:
+            return None, None
+        catalog = state['catalogs'].get(checkpoint.get('catalog_version'))
+        return checkpoint, catalog['links'] if catalog else None
+
+    def clear(self, key):
+        """删除工作者的检查点（运行正常结束或不恢复时调用）"""
+        with self._lock:
+            entry = self._files.pop(key, None)
+            if entry is not None:
+                os.close(entry[0])
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def close(self, key):
+        """关闭工作者的检查点文件（保留内容供下次恢复）"""
+        with self._lock:
+            entry = self._files.pop(key, None)
+            if entry is not None:
+                os.close(entry[0])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store():
+    """获取进程内共享的检查点存储（checkpoints/ 目录）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore()
+        return _store
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+linken_sphere_config.json 配置服务
+- 按模式校验配置：类型或范围不正确的字段被拒绝（保留原值并记录原因），未知字段原样保留
+- 后台线程按修改时间轮询文件，变化时重新加载并通知订阅者 callback(changes)，
+  changes 为 {字段: (旧值, 新值)}
+- update() 校验后以临时文件 + os.replace 原子写入，不会触发自己的重新加载
+运行中的工作者订阅后即可实时使用新的 browse_duration / retry_delay / max_retries，
+GUI 据此实时调整线程数，调优吞吐量不需要停止所有会话。
+"""
+
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = "linken_sphere_config.json"
+DEFAULT_POLL_INTERVAL = 2.0
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+SESSION_STRATEGIES = ('round_robin', 'lru', 'health_weighted')
+
+# 字段 -> (类型, 最小值, 最大值) 或 (类型, 可选值)
+CONFIG_SCHEMA = {
+    'browse_duration': (int, 1, 24 * 3600),
+    'major_cycles': (int, 1, 1000000),
+    'minor_cycles_per_major': (int, 1, 1000),
+    'max_retries': (int, 1, 100),
+    'retry_delay': ((int, float), 0, 3600),
+    'linken_api_port': (int, 1, 65535),
+    'debug_port': (int, 1, 65535),
+    'max_threads': (int, 1, 10000),
+    'metrics_port': (int, 0, 65535),
+    'use_existing_session': (bool,),
+    'auto_save_logs': (bool,),
+    'resume_runs': (bool,),
+    'log_level': (str, LOG_LEVELS),
+    'session_strategy': ((str, type(None)), SESSION_STRATEGIES + (None,)),
+}
+
+
+def validate_config(data, schema=CONFIG_SCHEMA):
+    """
+    校验配置
+
+    Returns:
+        (通过校验的字段, 错误信息列表)
+    """
+    if not isinstance(data, dict):
+        return {}, [f"配置必须是 JSON 对象，而不是 {type(data).__name__}"]
+
+    valid = {}
+    errors = []
+    for key, value in data.items():
+        rule = schema.get(key)
+        if rule is None:
+            valid[key] = value
+            continue
+
+        expected = rule[0]
+        # bool 是 int 的子类，数值字段不接受 true/false
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            names = expected.__name__ if isinstance(expected, type) else '/'.join(t.__name__ for t in expected)
+            errors.append(f"{key}: 应为 {names}，实际为 {value!r}")
+            continue
+        if len(rule) == 2 and value not in rule[1]:
+            errors.append(f"{key}: {value!r} 不是可选值 {list(rule[1])}")
+            continue
+        if len(rule) == 3 and not rule[1] <= value <= rule[2]:
+            errors.append(f"{key}: {value!r} 超出范围 [{rule[1]}, {rule[2]}]")
+            continue
+        valid[key] = value
+    return valid, errors
+
+
+class ConfigService:
+    """可热重载的配置服务"""
+
+    def __init__(self, path=CONFIG_FILE, poll_interval=DEFAULT_POLL_INTERVAL, schema=CONFIG_SCHEMA):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.schema = schema
+        self._values = {}
+        self._signature = None  # 最近一次加载或写入时文件的 (mtime_ns, size)
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._watch_stop = None
+        self._watch_thread = None
+        self.last_errors = []
+
+    # ---- 读取 ----
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self):
+        """当前配置的副本"""
+        with self._lock:
+            return dict(self._values)
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """
+        从文件加载配置（文件不存在时为空配置）并通知变化
+
+        Returns:
+            list: 校验错误（JSON 无法解析时保留当前配置）
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None:
+                self._signature = None
+                return []
+            # 解析失败也记录文件状态，编辑器写完后文件会再次变化
+            self._signature = signature
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # 可能是编辑器正在写入，保留当前配置，文件再次修改时重新加载
+                self.last_errors = [f"无法解析 {self.path}: {e}"]
+                logger.warning(f"⚠️ 配置文件无法解析，继续使用当前配置: {e}")
+                return self.last_errors
+
+            valid, errors = validate_config(data, self.schema)
+            if not isinstance(data, dict):
+                self.last_errors = errors
+                logger.warning(f"⚠️ 配置文件格式错误，继续使用当前配置: {errors[0]}")
+                return errors
+            # 无效字段保留原值，文件中已删除的字段一并删除
+            merged = {key: value for key, value in self._values.items() if key in data}
+            merged.update(valid)
+            changes = self._replace(merged)
+            self.last_errors = errors
+
+        for error in errors:
+            logger.warning(f"⚠️ 配置无效，已忽略: {error}")
+        self._notify(changes)
+        return errors
+
+    def reload_if_changed(self):
+        """文件修改时间或大小变化时重新加载，返回是否重新加载"""
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return False
+        logger.info(f"🔄 检测到 {self.path} 已修改，重新加载配置")
+        self.load()
+        return True
+
+    # ---- 写入 ----
+
+    def update(self, values, save=True):
+        """
+        校验并更新配置
+
+        Args:
+            values (dict): 要更新的字段
+            save (bool): 是否原子写入配置文件
+
+        Returns:
+            list: 校验错误（有错误时不更新任何字段）
+        """
+        valid, errors = validate_config(values, self.schema)
+        if errors:
+            return errors
+
+        with self._lock:
+            merged = dict(self._values)
+            merged.update(valid)
+            if save:
+                self._write(merged)
+            changes = self._replace(merged)
+        self._notify(changes)
+        return []
+
+    def _write(self, values):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(values, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._signature = self._file_signature()
+
+    def _replace(self, values):
+        changes = {key: (self._values.get(key), values.get(key))
+                   for key in set(self._values) | set(values)
+                   if self._values.get(key) != values.get(key)}
+        self._values = values
+        return changes
+
+    # ---- 通知 ----
+
+    def subscribe(self, callback):
+        """订阅配置变化 callback(changes)（在修改配置的线程或轮询线程中调用）"""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self, changes):
+        if not changes:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                logger.error(f"配置变化回调出错: {e}")
+
+    # ---- 文件监视 ----
+
+    def start_watching(self):
+        """启动后台轮询线程（重复调用无效）"""
+        with self._lock:
+            if self._watch_thread is not None and self._watch_thread.is_alive():
+                return
+            self._watch_stop = threading.Event()
+            self._watch_thread = threading.Thread(target=self._watch, args=(self._watch_stop,),
+                                                  name="config-watch", daemon=True)
+            self._watch_thread.start()
+
+    def _watch(self, stop_event):
+        while not stop_event.wait(self.poll_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"重新加载配置失败: {e}")
+
+    def stop_watching(self):
+        with self._lock:
+            if self._watch_stop is not None:
+                self._watch_stop.set()
+            self._watch_thread = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_config_service():
+    """获取进程内共享的配置服务（linken_sphere_config.json，首次获取时加载）"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConfigService()
+            _service.load()
+        return _service
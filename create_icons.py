@@ -39,182 +39,51 @@ def create_simple_icon_svg():
     
     print("✅ Created app_icon.svg")
 
+# Standard PNG sizes kept on disk for other tools
+PNG_SIZES = [16, 32, 48, 64, 128, 256, 512]
+
+_pipeline = None
+
+def get_icon_pipeline():
+    """Shared icon pipeline: the SVG is rendered once and every format reuses the same images"""
+    global _pipeline
+    if _pipeline is None:
+        from icon_pipeline import IconPipeline
+        _pipeline = IconPipeline(source='app_icon.svg')
+    return _pipeline
+
 def create_png_from_svg():
-    """Convert SVG to PNG using available tools"""
+    """Convert SVG to PNG (cairosvg, Inkscape or the built-in drawing as fallback)"""
     try:
-        # Try using cairosvg (Python library)
-        import cairosvg
-        
-        # Create multiple sizes for better icon quality
-        sizes = [16, 32, 48, 64, 128, 256, 512]
-        
-        for size in sizes:
-            cairosvg.svg2png(
-                url='app_icon.svg',
-                write_to=f'app_icon_{size}.png',
-                output_width=size,
-                output_height=size
-            )
-            print(f"✅ Created app_icon_{size}.png")
-        
-        return True
+        paths = get_icon_pipeline().write_pngs(sizes=PNG_SIZES)
+        for path in paths:
+            print(f"✅ Created {path}")
+        return bool(paths)
         
     except ImportError:
-        print("⚠️ cairosvg not available, trying alternative methods...")
-        
-        # Try using Pillow with svg support
-        try:
-            from PIL import Image
-            import subprocess
-            
-            # Try using Inkscape if available
-            try:
-                subprocess.run(['inkscape', '--version'], capture_output=True, check=True)
-                
-                sizes = [16, 32, 48, 64, 128, 256, 512]
-                for size in sizes:
-                    subprocess.run([
-                        'inkscape',
-                        '--export-type=png',
-                        f'--export-filename=app_icon_{size}.png',
-                        f'--export-width={size}',
-                        f'--export-height={size}',
-                        'app_icon.svg'
-                    ], check=True)
-                    print(f"✅ Created app_icon_{size}.png using Inkscape")
-                
-                return True
-                
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                print("⚠️ Inkscape not available")
-                
-        except ImportError:
-            pass
-        
-        # Fallback: create a simple colored rectangle as PNG
-        try:
-            from PIL import Image, ImageDraw, ImageFont
-            
-            sizes = [16, 32, 48, 64, 128, 256, 512]
-            
-            for size in sizes:
-                # Create image
-                img = Image.new('RGBA', (size, size), (30, 30, 30, 255))
-                draw = ImageDraw.Draw(img)
-                
-                # Draw background circle
-                margin = size // 16
-                draw.ellipse([margin, margin, size-margin, size-margin], 
-                           fill=(13, 115, 119, 255), outline=(255, 255, 255, 255), width=max(1, size//64))
-                
-                # Draw simple "LA" text for Linken Apple
-                try:
-                    font_size = max(8, size // 4)
-                    font = ImageFont.load_default()
-                    text = "LA"
-                    
-                    # Get text size
-                    bbox = draw.textbbox((0, 0), text, font=font)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-                    
-                    # Center text
-                    x = (size - text_width) // 2
-                    y = (size - text_height) // 2
-                    
-                    draw.text((x, y), text, fill=(255, 255, 255, 255), font=font)
-                    
-                except:
-                    # If text fails, draw a simple shape
-                    center = size // 2
-                    radius = size // 4
-                    draw.ellipse([center-radius, center-radius, center+radius, center+radius], 
-                               fill=(255, 255, 255, 255))
-                
-                img.save(f'app_icon_{size}.png')
-                print(f"✅ Created app_icon_{size}.png using PIL")
-            
-            return True
-            
-        except ImportError:
-            print("❌ No image processing libraries available")
-            return False
+        print("❌ No image processing libraries available")
+        return False
 
 def create_ico_file():
     """Create Windows .ico file"""
     try:
-        from PIL import Image
-        
-        # Load PNG files
-        sizes = [16, 32, 48, 64, 128, 256]
-        images = []
-        
-        for size in sizes:
-            png_file = f'app_icon_{size}.png'
-            if os.path.exists(png_file):
-                img = Image.open(png_file)
-                images.append(img)
-        
-        if images:
-            # Save as ICO
-            images[0].save('app_icon.ico', format='ICO', sizes=[(img.width, img.height) for img in images])
-            print("✅ Created app_icon.ico")
-            return True
-        else:
-            print("❌ No PNG files found for ICO creation")
-            return False
+        get_icon_pipeline().write_ico('app_icon.ico')
+        print("✅ Created app_icon.ico")
+        return True
             
     except ImportError:
         print("❌ PIL not available for ICO creation")
         return False
+    except Exception as e:
+        print(f"❌ ICO creation failed: {e}")
+        return False
 
 def create_icns_file():
-    """Create macOS .icns file"""
+    """Create macOS .icns file (written by Pillow, works on every platform)"""
     try:
-        import subprocess
-        
-        # Check if iconutil is available (macOS only)
-        try:
-            subprocess.run(['iconutil', '--version'], capture_output=True, check=True)
-            
-            # Create iconset directory
-            iconset_dir = 'app_icon.iconset'
-            os.makedirs(iconset_dir, exist_ok=True)
-            
-            # Copy PNG files with correct naming for iconset
-            icon_mappings = {
-                16: 'icon_16x16.png',
-                32: ['icon_16x16@2x.png', 'icon_32x32.png'],
-                64: 'icon_32x32@2x.png',
-                128: ['icon_64x64@2x.png', 'icon_128x128.png'],
-                256: ['icon_128x128@2x.png', 'icon_256x256.png'],
-                512: ['icon_256x256@2x.png', 'icon_512x512.png'],
-            }
-            
-            for size, names in icon_mappings.items():
-                src_file = f'app_icon_{size}.png'
-                if os.path.exists(src_file):
-                    if isinstance(names, list):
-                        for name in names:
-                            import shutil
-                            shutil.copy2(src_file, os.path.join(iconset_dir, name))
-                    else:
-                        import shutil
-                        shutil.copy2(src_file, os.path.join(iconset_dir, names))
-            
-            # Create ICNS file
-            subprocess.run(['iconutil', '-c', 'icns', iconset_dir], check=True)
-            
-            # Clean up iconset directory
-            import shutil
-            shutil.rmtree(iconset_dir)
-            
-            print("✅ Created app_icon.icns")
-            return True
-            
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            print("⚠️ iconutil not available (not on macOS)")
-            return False
+        get_icon_pipeline().write_icns('app_icon.icns')
+        print("✅ Created app_icon.icns")
+        return True
             
     except Exception as e:
         print(f"❌ ICNS creation failed: {e}")
@@ -261,13 +130,13 @@ def main():
         if create_ico_file():
             print("✅ Windows ICO creation successful")
         
-        # Create macOS ICNS (only works on macOS)
+        # Create macOS ICNS
         if create_icns_file():
             print("✅ macOS ICNS creation successful")
         
         # Clean up intermediate PNG files
         try:
-            for size in [16, 32, 48, 64, 128, 256, 512]:
+            for size in PNG_SIZES:
                 png_file = f'app_icon_{size}.png'
                 if os.path.exists(png_file):
                     os.remove(png_file)
@@ -3,11 +3,15 @@
 诊断 Linken Sphere 调试端口的脚本
 """
 
+import asyncio
 import requests
 import json
 import subprocess
 import re
 
+from listening_ports import is_linken_sphere_process, list_listening_ports
+from scan_session_ports import async_scan_ports
+
 def get_linken_sphere_sessions():
     """获取 Linken Sphere 会话信息"""
     try:
@@ -81,10 +85,45 @@ def scan_debug_ports():
     
     return active_ports
 
+LOCAL_ADDRESSES = ('127.0.0.1', '0.0.0.0', '::1', '::')
+
+
+def check_proc_listening_ports(min_port=9000, max_port=50000):
+    """
+    读取 /proc/net/tcp(6) 获取监听端口（Linux 快速路径，不发起任何连接）
+
+    Returns:
+        端口列表，/proc 不可用时返回 None
+    """
+    listeners = list_listening_ports(min_port, max_port)
+    if listeners is None:
+        return None
+
+    # 在同一次扫描结果上识别 Linken Sphere 的端口，不再重新读取 /proc
+    linken_cache = {}
+    linken_ports = {item['port'] for item in listeners
+                    if item['pid'] and is_linken_sphere_process(item['pid'], linken_cache)}
+    listeners = [item for item in listeners if item['address'] in LOCAL_ADDRESSES]
+
+    print(f"📋 /proc 中发现 {len(listeners)} 个本地监听端口:")
+    for item in listeners:
+        owner = f"{item['process']} (PID {item['pid']})" if item['pid'] else "未知进程"
+        marker = " ⭐ Linken Sphere" if item['port'] in linken_ports else ""
+        print(f"   - {item['address']}:{item['port']}  {owner}{marker}")
+
+    # 能识别出 Linken Sphere 的端口时只返回这些端口
+    if linken_ports:
+        return sorted(linken_ports)
+    return sorted({item['port'] for item in listeners})
+
 def check_netstat_ports():
-    """使用 netstat 检查监听端口"""
+    """检查监听端口（Linux 读取 /proc，其他平台使用 netstat，都失败时回退到端口探测）"""
     print("\n🔍 检查系统监听端口...")
-    
+
+    proc_ports = check_proc_listening_ports()
+    if proc_ports is not None:
+        return proc_ports
+
     try:
         # Windows netstat 命令
         result = subprocess.run(
@@ -115,18 +154,32 @@ def check_netstat_ports():
             return listening_ports
         else:
             print("❌ netstat 命令执行失败")
-            return []
             
     except Exception as e:
         print(f"❌ 检查端口失败: {e}")
+
+    return probe_listening_ports()
+
+def probe_listening_ports(min_port=9000, max_port=50000):
+    """无法读取系统端口表时，异步探测端口范围"""
+    print("🔍 回退到端口探测...")
+    try:
+        open_ports = asyncio.run(async_scan_ports("127.0.0.1", min_port, max_port, fingerprint=False))
+    except Exception as e:
+        print(f"❌ 端口探测失败: {e}")
         return []
 
+    listening_ports = [item["port"] for item in open_ports]
+    print(f"📋 探测到 {len(listening_ports)} 个本地监听端口:")
+    for port in listening_ports:
+        print(f"   - 127.0.0.1:{port}")
+    return listening_ports
+
 def test_playwright_connection(port):
     """测试 Playwright 连接"""
     print(f"\n🧪 测试 Playwright 连接到端口 {port}...")
     
     try:
-        import asyncio
         from playwright.async_api import async_playwright
         
         async def test_connection():
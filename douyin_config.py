@@ -54,6 +54,8 @@ class DouyinConfig:
     # 安全配置
     CREDENTIALS_EXPIRE_DAYS = 90
     ENCRYPTION_SALT = b'douyin_chat_monitor_salt_2024'
+    # 是否把派生的机器密钥缓存到系统钥匙串（需要安装 keyring），下次启动免去 PBKDF2 计算
+    KEYRING_KEY_CACHE = False
     
     # API端点配置
     API_ENDPOINTS = {
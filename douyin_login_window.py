@@ -5,13 +5,15 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
 from douyin_security_manager import DouyinSecurityManager
+from douyin_network_service import DouyinNetworkService, SERVER_OK, SERVER_ERROR
 from douyin_config import config
 
 class DouyinLoginWindow:
     def __init__(self):
         self.security_manager = DouyinSecurityManager()
+        # 后台网络服务：状态检查和登录验证都不阻塞界面
+        self.network = DouyinNetworkService(self.security_manager)
         self.login_successful = False
         self.username = ""
         self.password = ""
@@ -44,6 +46,16 @@ class DouyinLoginWindow:
 
         # 设置窗口关闭事件
         self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # 定期处理后台网络请求的结果
+        self.window.after(50, self._poll_network_results)
+
+    def _poll_network_results(self):
+        """在 Tk 主线程中处理网络服务返回的结果"""
+        if self.is_closing:
+            return
+        self.network.process_results()
+        self.window.after(50, self._poll_network_results)
     
     def set_window_icon(self):
         """设置窗口图标"""
@@ -248,8 +260,8 @@ class DouyinLoginWindow:
         # 加载初始数据
         self.load_initial_data()
         
-        # 检查服务器状态
-        threading.Thread(target=self.check_server_status, daemon=True).start()
+        # 检查服务器状态（后台进行，不阻塞窗口显示）
+        self.check_server_status()
     
     def load_initial_data(self):
         """加载初始数据"""
@@ -263,23 +275,20 @@ class DouyinLoginWindow:
             self.username_var.set("admin")
             self.password_entry.focus()  # 焦点移到密码框
     
-    def check_server_status(self):
+    def check_server_status(self, force=False):
         """检查服务器状态"""
-        try:
-            import requests
-            response = requests.get(f"{self.security_manager.server_url}/api/status", timeout=5)
-            if response.status_code == 200:
-                if not self.is_closing:
-                    self.window.after(0, lambda: self.server_status_label.config(
-                        text="✅ 服务器连接正常", fg='#52c41a'))
-            else:
-                if not self.is_closing:
-                    self.window.after(0, lambda: self.server_status_label.config(
-                        text="⚠️ 服务器响应异常，将使用本地验证", fg='#faad14'))
-        except:
-            if not self.is_closing:
-                self.window.after(0, lambda: self.server_status_label.config(
-                    text="⚠️ 无法连接服务器，将使用本地验证", fg='#faad14'))
+        self.network.check_server_status(self._on_server_status, force=force)
+
+    def _on_server_status(self, status, error):
+        """服务器状态检查完成（Tk 主线程）"""
+        if self.is_closing:
+            return
+        if status == SERVER_OK:
+            self.server_status_label.config(text="✅ 服务器连接正常", fg='#52c41a')
+        elif status == SERVER_ERROR:
+            self.server_status_label.config(text="⚠️ 服务器响应异常，将使用本地验证", fg='#faad14')
+        else:
+            self.server_status_label.config(text="⚠️ 无法连接服务器，将使用本地验证", fg='#faad14')
 
     def login(self):
         """登录验证"""
@@ -310,30 +319,27 @@ class DouyinLoginWindow:
         self.status_label.config(text="正在验证登录信息...", fg='#1890ff')
 
         # 在后台线程中验证登录
-        threading.Thread(target=self._verify_login, args=(username, password), daemon=True).start()
+        print(f"[INFO] 开始验证用户: {username}")
+        self.network.verify_user(username, password,
+                                 lambda result, error: self._on_verify_result(username, password, result, error))
 
-    def _verify_login(self, username, password):
-        """后台验证登录"""
-        try:
-            print(f"[INFO] 开始验证用户: {username}")
-
-            # 首先尝试远程验证
-            result = self.security_manager.verify_user_remote(username, password)
-            print(f"[INFO] 验证结果: {result}")
+    def _on_verify_result(self, username, password, result, error):
+        """后台验证完成（Tk 主线程）"""
+        if self.is_closing:
+            return
 
-            if result:
-                # 登录成功
-                if not self.is_closing:
-                    self.window.after(0, self._login_success, username, password)
-            else:
-                # 登录失败
-                if not self.is_closing:
-                    self.window.after(0, self._login_failed)
+        if error is not None:
+            print(f"[ERROR] 验证出错: {error}")
+            self._login_error(str(error))
+            return
 
-        except Exception as e:
-            print(f"[ERROR] 验证出错: {e}")
-            if not self.is_closing:
-                self.window.after(0, self._login_error, str(e))
+        print(f"[INFO] 验证结果: {result}")
+        if result:
+            # 登录成功
+            self._login_success(username, password)
+        else:
+            # 登录失败
+            self._login_failed()
 
     def _login_success(self, username, password):
         """登录成功处理"""
@@ -358,6 +364,7 @@ class DouyinLoginWindow:
         """关闭登录窗口"""
         print(f"[INFO] 关闭登录窗口")
         self.is_closing = True
+        self.network.shutdown()
         try:
             self.window.quit()
             self.window.destroy()
@@ -381,6 +388,7 @@ class DouyinLoginWindow:
     def on_closing(self):
         """窗口关闭事件"""
         self.is_closing = True
+        self.network.shutdown()
         try:
             self.window.quit()
             self.window.destroy()
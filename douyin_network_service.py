@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+抖音聊天监控工具登录网络服务模块
+登录流程中的网络请求统一在后台线程池执行：复用带连接池的 requests.Session，
+服务器状态检查与登录验证可以同时进行，结果通过队列交回 Tk 主线程处理，
+服务器健康状态在短时间内缓存，登录窗口打开时不再等待认证服务器。
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 服务器状态
+SERVER_OK = 'ok'
+SERVER_ERROR = 'error'              # 服务器有响应但状态码异常
+SERVER_UNREACHABLE = 'unreachable'  # 无法连接 / 超时
+
+# 服务器健康状态缓存 {server_url: (时间戳, 状态)}，同一进程内的登录窗口共享
+_health_cache = {}
+_health_lock = threading.Lock()
+
+
+class DouyinNetworkService:
+    """登录窗口的后台网络服务"""
+
+    def __init__(self, security_manager, max_workers=4, health_ttl=30.0, status_timeout=5):
+        """
+        Args:
+            security_manager: DouyinSecurityManager 实例
+            max_workers (int): 后台线程数
+            health_ttl (float): 服务器健康状态缓存时间（秒）
+            status_timeout (float): 状态检查超时（秒）
+        """
+        self.security_manager = security_manager
+        self.server_url = security_manager.server_url
+        self.health_ttl = health_ttl
+        self.status_timeout = status_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.results = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="douyin-net")
+        self._closed = False
+
+    def _submit(self, func, callback, *args):
+        """在后台执行 func(*args)，完成后把 (callback, 结果, 异常) 放入结果队列"""
+        if self._closed:
+            return None
+
+        def _run():
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            if not self._closed:
+                self.results.put((callback, result, error))
+
+        return self._executor.submit(_run)
+
+    def get_cached_status(self):
+        """返回缓存中仍有效的服务器状态，没有时返回 None"""
+        with _health_lock:
+            cached = _health_cache.get(self.server_url)
+        if cached and time.time() - cached[0] < self.health_ttl:
+            return cached[1]
+        return None
+
+    def _fetch_status(self):
+        try:
+            response = self.session.get(f"{self.server_url}/api/status", timeout=self.status_timeout)
+            status = SERVER_OK if response.status_code == 200 else SERVER_ERROR
+        except requests.exceptions.RequestException:
+            status = SERVER_UNREACHABLE
+
+        with _health_lock:
+            _health_cache[self.server_url] = (time.time(), status)
+        return status
+
+    def check_server_status(self, callback, force=False):
+        """
+        检查服务器状态（缓存有效时直接回调，不发请求）
+
+        Args:
+            callback: callback(status, error)，在调用 process_results 的线程（Tk 主线程）中执行
+            force (bool): 忽略缓存
+        """
+        cached = None if force else self.get_cached_status()
+        if cached is not None:
+            self.results.put((callback, cached, None))
+            return None
+        return self._submit(self._fetch_status, callback)
+
+    def verify_user(self, username, password, callback):
+        """
+        后台验证用户
+
+        Args:
+            callback: callback(是否通过, error)，在 Tk 主线程中执行
+        """
+        return self._submit(self._verify, callback, username, password)
+
+    def _verify(self, username, password):
+        return self.security_manager.verify_user_remote(username, password, session=self.session)
+
+    def process_results(self, max_items=20):
+        """
+        处理已完成的请求结果（由 Tk 主线程通过 after 定期调用）
+
+        Returns:
+            本次处理的结果数量
+        """
+        handled = 0
+        while handled < max_items:
+            try:
+                callback, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            try:
+                callback(result, error)
+            except Exception as e:
+                print(f"[ERROR] 处理网络结果出错: {e}")
+        return handled
+
+    def shutdown(self):
+        """关闭服务（不等待进行中的请求）"""
+        self._closed = True
+        self._executor.shutdown(wait=False)
+        self.session.close()
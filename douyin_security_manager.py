@@ -10,14 +10,30 @@ import hashlib
 import secrets
 import base64
 import time
+import hmac
+import threading
 import requests
 from typing import Optional, Dict, Any
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from douyin_config import config
+from douyin_config import config, douyin_config
+
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+PBKDF2_ITERATIONS = 100000
+
+# 进程内的机器密钥缓存 {(机器特征, 盐值, 迭代次数): 密钥}，PBKDF2 每个进程只计算一次
+_machine_key_cache = {}
+_machine_key_lock = threading.Lock()
 
 class DouyinSecurityManager:
+    # 本地用户索引检查文件修改时间的最小间隔（秒）
+    USERS_CACHE_CHECK_INTERVAL = 2.0
+
     def __init__(self):
         self.app_name = "DouyinChatMonitor"
         self.config_dir = self._get_secure_config_dir()
@@ -25,6 +41,17 @@ class DouyinSecurityManager:
         self.auth_file = os.path.join(self.config_dir, "douyin_auth.cache")
         self.config_file = os.path.join(self.config_dir, "douyin_config.registry")
         
+        # 本地用户数据的内存缓存
+        self._users_lock = threading.RLock()
+        self._users_write_lock = threading.Lock()
+        self._users_index_salt = secrets.token_bytes(16)
+        self._users_data = None
+        self._users_index = None
+        self._users_signature = None
+        self._users_checked_at = 0.0
+        self._users_pending = None
+        self._users_writer = None
+        
         # 远程服务器配置
         self.server_host = config.SERVER_HOST
         self.server_port = config.SERVER_PORT
@@ -91,28 +118,27 @@ class DouyinSecurityManager:
             except Exception as e2:
                 print(f"[ERROR] 创建备选配置目录也失败: {e2}")
     
+    @staticmethod
+    def _xor_keystream(data: bytes, key: str) -> bytes:
+        """用 SHA256(key) 循环生成的密钥流与数据整体异或（一次大整数运算，代替逐字节循环）"""
+        if not data:
+            return b""
+        key_bytes = hashlib.sha256(key.encode()).digest()
+        repeats, remainder = divmod(len(data), len(key_bytes))
+        keystream = key_bytes * repeats + key_bytes[:remainder]
+        mixed = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+        return mixed.to_bytes(len(data), 'big')
+
     def _simple_encrypt(self, data: str, key: str) -> str:
         """简单的XOR加密"""
-        key_bytes = hashlib.sha256(key.encode()).digest()
-        data_bytes = data.encode('utf-8')
-        
-        encrypted = bytearray()
-        for i, byte in enumerate(data_bytes):
-            encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        
+        encrypted = self._xor_keystream(data.encode('utf-8'), key)
         return base64.b64encode(encrypted).decode()
     
     def _simple_decrypt(self, encrypted_data: str, key: str) -> str:
         """简单的XOR解密"""
         try:
-            key_bytes = hashlib.sha256(key.encode()).digest()
             encrypted_bytes = base64.b64decode(encrypted_data.encode())
-            
-            decrypted = bytearray()
-            for i, byte in enumerate(encrypted_bytes):
-                decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-            
-            return decrypted.decode('utf-8')
+            return self._xor_keystream(encrypted_bytes, key).decode('utf-8')
         except:
             return ""
     
@@ -151,60 +177,135 @@ class DouyinSecurityManager:
             return False
     
     def verify_user_local(self, username: str, password: str) -> bool:
-        """本地验证用户（备选方案）"""
+        """本地验证用户（备选方案，内存索引 O(1) 查找）"""
         try:
-            # 加载本地用户数据
-            users_data = self._load_local_users_data()
-            
-            # 检查用户是否存在
-            if username not in users_data.get('users', {}):
+            index = self._get_local_users_index()
+            stored_digest = index.get(username)
+            if stored_digest is None:
                 return False
-            
-            user_data = users_data['users'][username]
-            stored_password = user_data.get('password')
-            
-            # 简单密码验证
-            return stored_password == password
-            
+
+            # 比较密码摘要（常量时间比较）
+            return hmac.compare_digest(stored_digest, self._hash_local_password(password))
+
         except Exception as e:
             print(f"[ERROR] 本地验证失败: {e}")
             return False
-    
-    def _load_local_users_data(self) -> dict:
-        """加载本地用户数据"""
+
+    def _hash_local_password(self, password: str) -> bytes:
+        """内存索引中的密码摘要（进程内随机盐，明文密码不留在索引中）"""
+        return hashlib.sha256(self._users_index_salt + str(password).encode('utf-8')).digest()
+
+    def _auth_file_signature(self):
+        """用户数据文件的 (mtime_ns, size)，文件不存在时返回 None"""
         try:
-            if not os.path.exists(self.auth_file):
-                # 如果没有本地用户数据，创建默认用户
-                default_users = {
-                    'users': {
-                        'admin': {'password': 'douyin123456'},
-                        'test': {'password': 'test123456'}
+            stat = os.stat(self.auth_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _set_local_users_cache(self, users_data: dict, signature):
+        """更新内存中的用户数据和索引"""
+        users = users_data.get('users', {}) if isinstance(users_data, dict) else {}
+        self._users_data = users_data
+        self._users_index = {
+            username: self._hash_local_password(info.get('password', ''))
+            for username, info in users.items() if isinstance(info, dict)
+        }
+        self._users_signature = signature
+        self._users_checked_at = time.time()
+
+    def _get_local_users_index(self) -> dict:
+        """返回 {用户名: 密码摘要}，文件修改时间变化时才重新读取"""
+        with self._users_lock:
+            # 检查间隔内直接使用内存索引，不访问磁盘
+            if self._users_index is not None and time.time() - self._users_checked_at < self.USERS_CACHE_CHECK_INTERVAL:
+                return self._users_index
+        self._load_local_users_data()
+        return self._users_index or {}
+
+    def _load_local_users_data(self) -> dict:
+        """加载本地用户数据（按文件修改时间缓存）"""
+        with self._users_lock:
+            try:
+                signature = self._auth_file_signature()
+                if signature is not None and self._users_index is not None and signature == self._users_signature:
+                    self._users_checked_at = time.time()
+                    return self._users_data
+
+                # 后台写入尚未落盘时以内存数据为准
+                if self._users_pending is not None:
+                    return self._users_data
+
+                if signature is None:
+                    # 如果没有本地用户数据，创建默认用户
+                    default_users = {
+                        'users': {
+                            'admin': {'password': 'douyin123456'},
+                            'test': {'password': 'test123456'}
+                        }
                     }
-                }
-                self._save_local_users_data(default_users)
-                return default_users
-            
-            with open(self.auth_file, 'r', encoding='utf-8') as f:
-                encrypted_data = f.read()
-            
-            decrypted_data = self._simple_decrypt(encrypted_data, "douyin_users_key_2024")
-            if not decrypted_data:
+                    self._save_local_users_data(default_users, background=True)
+                    return default_users
+
+                with open(self.auth_file, 'r', encoding='utf-8') as f:
+                    encrypted_data = f.read()
+
+                decrypted_data = self._simple_decrypt(encrypted_data, "douyin_users_key_2024")
+                users_data = json.loads(decrypted_data) if decrypted_data else {'users': {}}
+                self._set_local_users_cache(users_data, signature)
+                return users_data
+            except:
                 return {'users': {}}
-            
-            return json.loads(decrypted_data)
-        except:
-            return {'users': {}}
-    
-    def _save_local_users_data(self, users_data: dict) -> bool:
-        """保存本地用户数据"""
+
+    def _save_local_users_data(self, users_data: dict, background: bool = False) -> bool:
+        """
+        保存本地用户数据（内存索引立即更新，文件通过临时文件 + 重命名原子写入）
+
+        Args:
+            background (bool): 在后台线程写入，连续多次保存只写最后一次
+        """
+        with self._users_lock:
+            self._set_local_users_cache(users_data, self._users_signature)
+            self._users_pending = users_data
+            if background:
+                if self._users_writer is None or not self._users_writer.is_alive():
+                    self._users_writer = threading.Thread(target=self._flush_local_users_data,
+                                                          name="douyin-users-writer", daemon=True)
+                    self._users_writer.start()
+                return True
+        return self._flush_local_users_data()
+
+    def _flush_local_users_data(self) -> bool:
+        """把待写入的用户数据落盘（同一时间只有一个写入者）"""
+        success = True
+        with self._users_write_lock:
+            while True:
+                with self._users_lock:
+                    users_data, self._users_pending = self._users_pending, None
+                if users_data is None:
+                    return success
+                success = self._write_local_users_file(users_data)
+
+    def _write_local_users_file(self, users_data: dict) -> bool:
         try:
             json_data = json.dumps(users_data)
             encrypted_data = self._simple_encrypt(json_data, "douyin_users_key_2024")
             
             os.makedirs(os.path.dirname(self.auth_file), exist_ok=True)
-            
-            with open(self.auth_file, 'w', encoding='utf-8') as f:
+
+            temp_file = f"{self.auth_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 f.write(encrypted_data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if os.name == 'nt' and os.path.exists(self.auth_file):
+                try:
+                    import ctypes
+                    ctypes.windll.kernel32.SetFileAttributesW(self.auth_file, 0x80)  # NORMAL，允许替换
+                except:
+                    pass
+            os.replace(temp_file, self.auth_file)
             
             # 设置文件为隐藏
             if os.name == 'nt':
@@ -213,6 +314,11 @@ class DouyinSecurityManager:
                     ctypes.windll.kernel32.SetFileAttributesW(self.auth_file, 6)  # HIDDEN + SYSTEM
                 except:
                     pass
+
+            # 记录自己写入后的文件签名，避免下次把自己的写入当作外部修改重新读取
+            with self._users_lock:
+                if self._users_data is users_data:
+                    self._users_signature = self._auth_file_signature()
             
             return True
         except Exception as e:
@@ -292,34 +398,37 @@ class DouyinSecurityManager:
             print(f"[ERROR] 获取最后登录用户失败: {e}")
             return ""
 
-    def _get_machine_key(self) -> bytes:
-        """生成基于机器特征的密钥"""
-        try:
-            import platform
-            import getpass
-
-            # 收集机器特征
-            machine_info = {
-                'node': platform.node(),
-                'system': platform.system(),
-                'processor': platform.processor(),
-                'user': getpass.getuser(),
-                'app_name': self.app_name
-            }
+    def _get_machine_info(self) -> tuple:
+        """收集机器特征（作为密钥缓存的键）"""
+        import platform
+        import getpass
 
-            # 创建机器指纹
-            machine_string = json.dumps(machine_info, sort_keys=True)
-            machine_bytes = machine_string.encode('utf-8')
+        machine_info = {
+            'node': platform.node(),
+            'system': platform.system(),
+            'processor': platform.processor(),
+            'user': getpass.getuser(),
+            'app_name': self.app_name
+        }
+        return tuple(sorted(machine_info.items()))
 
-            # 使用PBKDF2生成密钥
+    def _get_machine_key(self) -> bytes:
+        """生成基于机器特征的密钥（同一进程内只计算一次）"""
+        try:
+            machine_info = self._get_machine_info()
             salt = douyin_config.ENCRYPTION_SALT  # 固定盐值
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(machine_bytes))
+            cache_key = (machine_info, salt, PBKDF2_ITERATIONS)
+
+            with _machine_key_lock:
+                key = _machine_key_cache.get(cache_key)
+                if key is None:
+                    # 创建机器指纹
+                    machine_string = json.dumps(dict(machine_info), sort_keys=True)
+                    key = self._load_keyring_key(machine_string)
+                    if key is None:
+                        key = self._derive_machine_key(machine_string.encode('utf-8'), salt)
+                        self._store_keyring_key(machine_string, key)
+                    _machine_key_cache[cache_key] = key
             return key
 
         except Exception as e:
@@ -328,6 +437,46 @@ class DouyinSecurityManager:
             fallback_key = hashlib.sha256(f"{self.app_name}_fallback".encode()).digest()
             return base64.urlsafe_b64encode(fallback_key)
 
+    @staticmethod
+    def _derive_machine_key(machine_bytes: bytes, salt: bytes) -> bytes:
+        """使用PBKDF2生成密钥"""
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=PBKDF2_ITERATIONS,
+        )
+        return base64.urlsafe_b64encode(kdf.derive(machine_bytes))
+
+    def _keyring_account(self, machine_string: str) -> Optional[str]:
+        """钥匙串账户名：机器特征的摘要（机器特征变化时自动失效）"""
+        if keyring is None or not getattr(douyin_config, 'KEYRING_KEY_CACHE', False):
+            return None
+        digest = hashlib.sha256(f"{machine_string}:{PBKDF2_ITERATIONS}".encode('utf-8')).hexdigest()
+        return f"machine_key_{digest[:32]}"
+
+    def _load_keyring_key(self, machine_string: str) -> Optional[bytes]:
+        """从系统钥匙串读取缓存的密钥"""
+        account = self._keyring_account(machine_string)
+        if account is None:
+            return None
+        try:
+            value = keyring.get_password(self.app_name, account)
+            return value.encode('ascii') if value else None
+        except Exception as e:
+            print(f"[WARNING] 读取钥匙串失败: {e}")
+            return None
+
+    def _store_keyring_key(self, machine_string: str, key: bytes):
+        """把密钥写入系统钥匙串（失败不影响使用）"""
+        account = self._keyring_account(machine_string)
+        if account is None:
+            return
+        try:
+            keyring.set_password(self.app_name, account, key.decode('ascii'))
+        except Exception as e:
+            print(f"[WARNING] 写入钥匙串失败: {e}")
+
     def save_credentials(self, username: str, password: str) -> bool:
         """保存用户凭据（加密存储）"""
         max_attempts = 3
@@ -494,8 +643,13 @@ class DouyinSecurityManager:
         credentials_file = self._find_credentials_file()
         return credentials_file is not None and os.path.exists(credentials_file)
 
-    def verify_user_remote(self, username: str, password: str) -> bool:
-        """远程服务器用户验证"""
+    def verify_user_remote(self, username: str, password: str, session: requests.Session = None) -> bool:
+        """
+        远程服务器用户验证
+
+        Args:
+            session: 复用的 requests.Session（登录窗口的网络服务传入，未传入时使用一次性连接）
+        """
         try:
             print(f"[INFO] 开始远程验证用户: {username}")
 
@@ -510,7 +664,7 @@ class DouyinSecurityManager:
             verify_url = config.get_api_url('verify_user')
             print(f"[INFO] 发送验证请求到: {verify_url}")
 
-            response = requests.post(
+            response = (session or requests).post(
                 verify_url,
                 json=data,
                 timeout=10,
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+统一的图标生成流水线
+主图只渲染一次（1024px），各尺寸在进程池中并行缩放，结果按源文件内容哈希缓存；
+PNG / ICO / ICNS 都从同一组内存中的图像写出，打包时不再重复绘制图标。
+simple_icon_creator、create_icons 和 CrossPlatformBuilder 共用这里的实现。
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# 所有输出格式需要的尺寸
+ICON_SIZES = (16, 32, 48, 64, 128, 256, 512, 1024)
+ICO_SIZES = (16, 32, 48, 64, 128, 256)
+ICNS_SIZES = (16, 32, 64, 128, 256, 512, 1024)
+MASTER_SIZE = 1024
+
+# 渲染或缩放方式变化时修改，使旧缓存失效
+PIPELINE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(".build_cache", "icons")
+
+# 进程池工作进程中的主图（通过 initializer 传入一次，避免每个任务重复传输）
+_worker_master = None
+
+
+def _init_worker(master_png):
+    global _worker_master
+    from PIL import Image
+    _worker_master = Image.open(io.BytesIO(master_png))
+    _worker_master.load()
+
+
+def _resize_to_png(size):
+    """在工作进程中把主图缩放到 size，返回 PNG 字节"""
+    from PIL import Image
+    return size, _encode_png(_worker_master.resize((size, size), Image.Resampling.LANCZOS))
+
+
+def _encode_png(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def hash_sources(paths, extra=""):
+    """源文件内容哈希（缺失的文件也会反映在哈希中）"""
+    digest = hashlib.sha256(f"v{PIPELINE_VERSION}\0{extra}\n".encode('utf-8'))
+    for path in paths:
+        digest.update(f"{os.path.basename(path)}\0".encode('utf-8'))
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"<missing>")
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _render_svg(svg_path, size):
+    """用 cairosvg 或 Inkscape 渲染 SVG，都不可用时返回 None"""
+    try:
+        import cairosvg
+        return cairosvg.svg2png(url=svg_path, output_width=size, output_height=size)
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"⚠️ cairosvg 渲染失败: {e}")
+
+    fd, png_path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        subprocess.run([
+            'inkscape',
+            '--export-type=png',
+            f'--export-filename={png_path}',
+            f'--export-width={size}',
+            f'--export-height={size}',
+            svg_path
+        ], check=True, capture_output=True)
+        with open(png_path, 'rb') as f:
+            return f.read()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    finally:
+        if os.path.exists(png_path):
+            os.remove(png_path)
+
+
+def render_master(source=None, size=MASTER_SIZE):
+    """
+    渲染主图
+
+    Args:
+        source: None 使用 simple_icon_creator 的绘制代码；
+                .svg 文件用 cairosvg/Inkscape 渲染（不可用时回退到绘制）；
+                其他图片文件（如 app_icon.png）直接作为主图
+
+    Returns:
+        (PIL.Image RGBA, 渲染方式)
+    """
+    from PIL import Image
+
+    if source and source.lower().endswith('.svg') and os.path.exists(source):
+        png = _render_svg(source, size)
+        if png:
+            return Image.open(io.BytesIO(png)).convert('RGBA'), 'svg'
+        print("⚠️ 没有可用的 SVG 渲染器，使用内置绘制的图标")
+    elif source and os.path.exists(source):
+        with Image.open(source) as img:
+            master = img.convert('RGBA')
+        if master.size != (size, size):
+            master = master.resize((size, size), Image.Resampling.LANCZOS)
+        return master, 'image'
+
+    from simple_icon_creator import create_icon_image
+    return create_icon_image(size), 'draw'
+
+
+def resize_all(master, sizes=ICON_SIZES, parallel=True, max_workers=None):
+    """
+    把主图缩放到所有尺寸
+
+    Returns:
+        {size: PNG 字节}
+    """
+    from PIL import Image
+
+    results = {}
+    pending = []
+    for size in sizes:
+        if size == master.width:
+            results[size] = _encode_png(master)
+        else:
+            pending.append(size)
+
+    if parallel and len(pending) > 1:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(_encode_png(master),)) as executor:
+                # 大尺寸耗时最长，优先提交
+                for size, png in executor.map(_resize_to_png, sorted(pending, reverse=True)):
+                    results[size] = png
+            return results
+        except (OSError, RuntimeError, ImportError) as e:
+            # 受限环境（无法创建进程或信号量）中回退到串行
+            print(f"⚠️ 进程池不可用，串行缩放图标: {e}")
+
+    for size in pending:
+        results[size] = _encode_png(master.resize((size, size), Image.Resampling.LANCZOS))
+    return results
+
+
+class IconPipeline:
+    """主图渲染一次、按源哈希缓存的图标流水线"""
+
+    def __init__(self, source=None, cache_dir=DEFAULT_CACHE_DIR, sizes=ICON_SIZES, parallel=True):
+        """
+        Args:
+            source: 图标来源（见 render_master），None 表示内置绘制
+            cache_dir (str): 缓存目录（按源哈希分子目录）
+            sizes: 需要生成的尺寸
+            parallel (bool): 是否在进程池中缩放
+        """
+        self.source = source
+        self.cache_dir = cache_dir
+        self.sizes = tuple(sorted(set(sizes)))
+        self.parallel = parallel
+        self._images = None
+        self.cache_hit = False
+
+    def source_files(self):
+        """参与哈希的源文件"""
+        files = [self.source] if self.source else []
+        if not self.source or self.source.lower().endswith('.svg'):
+            # SVG 渲染失败时回退到绘制代码，因此绘制脚本也是输入
+            files.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "simple_icon_creator.py"))
+        return files
+
+    def source_hash(self):
+        return hash_sources(self.source_files(), extra=",".join(map(str, self.sizes)))
+
+    def _source_dir(self):
+        """每个来源单独一个缓存目录，不同来源（绘制 / SVG / PNG）互不覆盖"""
+        label = os.path.basename(self.source) if self.source else "draw"
+        return os.path.join(self.cache_dir, label.replace('.', '_'))
+
+    def _cache_path(self, source_hash, size):
+        return os.path.join(self._source_dir(), source_hash[:16], f"{size}.png")
+
+    def _load_cached(self, source_hash):
+        pngs = {}
+        for size in self.sizes:
+            try:
+                with open(self._cache_path(source_hash, size), 'rb') as f:
+                    pngs[size] = f.read()
+            except OSError:
+                return None
+        return pngs
+
+    def _store_cached(self, source_hash, pngs):
+        directory = os.path.dirname(self._cache_path(source_hash, self.sizes[0]))
+        # 每个来源只保留当前内容的缓存
+        source_dir = self._source_dir()
+        if os.path.isdir(source_dir):
+            for name in os.listdir(source_dir):
+                if name != os.path.basename(directory):
+                    shutil.rmtree(os.path.join(source_dir, name), ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        for size, png in pngs.items():
+            temp_path = f"{self._cache_path(source_hash, size)}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(png)
+            os.replace(temp_path, self._cache_path(source_hash, size))
+
+    def images(self):
+        """
+        返回 {size: PIL.Image}（首次调用时从缓存加载或渲染）
+        """
+        if self._images is not None:
+            return self._images
+
+        from PIL import Image
+
+        source_hash = self.source_hash()
+        pngs = self._load_cached(source_hash)
+        self.cache_hit = pngs is not None
+        if pngs is None:
+            master, method = render_master(self.source)
+            print(f"🎨 渲染主图 ({method}, {master.width}px)")
+            pngs = resize_all(master, self.sizes, parallel=self.parallel)
+            try:
+                self._store_cached(source_hash, pngs)
+            except OSError as e:
+                print(f"⚠️ 图标缓存写入失败: {e}")
+        else:
+            print("⏭️ 图标源未变化，使用缓存")
+
+        self._images = {}
+        for size, png in pngs.items():
+            img = Image.open(io.BytesIO(png))
+            img.load()
+            self._images[size] = img
+        return self._images
+
+    def _pick(self, sizes):
+        images = self.images()
+        return [images[size] for size in sizes if size in images]
+
+    def write_pngs(self, output_dir=".", sizes=None, pattern="app_icon_{size}.png"):
+        """写出各尺寸 PNG，返回文件路径列表"""
+        paths = []
+        for img in self._pick(sizes or self.sizes):
+            path = os.path.join(output_dir, pattern.format(size=img.width))
+            img.save(path, format='PNG')
+            paths.append(path)
+        return paths
+
+    def write_png(self, path="app_icon.png", size=512):
+        """写出主 PNG 图标"""
+        images = self.images()
+        size = size if size in images else max(images)
+        images[size].save(path, format='PNG')
+        return path
+
+    def write_ico(self, path="app_icon.ico", sizes=ICO_SIZES):
+        """写出 Windows ICO（每个尺寸使用对应的缩放结果）"""
+        images = self._pick(sizes)
+        if not images:
+            raise ValueError("没有可用于 ICO 的尺寸")
+        largest = images[-1]
+        largest.save(path, format='ICO', sizes=[img.size for img in images],
+                     append_images=images[:-1])
+        return path
+
+    def write_icns(self, path="app_icon.icns", sizes=ICNS_SIZES):
+        """写出 macOS ICNS（不依赖 sips/iconutil，任何平台都可生成）"""
+        images = self._pick(sizes)
+        if not images:
+            raise ValueError("没有可用于 ICNS 的尺寸")
+        largest = images[-1]
+        largest.save(path, format='ICNS', append_images=images[:-1])
+        return path
+
+    def write_all(self, output_dir=".", formats=("png", "ico", "icns"), keep_sizes=False):
+        """
+        一次写出所有格式
+
+        Returns:
+            {格式: 路径}，keep_sizes=True 时还包含 'sizes': [各尺寸 PNG]
+        """
+        written = {}
+        writers = {
+            'png': lambda: self.write_png(os.path.join(output_dir, "app_icon.png")),
+            'ico': lambda: self.write_ico(os.path.join(output_dir, "app_icon.ico")),
+            'icns': lambda: self.write_icns(os.path.join(output_dir, "app_icon.icns")),
+        }
+        for fmt in formats:
+            try:
+                written[fmt] = writers[fmt]()
+                print(f"✅ Created {os.path.basename(written[fmt])}")
+            except Exception as e:
+                print(f"❌ {fmt.upper()} 创建失败: {e}")
+        if keep_sizes:
+            written['sizes'] = self.write_pngs(output_dir)
+        return written
+
+
+def generate_icons(source=None, output_dir=".", formats=("png", "ico", "icns"), keep_sizes=False,
+                   cache_dir=DEFAULT_CACHE_DIR, parallel=True):
+    """生成图标的便捷入口，返回 {格式: 路径}"""
+    pipeline = IconPipeline(source=source, cache_dir=cache_dir, parallel=parallel)
+    return pipeline.write_all(output_dir, formats=formats, keep_sizes=keep_sizes)
+
+
+if __name__ == "__main__":
+    import sys
+    generate_icons(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Linken Sphere 统一诊断引擎
+合并 probe_/diagnose_/discover_/find_/test_port_ 系列脚本中的只读检查：
+所有探测通过一个带连接池的 requests.Session 并发执行，相同的探测只发送一次，
+结果在短时间窗口内缓存，最终输出一份机器可读的 JSON 报告。
+完整检查的耗时约等于单次请求超时，而不是几十次串行请求之和。
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from listening_ports import list_listening_ports
+
+logger = logging.getLogger(__name__)
+
+# Linken Sphere 各版本/配置中出现过的 API 端口
+DEFAULT_API_PORTS = (36555, 40080, 3001)
+
+# 常见的 Chrome 调试端口（Linken Sphere 启动会话时可指定）
+DEFAULT_DEBUG_PORTS = (9222, 9223, 9224, 9225, 10002, 12345, 40081, 40082)
+
+# 只读端点（启动/停止类端点会改变会话状态，不在健康检查中探测）
+API_ENDPOINTS = (
+    "/",
+    "/sessions",
+    "/sessions/profiles",
+    "/sessions/running",
+    "/status",
+    "/profiles",
+    "/api/status",
+    "/api/sessions",
+    "/api/profiles",
+    "/api/v1/status",
+    "/api/v1/sessions",
+    "/api/v1/profiles",
+    "/v1/status",
+    "/v1/sessions",
+    "/automation/v1/status",
+    "/local-api/v1/status",
+)
+
+DEBUG_ENDPOINTS = ("/json/version", "/json")
+
+DEPENDENCIES = ("requests", "selenium", "playwright", "psutil")
+
+
+class DiagnosticsEngine:
+    """并发执行诊断探测并生成报告（线程安全）"""
+
+    def __init__(self, host="127.0.0.1", api_ports=DEFAULT_API_PORTS, debug_ports=DEFAULT_DEBUG_PORTS,
+                 timeout=3.0, cache_ttl=10.0, max_workers=32):
+        """
+        Args:
+            host (str): 目标主机
+            api_ports: 要检查的 Linken Sphere API 端口
+            debug_ports: 要检查的调试端口（会自动加入 /sessions 返回的 debug_port 和本机监听端口）
+            timeout (float): 单次请求超时（秒）
+            cache_ttl (float): 探测结果缓存时间（秒）
+            max_workers (int): 最大并发请求数
+        """
+        self.host = host
+        self.api_ports = tuple(api_ports)
+        self.debug_ports = tuple(debug_ports)
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.max_workers = max_workers
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.api_ports) + len(self.debug_ports) + 8,
+                              pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ls-diag")
+        self._lock = threading.Lock()
+        self._cache = {}      # {url: (timestamp, 结果)}
+        self._inflight = {}   # {url: Future}，正在进行的相同探测共享同一个 Future
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def probe(self, port, path):
+        """
+        异步探测 GET http://host:port/path（去重 + 缓存）
+
+        Returns:
+            Future，结果为 {'url', 'ok', 'status', 'elapsed', 'json', 'text', 'error'}
+        """
+        url = f"http://{self.host}:{port}{path}"
+        with self._lock:
+            cached = self._cache.get(url)
+            if cached and time.time() - cached[0] < self.cache_ttl:
+                future = Future()
+                future.set_result(cached[1])
+                return future
+
+            future = self._inflight.get(url)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._fetch, url)
+            self._inflight[url] = future
+
+        # 在锁外注册回调：探测已完成时回调会在当前线程立即执行
+        future.add_done_callback(lambda f: self._store(url, f))
+        return future
+
+    def _store(self, url, future):
+        with self._lock:
+            self._inflight.pop(url, None)
+            if not future.cancelled() and future.exception() is None:
+                self._cache[url] = (time.time(), future.result())
+
+    def _fetch(self, url):
+        result = {'url': url, 'ok': False, 'status': None, 'elapsed': None, 'json': None, 'text': '', 'error': None}
+        start_time = time.time()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            result['status'] = response.status_code
+            result['ok'] = response.status_code < 400
+            result['text'] = response.text[:200]
+            try:
+                result['json'] = response.json()
+            except ValueError:
+                pass
+        except requests.exceptions.ConnectionError:
+            result['error'] = 'connection_refused'
+        except requests.exceptions.Timeout:
+            result['error'] = 'timeout'
+        except requests.exceptions.RequestException as e:
+            result['error'] = str(e)
+        result['elapsed'] = round(time.time() - start_time, 3)
+        return result
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def check_dependencies():
+        """检查 Python 依赖是否已安装（不实际导入）"""
+        return {name: importlib.util.find_spec(name) is not None for name in DEPENDENCIES}
+
+    @staticmethod
+    def _summarize_debug(results):
+        version = results.get("/json/version") or {}
+        targets = (results.get("/json") or {}).get('json')
+        data = version.get('json') if isinstance(version.get('json'), dict) else {}
+        return {
+            'cdp': bool(data.get('webSocketDebuggerUrl')),
+            'browser': data.get('Browser'),
+            'targets': len(targets) if isinstance(targets, list) else None,
+            'error': version.get('error')
+        }
+
+    def run(self):
+        """
+        执行完整的健康检查
+
+        Returns:
+            机器可读的报告字典
+        """
+        start_time = time.time()
+
+        # 第一轮：所有 API 端点、已知调试端口和本机监听端口表同时进行
+        api_futures = {port: {path: self.probe(port, path) for path in API_ENDPOINTS} for port in self.api_ports}
+        debug_ports = set(self.debug_ports)
+        listeners_future = self._executor.submit(list_listening_ports, 1024, 65535, True)
+        debug_futures = {port: {path: self.probe(port, path) for path in DEBUG_ENDPOINTS} for port in debug_ports}
+        dependencies = self.check_dependencies()
+
+        api_report = {}
+        sessions = []
+        for port, futures in api_futures.items():
+            results = {path: future.result() for path, future in futures.items()}
+            api_report[port] = results
+            data = results["/sessions"]['json']
+            if isinstance(data, list) and all(isinstance(item, dict) and 'uuid' in item for item in data):
+                sessions.extend(dict(item, api_port=port) for item in data)
+
+        try:
+            listeners = listeners_future.result()
+        except Exception as e:
+            logger.debug(f"读取监听端口失败: {e}")
+            listeners = None
+
+        # 第二轮：/sessions 返回的 debug_port 和 Linken Sphere 进程的监听端口中尚未探测的部分
+        extra_ports = {int(s['debug_port']) for s in sessions if s.get('debug_port')}
+        extra_ports.update(item['port'] for item in listeners or [])
+        extra_ports -= debug_ports | set(self.api_ports)
+        for port in extra_ports:
+            debug_futures[port] = {path: self.probe(port, path) for path in DEBUG_ENDPOINTS}
+
+        debug_report = {}
+        for port, futures in sorted(debug_futures.items()):
+            results = {path: future.result() for path, future in futures.items()}
+            debug_report[port] = dict(self._summarize_debug(results), endpoints=results)
+
+        api_ports = [port for port, results in api_report.items() if isinstance(results["/sessions"]['json'], list)]
+        cdp_ports = [port for port, info in debug_report.items() if info['cdp']]
+        return {
+            'timestamp': time.time(),
+            'host': self.host,
+            'duration': round(time.time() - start_time, 3),
+            'summary': {
+                'healthy': bool(api_ports),
+                'api_ports': api_ports,
+                'cdp_ports': cdp_ports,
+                'sessions': len(sessions),
+                'running_sessions': sum(1 for s in sessions if 'running' in str(s.get('status', '')).lower()),
+                'missing_dependencies': [name for name, ok in dependencies.items() if not ok]
+            },
+            'api': api_report,
+            'sessions': sessions,
+            'debug_ports': debug_report,
+            'listening_ports': listeners,
+            'dependencies': dependencies
+        }
+
+
+def print_summary(report):
+    """打印报告摘要"""
+    summary = report['summary']
+    print("🔍 Linken Sphere 诊断报告")
+    print("=" * 50)
+    print(f"⏱️ 耗时: {report['duration']:.2f} 秒")
+
+    if summary['api_ports']:
+        print(f"✅ API 端口: {summary['api_ports']}")
+        print(f"📋 会话: {summary['sessions']} 个，运行中 {summary['running_sessions']} 个")
+    else:
+        print("❌ 未发现可用的 Linken Sphere API")
+
+    if summary['cdp_ports']:
+        for port in summary['cdp_ports']:
+            info = report['debug_ports'][port]
+            print(f"✅ 调试端口 {port}: {info['browser']} ({info['targets']} 个目标)")
+    else:
+        print("❌ 未发现活跃的调试端口")
+
+    if report['listening_ports'] is not None:
+        ports = [item['port'] for item in report['listening_ports']]
+        print(f"📡 Linken Sphere 监听端口: {ports}")
+
+    if summary['missing_dependencies']:
+        print(f"⚠️ 缺少依赖: {', '.join(summary['missing_dependencies'])}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Linken Sphere 统一诊断")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--api-port", type=int, action="append", help="API 端口（可重复）")
+    parser.add_argument("--debug-port", type=int, action="append", help="调试端口（可重复）")
+    parser.add_argument("--timeout", type=float, default=3.0)
+    parser.add_argument("--json", action="store_true", help="输出 JSON 报告到标准输出")
+    parser.add_argument("--output", help="保存 JSON 报告的文件路径")
+    args = parser.parse_args()
+
+    with DiagnosticsEngine(host=args.host,
+                           api_ports=args.api_port or DEFAULT_API_PORTS,
+                           debug_ports=args.debug_port or DEFAULT_DEBUG_PORTS,
+                           timeout=args.timeout) as engine:
+        report = engine.run()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    if args.json:
+        print(text)
+    else:
+        print_summary(report)
+
+    return 0 if report['summary']['healthy'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
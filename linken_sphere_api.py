@@ -5,16 +5,213 @@ Linken Sphere API 客户端
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
+import random
 import logging
-from typing import Dict, List, Optional, Any
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Any
+from session_records import SessionRecord, SessionSnapshot
+import metrics
 import subprocess
 import platform
 import os
 
 logger = logging.getLogger(__name__)
 
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断器处于打开状态，请求未发送"""
+
+
+class DecorrelatedJitter:
+    """去相关抖动退避：sleep = min(cap, uniform(base, prev * 3))"""
+
+    def __init__(self, base: float = 1.0, cap: float = 60.0):
+        self.base = base
+        self.cap = cap
+        self._prev = base
+
+    def next_delay(self) -> float:
+        self._prev = min(self.cap, random.uniform(self.base, self._prev * 3))
+        return self._prev
+
+    def reset(self):
+        self._prev = self.base
+
+
+class CircuitBreaker:
+    """
+    Linken Sphere API 熔断器（同一API地址的所有客户端共享）
+
+    连续失败达到阈值后打开熔断，打开时长按去相关抖动退避增长；
+    到期后进入半开状态，只放行一个探测请求，成功则关闭，失败则再次打开。
+    另外按时间窗口限制重试总次数，避免服务繁忙时所有工作线程同时重试。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 retry_budget: int = 20, budget_window: float = 10.0):
+        """
+        Args:
+            failure_threshold: 打开熔断所需的连续失败次数
+            base_delay: 熔断打开时长的基准值（秒）
+            max_delay: 熔断打开时长上限（秒）
+            retry_budget: 每个时间窗口内允许的重试次数
+            budget_window: 重试预算的时间窗口（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.retry_budget = retry_budget
+        self.budget_window = budget_window
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_until = 0.0
+        self._probe_in_flight = False
+        self._backoff = DecorrelatedJitter(base_delay, max_delay)
+        self._retry_times = deque()
+
+        self.listeners = []  # 状态变化回调: fn(old_state, new_state)
+        self.metrics = {
+            'state': self.CLOSED,
+            'successes': 0,
+            'failures': 0,
+            'rejected': 0,
+            'retries': 0,
+            'retries_denied': 0,
+            'transitions': {}  # {'closed->open': 次数}
+        }
+        self.transition_log = deque(maxlen=50)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() >= self._opened_until:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, new_state: str):
+        old_state = self._state
+        if old_state == new_state:
+            return
+        self._state = new_state
+        key = f"{old_state}->{new_state}"
+        self.metrics['state'] = new_state
+        self.metrics['transitions'][key] = self.metrics['transitions'].get(key, 0) + 1
+        self.transition_log.append({'time': time.time(), 'from': old_state, 'to': new_state})
+        logger.warning(f"🔌 Linken Sphere API 熔断器: {old_state} → {new_state}")
+
+        for listener in list(self.listeners):
+            try:
+                listener(old_state, new_state)
+            except Exception as e:
+                logger.debug(f"熔断器状态回调出错: {e}")
+
+    def before_request(self) -> bool:
+        """
+        请求前调用，熔断打开时抛出 CircuitOpenError
+
+        Returns:
+            本次请求是否为半开状态的探测请求（是则请求结束后必须调用 release_probe）
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self.metrics['rejected'] += 1
+            remaining = max(0.0, self._opened_until - time.monotonic())
+            raise CircuitOpenError(f"Linken Sphere API 熔断中，{remaining:.1f} 秒后重试")
+
+    def release_probe(self):
+        """探测请求结束但没有记录结果时（如请求参数错误）释放探测名额，下一个请求可以继续探测"""
+        with self._lock:
+            # record_success / record_failure 已经离开半开状态时无需处理
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.metrics['successes'] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != self.CLOSED:
+                self._backoff.reset()
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.metrics['failures'] += 1
+            self._consecutive_failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+
+            if was_probe or self._consecutive_failures >= self.failure_threshold:
+                delay = self._backoff.next_delay()
+                self._opened_until = time.monotonic() + delay
+                self._transition(self.OPEN)
+                logger.warning(f"Linken Sphere API 熔断 {delay:.1f} 秒")
+
+    def allow_retry(self) -> bool:
+        """从共享重试预算中申请一次重试"""
+        with self._lock:
+            now = time.monotonic()
+            while self._retry_times and now - self._retry_times[0] > self.budget_window:
+                self._retry_times.popleft()
+
+            if self._state != self.CLOSED or len(self._retry_times) >= self.retry_budget:
+                self.metrics['retries_denied'] += 1
+                return False
+
+            self._retry_times.append(now)
+            self.metrics['retries'] += 1
+            return True
+
+    def get_metrics(self) -> Dict:
+        """返回熔断器指标快照"""
+        with self._lock:
+            self._current_state()
+            metrics = dict(self.metrics)
+            metrics['transitions'] = dict(self.metrics['transitions'])
+            metrics['consecutive_failures'] = self._consecutive_failures
+            return metrics
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    """获取指定API地址共享的熔断器"""
+    with _breakers_lock:
+        breaker = _breakers.get(base_url)
+        if breaker is None:
+            breaker = _breakers[base_url] = CircuitBreaker()
+        return breaker
+
+
+_ID_SEGMENT = re.compile(r'/[0-9a-fA-F-]{8,}(?=/|$)')
+
+
+def _endpoint_label(endpoint: str) -> str:
+    """把端点中的 UUID/ID 段替换为 {id}，避免指标标签基数随会话数量增长"""
+    return _ID_SEGMENT.sub('/{id}', endpoint.split('?', 1)[0])
+
+
 class LinkenSphereAPI:
     """Linken Sphere API 客户端类"""
 
@@ -35,8 +232,17 @@ class LinkenSphereAPI:
         self.base_url = f"http://{api_host}:{api_port}"  # 基础API（配置文件等）
         self.session_url = f"http://{api_host}:{session_port}"  # 会话管理
 
+        # 同一API地址的所有客户端共享一个熔断器，服务繁忙时一起退避
+        self.breaker = get_circuit_breaker(self.base_url)
+        self.max_retries = 2
+
         self.session = requests.Session()
 
+        # 扩大连接池，批量启动/停止会话时并发请求可以复用连接
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
         # 设置请求头
         if api_key:
             self.session.headers.update({
@@ -44,9 +250,20 @@ class LinkenSphereAPI:
                 'Content-Type': 'application/json'
             })
     
+    def _record_outcome(self, response=None, error: Exception = None):
+        """把请求结果记录到熔断器：连接错误、超时、5xx 和 429 视为服务端故障"""
+        if error is not None and getattr(error, 'response', None) is None:
+            self.breaker.record_failure()
+        elif response is not None and (response.status_code >= 500 or response.status_code == 429):
+            self.breaker.record_failure()
+        elif response is not None and not response.ok and "API is not available" in response.text:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
     def _make_request(self, method: str, endpoint: str, data: Dict = None, raw_json: str = None) -> Dict:
         """
-        发送API请求
+        发送API请求（GET 请求在共享重试预算内按抖动退避重试）
 
         Args:
             method: HTTP方法
@@ -57,9 +274,33 @@ class LinkenSphereAPI:
         Returns:
             API响应数据
         """
+        backoff = DecorrelatedJitter(base=0.5, cap=10.0)
+        attempt = 0
+
+        while True:
+            try:
+                return self._send_request(method, endpoint, data, raw_json)
+            except CircuitOpenError:
+                raise
+            except requests.exceptions.RequestException as e:
+                server_side = e.response is None or e.response.status_code >= 500 or e.response.status_code == 429
+                if (method.upper() != 'GET' or not server_side or attempt >= self.max_retries
+                        or not self.breaker.allow_retry()):
+                    raise
+
+                attempt += 1
+                delay = backoff.next_delay()
+                logger.info(f"⏳ {delay:.1f} 秒后重试 {endpoint} (第 {attempt} 次)")
+                time.sleep(delay)
+
+    def _send_request(self, method: str, endpoint: str, data: Dict = None, raw_json: str = None) -> Dict:
+        """发送单次API请求"""
         # 统一使用36555端口
         url = f"{self.base_url}{endpoint}"
 
+        probe = self.breaker.before_request()
+        start_time = time.monotonic()
+        outcome = "error"
         try:
             headers = {
                 'Content-Type': 'application/json',
@@ -85,6 +326,8 @@ class LinkenSphereAPI:
             else:
                 raise ValueError(f"不支持的HTTP方法: {method}")
 
+            self._record_outcome(response=response)
+            outcome = str(response.status_code)
             response.raise_for_status()
 
             # 尝试解析JSON响应
@@ -95,8 +338,15 @@ class LinkenSphereAPI:
                 return {'text': response.text}
 
         except requests.exceptions.RequestException as e:
+            if e.response is None:
+                self._record_outcome(error=e)
             logger.error(f"API请求失败: {e}")
             raise
+        finally:
+            if probe:
+                self.breaker.release_probe()
+            metrics.LS_API_SECONDS.labels(method.upper(), _endpoint_label(endpoint), outcome).observe(
+                time.monotonic() - start_time)
 
     def _make_request_with_timeout(self, method: str, endpoint: str, data: Dict = None, timeout: int = 30) -> Dict:
         """
@@ -113,6 +363,9 @@ class LinkenSphereAPI:
         """
         url = f"{self.base_url}{endpoint}"
 
+        probe = self.breaker.before_request()
+        start_time = time.monotonic()
+        outcome = "error"
         try:
             headers = {
                 'Content-Type': 'application/json',
@@ -124,6 +377,8 @@ class LinkenSphereAPI:
             else:
                 raise ValueError(f"不支持的HTTP方法: {method}")
 
+            self._record_outcome(response=response)
+            outcome = str(response.status_code)
             response.raise_for_status()
 
             # 尝试解析JSON响应
@@ -134,8 +389,15 @@ class LinkenSphereAPI:
                 return {'text': response.text, 'success': True}
 
         except requests.exceptions.RequestException as e:
+            if e.response is None:
+                self._record_outcome(error=e)
             logger.error(f"API请求失败 (超时={timeout}s): {e}")
             raise
+        finally:
+            if probe:
+                self.breaker.release_probe()
+            metrics.LS_API_SECONDS.labels(method.upper(), _endpoint_label(endpoint), outcome).observe(
+                time.monotonic() - start_time)
 
     def check_connection(self) -> bool:
         """
@@ -158,6 +420,11 @@ class LinkenSphereAPI:
                 logger.warning("Linken Sphere 响应格式异常")
                 return False
 
+        except CircuitOpenError as e:
+            # 熔断期间不再做套接字探测，避免给繁忙的服务增加负担
+            logger.warning(f"{e}")
+            return False
+
         except Exception as e:
             error_msg = str(e)
 
@@ -187,6 +454,27 @@ class LinkenSphereAPI:
                 logger.error(f"连接检查失败: {e}")
                 return False
     
+    def get_sessions(self) -> List[Dict]:
+        """
+        获取 /sessions 返回的原始会话列表（失败时抛出异常）
+
+        Returns:
+            会话列表
+        """
+        response = self._make_request('GET', '/sessions')
+        if not isinstance(response, list):
+            raise ValueError(f"/sessions 响应格式异常: {response}")
+        return response
+
+    def get_snapshot(self) -> SessionSnapshot:
+        """
+        获取带UUID/状态索引的会话快照（失败时抛出异常）
+
+        Returns:
+            SessionSnapshot
+        """
+        return SessionSnapshot.from_sessions(self.get_sessions())
+
     def get_profiles(self) -> List[Dict]:
         """
         获取所有配置文件
@@ -324,24 +612,18 @@ class LinkenSphereAPI:
                 # 如果是超时错误，可能操作仍在进行
                 if "timeout" in str(e).lower():
                     logger.info("停止会话请求超时，但操作可能仍在进行...")
-                    # 等待一下再检查状态
-                    import time
-                    time.sleep(3)
 
-                    # 检查会话状态来确认是否成功
+                    # 通过会话监视器等待状态变为 stopped，而不是固定等待后重新拉取
                     try:
-                        profiles = self.get_profiles()
-                        for profile in profiles:
-                            if profile.get('uuid') == profile_uuid:
-                                status = profile.get('status', 'unknown')
-                                if status == 'stopped':
-                                    logger.info("会话已停止，操作成功")
-                                    return True
-                                else:
-                                    logger.warning(f"会话状态: {status}")
-                                    return False
-                    except:
-                        pass
+                        from session_watcher import get_session_watcher
+                        watcher = get_session_watcher(self)
+                        status = watcher.wait_for_status_sync(profile_uuid, {'stopped'}, timeout=10)
+                        if status == 'stopped':
+                            logger.info("会话已停止，操作成功")
+                            return True
+                        logger.warning(f"会话状态: {watcher.get_status(profile_uuid) or 'unknown'}")
+                    except Exception as watch_error:
+                        logger.debug(f"等待会话停止失败: {watch_error}")
 
                 return False
 
@@ -349,6 +631,143 @@ class LinkenSphereAPI:
             logger.error(f"停止会话失败: {e}")
             return False
     
+    def _get_session_records(self) -> Dict[str, SessionRecord]:
+        """一次 /sessions 请求获取所有配置文件的会话记录 {uuid: SessionRecord}"""
+        try:
+            snapshot = self.get_snapshot()
+        except Exception as e:
+            logger.error(f"获取会话状态失败: {e}")
+            return {}
+        return snapshot.by_uuid
+
+    def _get_status_map(self) -> Dict[str, str]:
+        """一次 /sessions 请求获取所有配置文件的状态 {uuid: status}"""
+        return {uuid: record.status.value for uuid, record in self._get_session_records().items()}
+
+    def _run_batch(self, func: Callable[[str], Dict], uuids: List[str], concurrency: int) -> Dict[str, Dict]:
+        """
+        以有限并发对一组UUID执行操作
+
+        Args:
+            func: 针对单个UUID的操作，返回结果字典
+            uuids: UUID列表
+            concurrency: 最大并发请求数
+
+        Returns:
+            {uuid: 结果字典}
+        """
+        results = {}
+        if not uuids:
+            return results
+
+        workers = max(1, min(concurrency, len(uuids)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ls-batch") as executor:
+            for uuid, result in zip(uuids, executor.map(func, uuids)):
+                results[uuid] = result
+        return results
+
+    def start_sessions(self, profile_uuids: Iterable[str], concurrency: int = 8, headless: bool = False,
+                       debug_ports: Dict[str, int] = None) -> Dict[str, Dict]:
+        """
+        批量启动浏览器会话
+
+        Args:
+            profile_uuids: 配置文件UUID列表
+            concurrency: 最大并发请求数
+            headless: 是否无头模式
+            debug_ports: 每个UUID对应的调试端口（可选）
+
+        Returns:
+            {uuid: {'success': bool, 'status': str, 'debug_port': int 或 None, 'response'/'error': ...}}
+            debug_port 是会话实际使用的调试端口：已在运行的会话（如启动返回 409）使用
+            /sessions 报告的端口，无法确定端口时视为启动失败
+        """
+        uuids = list(dict.fromkeys(profile_uuids))
+        debug_ports = debug_ports or {}
+
+        def _start(uuid):
+            try:
+                response = self.start_session(uuid, headless=headless, debug_port=debug_ports.get(uuid))
+                return {'success': True, 'response': response}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        logger.info(f"批量启动 {len(uuids)} 个会话 (并发: {concurrency})")
+        results = self._run_batch(_start, uuids, concurrency)
+
+        # 统一用一次 /sessions 请求确认状态和实际的调试端口
+        records = self._get_session_records()
+        for uuid, result in results.items():
+            record = records.get(uuid)
+            status = record.status.value if record is not None else 'unknown'
+            result['status'] = status
+            reported_port = record.debug_port if record is not None else None
+            if result['success']:
+                response = result.get('response')
+                response_port = response.get('debug_port') if isinstance(response, dict) else None
+                result['debug_port'] = reported_port or response_port or debug_ports.get(uuid)
+            elif record is not None and record.status.is_running:
+                # 启动请求失败（如 409 已在运行）但会话实际在运行：会话不一定使用请求的端口，
+                # 只有 /sessions 报告了调试端口时才能连接
+                if reported_port:
+                    result['success'] = True
+                    result['debug_port'] = reported_port
+                else:
+                    result['debug_port'] = None
+                    result['error'] = f"会话已在运行但无法确定调试端口 ({result.get('error')})"
+            else:
+                result['debug_port'] = None
+
+        started = sum(1 for r in results.values() if r['success'])
+        logger.info(f"批量启动完成: {started}/{len(uuids)} 成功")
+        return results
+
+    def stop_sessions(self, profile_uuids: Iterable[str], concurrency: int = 8, timeout: int = 30) -> Dict[str, Dict]:
+        """
+        批量停止浏览器会话
+
+        Args:
+            profile_uuids: 配置文件UUID列表
+            concurrency: 最大并发请求数
+            timeout: 单个停止请求的超时时间（秒）
+
+        Returns:
+            {uuid: {'success': bool, 'status': str, 'response'/'error': ...}}
+        """
+        uuids = list(dict.fromkeys(profile_uuids))
+
+        def _stop(uuid):
+            try:
+                response = self._make_request_with_timeout('POST', '/sessions/stop', {'uuid': uuid}, timeout=timeout)
+                ok = isinstance(response, dict) and (response.get('uuid') == uuid or response.get('success', False))
+                return {'success': ok, 'response': response}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        logger.info(f"批量停止 {len(uuids)} 个会话 (并发: {concurrency})")
+        results = self._run_batch(_stop, uuids, concurrency)
+
+        # 统一用一次 /sessions 请求确认状态（替代逐个超时后的等待与重查）
+        statuses = self._get_status_map()
+        for uuid, result in results.items():
+            status = statuses.get(uuid, 'unknown')
+            result['status'] = status
+            if status == 'stopped':
+                result['success'] = True
+
+        stopped = sum(1 for r in results.values() if r['success'])
+        logger.info(f"批量停止完成: {stopped}/{len(uuids)} 成功")
+        return results
+
+    def get_breaker_metrics(self) -> Dict:
+        """
+        获取共享熔断器的指标（状态、成功/失败/拒绝次数、状态转换计数）
+
+        Returns:
+            指标字典
+        """
+        return self.breaker.get_metrics()
+
     def get_session_info(self, session_id: str) -> Dict:
         """
         获取会话信息
@@ -442,7 +861,7 @@ class LinkenSphereManager:
     """Linken Sphere 管理器 - 统一管理API和配置文件"""
     
     def __init__(self, api_host: str = "127.0.0.1", api_port: int = 36555, api_key: str = None):
-        self.api = LinkenSphereAPI(api_host, api_port, api_key)
+        self.api = LinkenSphereAPI(api_host, api_port, api_key=api_key)
         self.profile_manager = LinkenSphereProfileManager(self.api)
         self.active_sessions = {}
     
@@ -521,7 +940,18 @@ class LinkenSphereManager:
             logger.error(f"关闭会话失败: {e}")
             return False
     
-    def close_all_sessions(self):
-        """关闭所有活动会话"""
-        for session_id in list(self.active_sessions.keys()):
-            self.close_session(session_id)
+    def close_all_sessions(self, concurrency: int = 8) -> Dict[str, Dict]:
+        """
+        关闭所有活动会话（并发停止）
+
+        Args:
+            concurrency: 最大并发请求数
+
+        Returns:
+            每个会话的停止结果
+        """
+        results = self.api.stop_sessions(list(self.active_sessions.keys()), concurrency=concurrency)
+        for session_id, result in results.items():
+            if result['success']:
+                self.active_sessions.pop(session_id, None)
+        return results
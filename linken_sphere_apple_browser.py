@@ -198,18 +198,17 @@ class LinkenSphereAppleBrowser:
     def scroll_to_bottom(self):
         """滚动到页面底部"""
         def _scroll():
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
+            last_height = None
             
             while True:
-                # 滚动到底部
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-                
-                # 计算新的滚动高度
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
+                # 滚动到底部并返回滚动高度（每步一次脚本调用）
+                new_height = self.driver.execute_script(
+                    "window.scrollTo(0, document.body.scrollHeight); return document.body.scrollHeight;"
+                )
                 if new_height == last_height:
                     break
                 last_height = new_height
+                time.sleep(2)
             
             logger.info("页面滚动到底部完成")
             return True
@@ -16,11 +16,29 @@ from datetime import datetime
 from pathlib import Path
 import configparser
 
-# 尝试导入主程序
-try:
-    from linken_sphere_playwright_browser import LinkenSphereAppleBrowser
-except ImportError:
-    LinkenSphereAppleBrowser = None
+from config_service import get_config_service, validate_config
+
+# 主程序模块（Playwright 等）较重，延迟到第一次使用时再导入，窗口可以立即显示
+LinkenSphereAppleBrowser = None
+run_in_shared_loop = None
+_browser_import_error = None
+_browser_import_lock = threading.Lock()
+
+
+def load_browser_modules():
+    """导入主程序模块（只导入一次，线程安全），成功返回 True"""
+    global LinkenSphereAppleBrowser, run_in_shared_loop, _browser_import_error
+    with _browser_import_lock:
+        if LinkenSphereAppleBrowser is None and _browser_import_error is None:
+            try:
+                from linken_sphere_playwright_browser import LinkenSphereAppleBrowser as browser_class
+                from cdp_connection_pool import run_in_shared_loop as shared_loop_runner
+            except ImportError as e:
+                _browser_import_error = e
+            else:
+                LinkenSphereAppleBrowser = browser_class
+                run_in_shared_loop = shared_loop_runner
+        return LinkenSphereAppleBrowser is not None
 
 class LinkenSphereGUI:
     def __init__(self):
@@ -30,6 +48,7 @@ class LinkenSphereGUI:
         
         # 配置管理
         self.config_file = "linken_sphere_config.json"
+        self.config_service = get_config_service()
         self.load_config()
         
         # 多线程支持
@@ -42,6 +61,10 @@ class LinkenSphereGUI:
         
         # 状态管理
         self.is_running = False
+
+        # 配置文件被修改时实时应用（运行中的浏览器自行跟随浏览时长和重试参数）
+        self.config_service.subscribe(self.on_config_changed)
+        self.config_service.start_watching()
         
     def setup_window(self):
         """设置主窗口"""
@@ -111,17 +134,33 @@ class LinkenSphereGUI:
             'debug_port': 12345,
             'max_threads': 3,
             'auto_save_logs': True,
-            'log_level': 'INFO'
+            'log_level': 'INFO',
+            'resume_runs': True  # 按线程从上次中断的检查点继续
         }
         
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    saved_config = json.load(f)
-                    self.config.update(saved_config)
+                # 由配置服务校验，无效字段保留默认值
+                errors = self.config_service.load()
+                self.config.update(self.config_service.snapshot())
+                for error in errors:
+                    print(f"⚠️ 配置无效，已忽略: {error}")
                 print(f"✅ 配置已从 {self.config_file} 加载")
         except Exception as e:
             print(f"⚠️ 加载配置失败: {e}")
+
+    def on_config_changed(self, changes):
+        """配置服务通知配置变化（可能在轮询线程中调用，转到主线程更新显示）"""
+        def _apply():
+            self.config.update({key: new for key, (old, new) in changes.items() if new is not None})
+            self.update_config_vars()
+            summary = ", ".join(f"{key}: {old} → {new}" for key, (old, new) in sorted(changes.items()))
+            self.log_message(f"🔄 配置已更新 ({summary})", "INFO")
+
+        try:
+            self.root.after(0, _apply)
+        except (tk.TclError, RuntimeError):
+            pass
     
     def save_config(self):
         """保存配置文件"""
@@ -129,8 +168,10 @@ class LinkenSphereGUI:
             # 从GUI获取当前配置
             self.update_config_from_gui()
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
+            # 校验后原子写入，运行中的浏览器会收到变化通知
+            errors = self.config_service.update(self.config)
+            if errors:
+                raise ValueError("; ".join(errors))
             print(f"✅ 配置已保存到 {self.config_file}")
             
             # 显示保存成功消息
@@ -301,16 +342,20 @@ class LinkenSphereGUI:
             }
             
             # 更新GUI变量
-            self.browse_duration_var.set(str(self.config['browse_duration']))
-            self.major_cycles_var.set(str(self.config['major_cycles']))
-            self.minor_cycles_var.set(str(self.config['minor_cycles_per_major']))
-            self.max_retries_var.set(str(self.config['max_retries']))
-            self.retry_delay_var.set(str(self.config['retry_delay']))
-            self.api_port_var.set(str(self.config['linken_api_port']))
-            self.debug_port_var.set(str(self.config['debug_port']))
-            self.max_threads_var.set(str(self.config['max_threads']))
+            self.update_config_vars()
             
             self.log_message("🔄 配置已重置到默认值", "INFO")
+
+    def update_config_vars(self):
+        """把配置显示到输入框"""
+        self.browse_duration_var.set(str(self.config['browse_duration']))
+        self.major_cycles_var.set(str(self.config['major_cycles']))
+        self.minor_cycles_var.set(str(self.config['minor_cycles_per_major']))
+        self.max_retries_var.set(str(self.config['max_retries']))
+        self.retry_delay_var.set(str(self.config['retry_delay']))
+        self.api_port_var.set(str(self.config['linken_api_port']))
+        self.debug_port_var.set(str(self.config['debug_port']))
+        self.max_threads_var.set(str(self.config['max_threads']))
     
     def import_config(self):
         """导入配置文件"""
@@ -326,13 +371,14 @@ class LinkenSphereGUI:
                 
                 # 验证配置
                 required_keys = ['browse_duration', 'major_cycles', 'minor_cycles_per_major']
-                if all(key in imported_config for key in required_keys):
-                    self.config.update(imported_config)
+                valid_config, errors = validate_config(imported_config)
+                if all(key in valid_config for key in required_keys):
+                    self.config.update(valid_config)
+                    for error in errors:
+                        self.log_message(f"⚠️ 导入的配置无效，已忽略: {error}", "WARNING")
                     
                     # 更新GUI
-                    self.browse_duration_var.set(str(self.config['browse_duration']))
-                    self.major_cycles_var.set(str(self.config['major_cycles']))
-                    # ... 更新其他变量
+                    self.update_config_vars()
                     
                     self.log_message(f"📁 配置已从 {file_path} 导入", "INFO")
                 else:
@@ -550,8 +596,8 @@ class LinkenSphereGUI:
     # 多线程控制方法
     def start_automation(self):
         """开始自动化"""
-        if LinkenSphereAppleBrowser is None:
-            messagebox.showerror("错误", "无法导入 LinkenSphereAppleBrowser 模块")
+        if not load_browser_modules():
+            messagebox.showerror("错误", f"无法导入 LinkenSphereAppleBrowser 模块: {_browser_import_error}")
             return
 
         try:
@@ -628,18 +674,14 @@ class LinkenSphereGUI:
                 max_retries=self.config['max_retries'],
                 retry_delay=self.config['retry_delay']
             )
+            # 所有线程使用同一个默认配置文件，检查点按线程区分，避免线程之间互相覆盖或删除
+            browser.worker_name = f"linken_sphere_gui-{thread_id}"
 
             thread_info['status'] = 'running'
             self.log_message(f"🚀 线程 {thread_id} 开始运行", "INFO")
 
-            # 运行自动化（这里需要适配异步）
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            try:
-                loop.run_until_complete(self.run_browser_with_monitoring(browser, thread_info))
-            finally:
-                loop.close()
+            # 运行自动化（在共享事件循环中运行，复用 Playwright 驱动和 CDP 连接）
+            run_in_shared_loop(self.run_browser_with_monitoring(browser, thread_info))
 
         except Exception as e:
             self.log_message(f"❌ 线程 {thread_id} 运行失败: {e}", "ERROR")
@@ -652,8 +694,10 @@ class LinkenSphereGUI:
     async def run_browser_with_monitoring(self, browser, thread_info):
         """运行浏览器并监控状态"""
         # 这里需要修改 LinkenSphereAppleBrowser 的 run 方法以支持监控
-        # 暂时使用简化版本
-        await browser.run()
+        # 暂时使用简化版本（跟随配置文件的实时修改）
+        browser.config_service = self.config_service
+        # 同名线程上次被中断时从检查点继续
+        await browser.run(resume=self.config.get('resume_runs', True))
 
     def cleanup_finished_threads(self):
         """清理已完成的线程"""
@@ -754,14 +798,18 @@ class LinkenSphereGUI:
             if messagebox.askokcancel("确认退出", "自动化正在运行，确定要退出吗？"):
                 self.stop_all_automation()
                 self.save_config()
+                self.config_service.stop_watching()
                 self.root.destroy()
         else:
             self.save_config()
+            self.config_service.stop_watching()
             self.root.destroy()
 
 def main():
     """主函数"""
     app = LinkenSphereGUI()
+    # 窗口显示后在后台预先导入主程序模块
+    app.root.after(200, lambda: threading.Thread(target=load_browser_modules, daemon=True).start())
     app.root.mainloop()
 
 if __name__ == "__main__":
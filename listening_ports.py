@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+本机监听端口发现
+Linux 下直接读取 /proc/net/tcp 和 /proc/net/tcp6，并通过 /proc/<pid>/fd 把 socket inode
+映射到进程，不需要调用 netstat，也不需要逐个端口尝试连接。
+其他平台（或 /proc 不可用时）返回 None，由调用方回退到 netstat / 端口探测。
+"""
+
+import logging
+import os
+import socket
+import struct
+
+logger = logging.getLogger(__name__)
+
+PROC_NET_FILES = ('/proc/net/tcp', '/proc/net/tcp6')
+TCP_LISTEN = '0A'
+
+# 进程名/命令行中包含这些关键字即视为 Linken Sphere 进程（其子进程一并计入）
+LINKEN_SPHERE_KEYWORDS = ('linken', 'sphere')
+
+
+def _decode_address(hex_address):
+    """解码 /proc/net/tcp 中的地址（按 32 位字的主机字节序存储）"""
+    raw = bytes.fromhex(hex_address)
+    # 每个 32 位字按本机字节序存储，转回网络字节序
+    words = struct.unpack(f'={len(raw) // 4}I', raw)
+    packed = struct.pack(f'!{len(words)}I', *words)
+    family = socket.AF_INET if len(packed) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, packed)
+
+
+def parse_proc_net_tcp(text):
+    """
+    解析 /proc/net/tcp(6) 的内容，只保留 LISTEN 状态的条目
+
+    Returns:
+        [{'address': '127.0.0.1', 'port': 9222, 'inode': 12345}]
+    """
+    listeners = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 10 or fields[3] != TCP_LISTEN:
+            continue
+        try:
+            hex_address, hex_port = fields[1].split(':')
+            listeners.append({
+                'address': _decode_address(hex_address),
+                'port': int(hex_port, 16),
+                'inode': int(fields[9])
+            })
+        except (ValueError, struct.error):
+            continue
+    return listeners
+
+
+def _read_text(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _socket_inodes_by_pid():
+    """遍历 /proc/<pid>/fd，返回 {inode: pid}（无权限的进程会被跳过）"""
+    owners = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        fd_dir = f'/proc/{entry}/fd'
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(f'{fd_dir}/{fd}')
+            except OSError:
+                continue
+            if target.startswith('socket:['):
+                owners[int(target[8:-1])] = int(entry)
+    return owners
+
+
+def _process_info(pid):
+    """返回 (进程名, 命令行, 父进程PID)"""
+    name = (_read_text(f'/proc/{pid}/comm') or '').strip()
+    cmdline = (_read_text(f'/proc/{pid}/cmdline') or '').replace('\0', ' ').strip()
+    ppid = None
+    stat = _read_text(f'/proc/{pid}/stat')
+    if stat:
+        # 进程名可能包含空格和括号，从最后一个 ')' 之后解析
+        fields = stat.rsplit(')', 1)[-1].split()
+        if len(fields) > 1 and fields[1].isdigit():
+            ppid = int(fields[1])
+    return name, cmdline, ppid
+
+
+def _is_linken_sphere(pid, cache):
+    """判断进程本身或其祖先是否为 Linken Sphere"""
+    chain = []
+    while pid and pid not in cache:
+        chain.append(pid)
+        name, cmdline, ppid = _process_info(pid)
+        text = f"{name} {cmdline}".lower()
+        if any(keyword in text for keyword in LINKEN_SPHERE_KEYWORDS):
+            cache[pid] = True
+            break
+        pid = ppid if ppid and ppid != pid else None
+    result = cache.get(pid, False) if pid else False
+    for visited in chain:
+        cache[visited] = result
+    return result
+
+
+def is_linken_sphere_process(pid, cache=None):
+    """
+    判断进程本身或其祖先是否为 Linken Sphere
+
+    Args:
+        pid (int): 进程 PID
+        cache (dict): 判断结果缓存，对同一次 list_listening_ports 的结果逐个判断时可复用
+    """
+    return _is_linken_sphere(pid, {} if cache is None else cache)
+
+
+def list_listening_ports(min_port=None, max_port=None, linken_sphere_only=False):
+    """
+    列出本机所有 TCP 监听端口
+
+    Args:
+        min_port (int): 端口下限（包含）
+        max_port (int): 端口上限（包含）
+        linken_sphere_only (bool): 只返回 Linken Sphere 及其 Chromium 子进程持有的端口
+
+    Returns:
+        [{'address', 'port', 'inode', 'pid', 'process'}]，/proc 不可用时返回 None
+    """
+    texts = [_read_text(path) for path in PROC_NET_FILES]
+    if not any(texts):
+        return None
+
+    listeners = []
+    for text in texts:
+        if text:
+            listeners.extend(parse_proc_net_tcp(text))
+    listeners = [
+        item for item in listeners
+        if (min_port is None or item['port'] >= min_port) and (max_port is None or item['port'] <= max_port)
+    ]
+
+    owners = _socket_inodes_by_pid() if listeners else {}
+    names = {}
+    linken_cache = {}
+    result = []
+    for item in listeners:
+        pid = owners.get(item['inode'])
+        if pid is not None and pid not in names:
+            names[pid] = _process_info(pid)[0]
+        if linken_sphere_only and (pid is None or not _is_linken_sphere(pid, linken_cache)):
+            continue
+        item['pid'] = pid
+        item['process'] = names.get(pid)
+        result.append(item)
+
+    result.sort(key=lambda item: (item['port'], item['address']))
+    logger.debug(f"/proc 中发现 {len(result)} 个监听端口")
+    return result
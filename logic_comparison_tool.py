@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-逻辑比较工具 - 比较原始文件和 Linken Sphere 版本的差异
+逻辑比较工具 - 检查原始文件和 Linken Sphere 版本是否共用同一个浏览引擎
+两个浏览器类都继承 browse_engine.BrowseEngine，关键方法不应在子类中被重新实现
 """
 
 import ast
@@ -14,6 +15,8 @@ class LogicComparator:
     def __init__(self):
         self.original_file = "apple_website_browser .py"
         self.linken_file = "linken_sphere_playwright_browser.py"
+        self.engine_file = "browse_engine.py"
+        self.engine_class = "BrowseEngine"
         self.differences = []
         
     def read_file_content(self, filepath):
@@ -34,7 +37,7 @@ class LogicComparator:
             for node in ast.walk(tree):
                 if isinstance(node, ast.ClassDef) and node.name == class_name:
                     for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
+                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
                             # 获取方法的源代码
                             method_lines = content.split('\n')[item.lineno-1:item.end_lineno]
                             methods[item.name] = '\n'.join(method_lines)
@@ -44,6 +47,17 @@ class LogicComparator:
             print(f"❌ 解析文件失败: {e}")
             return {}
     
+    def extract_bases(self, content, class_name):
+        """提取类的基类名称"""
+        try:
+            tree = ast.parse(content)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ClassDef) and node.name == class_name:
+                    return [base.id for base in node.bases if isinstance(base, ast.Name)]
+        except Exception as e:
+            print(f"❌ 解析文件失败: {e}")
+        return []
+
     def compare_method_logic(self, original_method, linken_method, method_name):
         """比较方法逻辑"""
         print(f"\n🔍 比较方法: {method_name}")
@@ -102,21 +116,24 @@ class LogicComparator:
         return '\n'.join(lines)
     
     def compare_key_methods(self):
-        """比较关键方法"""
+        """检查关键方法是否都由浏览引擎统一提供"""
         print("🔍 开始逻辑比较分析")
         print("=" * 60)
         
         # 读取文件内容
         original_content = self.read_file_content(self.original_file)
         linken_content = self.read_file_content(self.linken_file)
+        engine_content = self.read_file_content(self.engine_file)
         
-        if not original_content or not linken_content:
+        if not original_content or not linken_content or not engine_content:
             print("❌ 无法读取文件内容")
             return
         
-        # 提取方法
-        original_methods = self.extract_methods(original_content, "AppleWebsiteBrowser")
-        linken_methods = self.extract_methods(linken_content, "LinkenSphereAppleBrowser")
+        classes = {
+            "AppleWebsiteBrowser": original_content,
+            "LinkenSphereAppleBrowser": linken_content,
+        }
+        engine_methods = self.extract_methods(engine_content, self.engine_class)
         
         # 关键方法列表
         key_methods = [
@@ -130,66 +147,65 @@ class LogicComparator:
             'safe_evaluate'
         ]
         
-        print(f"📋 原始文件方法数: {len(original_methods)}")
-        print(f"📋 Linken 文件方法数: {len(linken_methods)}")
-        
-        # 比较每个关键方法
-        for method_name in key_methods:
-            original_method = original_methods.get(method_name, "")
-            linken_method = linken_methods.get(method_name, "")
-            self.compare_method_logic(original_method, linken_method, method_name)
-        
-        # 检查是否有新增或缺失的方法
-        original_set = set(original_methods.keys())
-        linken_set = set(linken_methods.keys())
+        print(f"📋 浏览引擎方法数: {len(engine_methods)}")
         
-        missing_in_linken = original_set - linken_set
-        new_in_linken = linken_set - original_set
+        for class_name, content in classes.items():
+            bases = self.extract_bases(content, class_name)
+            if self.engine_class not in bases:
+                print(f"❌ {class_name} 没有继承 {self.engine_class}")
+                self.differences.append({
+                    'method': class_name,
+                    'type': 'missing_engine',
+                    'description': f"{class_name} 没有继承 {self.engine_class}"
+                })
+                continue
+            print(f"✅ {class_name} 继承 {self.engine_class}")
+            
+            # 子类中重新实现的关键方法会让两个版本的逻辑再次分叉
+            methods = self.extract_methods(content, class_name)
+            for method_name in key_methods:
+                if method_name in methods:
+                    print(f"⚠️ {class_name} 重新实现了 {method_name}")
+                    self.differences.append({
+                        'method': method_name,
+                        'type': 'override',
+                        'description': f"{class_name} 重新实现了引擎方法 {method_name}"
+                    })
         
-        if missing_in_linken:
-            print(f"\n⚠️ Linken 版本中缺失的方法: {missing_in_linken}")
-            for method in missing_in_linken:
+        for method_name in key_methods:
+            if method_name not in engine_methods:
+                print(f"⚠️ 浏览引擎中未找到方法: {method_name}")
                 self.differences.append({
-                    'method': method,
+                    'method': method_name,
                     'type': 'missing_method',
-                    'description': f"Linken 版本中缺失方法: {method}"
+                    'description': f"浏览引擎中缺失方法: {method_name}"
                 })
-        
-        if new_in_linken:
-            print(f"\n📋 Linken 版本中新增的方法: {new_in_linken}")
     
     def check_timing_controls(self):
-        """检查时间控制逻辑"""
+        """检查时间控制逻辑只存在于浏览引擎中"""
         print(f"\n🕒 检查时间控制逻辑")
         print("=" * 30)
         
-        original_content = self.read_file_content(self.original_file)
-        linken_content = self.read_file_content(self.linken_file)
-        
-        # 检查关键时间控制模式
         timing_patterns = [
-            r'browse_duration\s*=\s*\d+',
             r'await\s+asyncio\.sleep\(',
-            r'time\.time\(\)',
             r'random\.uniform\(',
-            r'random\.randint\(',
-            r'timeout\s*=\s*\d+'
+            r'random\.randint\('
         ]
         
-        for pattern in timing_patterns:
-            original_matches = re.findall(pattern, original_content)
-            linken_matches = re.findall(pattern, linken_content)
-            
-            print(f"模式 '{pattern}':")
-            print(f"  原始文件: {len(original_matches)} 个匹配")
-            print(f"  Linken 文件: {len(linken_matches)} 个匹配")
-            
-            if len(original_matches) != len(linken_matches):
-                self.differences.append({
-                    'method': 'timing_control',
-                    'type': 'timing_difference',
-                    'description': f"时间控制模式 '{pattern}' 的使用次数不一致"
-                })
+        for filepath in (self.original_file, self.linken_file):
+            content = self.read_file_content(filepath)
+            for pattern in timing_patterns:
+                matches = re.findall(pattern, content)
+                if matches:
+                    print(f"⚠️ {filepath} 中有 {len(matches)} 处 '{pattern}'")
+                    self.differences.append({
+                        'method': 'timing_control',
+                        'type': 'timing_difference',
+                        'description': f"{filepath} 中存在引擎之外的时间控制 '{pattern}'"
+                    })
+        
+        if not any(d['type'] == 'timing_difference' for d in self.differences):
+            print("✅ 浏览时间控制只在浏览引擎中实现")
     
     def generate_report(self):
         """生成比较报告"""
@@ -197,7 +213,7 @@ class LogicComparator:
         print("=" * 50)
         
         if not self.differences:
-            print("✅ 未发现逻辑差异 - 两个文件的浏览逻辑完全一致！")
+            print("✅ 未发现逻辑差异 - 两个浏览器共用同一个浏览引擎！")
         else:
             print(f"❌ 发现 {len(self.differences)} 个差异:")
             
@@ -219,11 +235,13 @@ class LogicComparator:
         
         for diff in self.differences:
             if diff['type'] == 'missing_method':
-                print(f"• 需要从原始文件复制方法: {diff['method']}")
-            elif diff['type'] == 'logic_difference':
-                print(f"• 需要检查并修正方法: {diff['method']}")
+                print(f"• 需要在浏览引擎中实现方法: {diff['method']}")
+            elif diff['type'] == 'missing_engine':
+                print(f"• 需要让 {diff['method']} 继承 {self.engine_class}")
+            elif diff['type'] in ('override', 'logic_difference'):
+                print(f"• 需要把 {diff['method']} 的修改移到浏览引擎中")
             elif diff['type'] == 'timing_difference':
-                print(f"• 需要检查时间控制逻辑的一致性")
+                print(f"• 需要把时间控制逻辑移到浏览引擎中")
 
 def main():
     """主函数"""
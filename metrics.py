@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+进程内指标注册表
+计数器、仪表和直方图以 Prometheus 文本格式通过本地 HTTP 端点导出（默认 http://127.0.0.1:9464/metrics）。
+热路径上的记录只做一次加锁的数值更新：带标签的子指标按标签值缓存，调用方可以预先取出子指标，
+直方图用二分查找定位桶，不分配对象也不格式化字符串；文本只在抓取时生成。
+只依赖标准库，不需要 prometheus_client。
+"""
+
+import abc
+import bisect
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9464
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒级耗时的默认桶（页面导航、滚动、API 请求）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# 每次访问超出目标浏览时间的秒数
+LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ('value', '_lock', '_function')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, function):
+        """抓取时调用 function() 取值（返回 None 表示暂无数据）"""
+        self._function = function
+
+    def get(self):
+        if self._function is not None:
+            try:
+                return self._function()
+            except Exception as e:
+                logger.debug(f"指标取值失败: {e}")
+                return None
+        return self.value
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _Metric(abc.ABC):
+    """指标基类：按标签值缓存子指标，无标签指标直接代理到默认子指标"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """创建一个子指标"""
+
+    def labels(self, *values):
+        """获取指定标签值的子指标（热路径上建议预先取出并保存）"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} 需要标签 {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items(), key=lambda item: item[0])
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abc.abstractmethod
+    def _render_samples(self):
+        """逐行生成该指标的样本文本"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def _render_samples(self):
+        for values, child in self._items():
+            yield f"{self.name}_total{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default.set(value)
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+    def _render_samples(self):
+        for values, child in self._items():
+            value = child.get()
+            if value is not None:
+                yield f"{self.name}{_label_text(self.labelnames, values)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_samples(self):
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}"
+            labels = _label_text(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """指标注册表（同名指标只创建一次）"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同类型或标签注册")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """生成 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry():
+    """获取进程内共享的指标注册表"""
+    return _registry
+
+
+def chromium_rss_bytes():
+    """
+    本机所有 Chromium/Chrome 进程（含 Linken Sphere 内核）的常驻内存总和
+
+    Linux 下读取 /proc，其他平台使用 psutil（未安装时返回 None）
+    """
+    if os.path.isdir('/proc/self'):
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        total = 0
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/comm', encoding='utf-8', errors='replace') as f:
+                    name = f.read().strip().lower()
+                if 'chrom' not in name and 'headless_shell' not in name:
+                    continue
+                with open(f'/proc/{pid}/statm') as f:
+                    total += int(f.read().split()[1]) * page_size
+            except (OSError, ValueError, IndexError):
+                continue
+        return total
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+
+    total = 0
+    for process in psutil.process_iter(['name', 'memory_info']):
+        name = (process.info.get('name') or '').lower()
+        memory = process.info.get('memory_info')
+        if memory and ('chrom' in name or 'headless_shell' in name):
+            total += memory.rss
+    return total
+
+
+# ---- 应用指标 ----
+
+NAVIGATION_SECONDS = _registry.histogram(
+    "browse_navigation_seconds", "页面导航耗时（含重试）", ("outcome",))
+SCROLL_SECONDS = _registry.histogram(
+    "browse_scroll_seconds", "滚动到页面底部的耗时")
+VISIT_LATENESS_SECONDS = _registry.histogram(
+    "browse_visit_lateness_seconds", "每次页面访问超出目标浏览时间的秒数", buckets=LATENESS_BUCKETS)
+RETRIES = _registry.counter(
+    "browse_retries", "浏览操作的重试次数", ("operation",))
+LS_API_SECONDS = _registry.histogram(
+    "linken_sphere_api_request_seconds", "Linken Sphere API 请求耗时", ("method", "endpoint", "outcome"))
+ACTIVE_WORKERS = _registry.gauge(
+    "browse_active_workers", "正在浏览的工作者数量")
+CHROMIUM_RSS_BYTES = _registry.gauge(
+    "chromium_rss_bytes", "本机 Chromium 进程常驻内存总和（字节）")
+CHROMIUM_RSS_BYTES.set_function(chromium_rss_bytes)
+
+
+# ---- HTTP 端点 ----
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=DEFAULT_PORT, host="127.0.0.1", registry=None):
+    """
+    在后台线程中启动指标 HTTP 端点（进程内只启动一次）
+
+    Returns:
+        HTTP 服务器对象（server.server_address 为实际监听地址），启动失败返回 None
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = registry or _registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"指标端点启动失败 ({host}:{port}): {e}")
+            return None
+
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"📈 指标端点: http://{host}:{server.server_address[1]}/metrics")
+        _server = server
+        return server
+
+
+def stop_metrics_server():
+    """停止指标 HTTP 端点"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
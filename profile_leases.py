@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+配置文件租约管理器
+为 GUI 工作线程分配 Linken Sphere 配置文件：O(1) 获取/释放，
+工作线程定期续约，超过 TTL 未续约的租约自动回收，崩溃的线程不会泄漏配置文件
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileLeaseManager:
+    """配置文件租约管理器（线程安全）"""
+
+    def __init__(self, ttl=120):
+        """
+        Args:
+            ttl (float): 租约有效期（秒），持有方需在到期前调用 heartbeat 续约
+        """
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._profiles = {}         # {uuid: 配置文件字典}
+        self._free = OrderedDict()  # 空闲配置文件，先进先出
+        self._leases = {}           # {uuid: {'lease_id', 'holder', 'expires', 'acquired_at'}}
+        self._expiry_heap = []      # [(expires, uuid)]，续约时追加新条目，旧条目在弹出时跳过
+        self._lease_ids = itertools.count(1)
+
+    @property
+    def profiles(self):
+        """当前已知的全部配置文件"""
+        with self._lock:
+            return list(self._profiles.values())
+
+    def update_profiles(self, profiles):
+        """
+        同步配置文件列表（通常由后台刷新调用）
+
+        Args:
+            profiles: /sessions 返回的配置文件字典列表
+        """
+        profiles = {p.get('uuid'): p for p in profiles if p.get('uuid')}
+        with self._lock:
+            self._profiles = profiles
+            for uuid in list(self._free):
+                if uuid not in profiles:
+                    del self._free[uuid]
+            for uuid in profiles:
+                if uuid not in self._leases and uuid not in self._free:
+                    self._free[uuid] = None
+
+    def acquire(self, holder=None):
+        """
+        获取一个空闲配置文件的租约
+
+        Args:
+            holder (str): 持有方标识（如线程ID），用于日志
+
+        Returns:
+            配置文件字典的副本（附带 'lease_id'），没有空闲配置文件时返回 None
+        """
+        with self._lock:
+            self._expire_locked()
+            if not self._free:
+                return None
+
+            uuid, _ = self._free.popitem(last=False)
+            now = time.monotonic()
+            lease_id = next(self._lease_ids)
+            self._leases[uuid] = {'lease_id': lease_id, 'holder': holder, 'expires': now + self.ttl, 'acquired_at': now}
+            heapq.heappush(self._expiry_heap, (now + self.ttl, uuid))
+
+            profile = dict(self._profiles[uuid])
+            profile['lease_id'] = lease_id
+            return profile
+
+    def _get_lease(self, uuid, lease_id):
+        lease = self._leases.get(uuid)
+        # 指定 lease_id 时只操作自己的租约（过期后被他人重新获取的不受影响）
+        if lease is None or (lease_id is not None and lease['lease_id'] != lease_id):
+            return None
+        return lease
+
+    def heartbeat(self, uuid, lease_id=None):
+        """续约，租约已失效时返回 False"""
+        with self._lock:
+            lease = self._get_lease(uuid, lease_id)
+            if lease is None:
+                return False
+            lease['expires'] = time.monotonic() + self.ttl
+            heapq.heappush(self._expiry_heap, (lease['expires'], uuid))
+            return True
+
+    def release(self, uuid, lease_id=None):
+        """释放租约，配置文件回到空闲池"""
+        with self._lock:
+            if self._get_lease(uuid, lease_id) is None:
+                return False
+            del self._leases[uuid]
+            if uuid in self._profiles:
+                self._free[uuid] = None
+            return True
+
+    def expire_stale(self):
+        """回收所有已过期的租约，返回被回收的UUID列表"""
+        with self._lock:
+            return self._expire_locked()
+
+    def _expire_locked(self):
+        expired = []
+        now = time.monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, uuid = heapq.heappop(self._expiry_heap)
+            lease = self._leases.get(uuid)
+            # 已释放或已续约的旧条目直接跳过
+            if lease is None or lease['expires'] > now:
+                continue
+
+            del self._leases[uuid]
+            if uuid in self._profiles:
+                self._free[uuid] = None
+            expired.append(uuid)
+            logger.warning(f"⏲️ 配置文件 {uuid[:8]}... 的租约已过期 (持有方: {lease['holder']})，已回收")
+        return expired
+
+    def is_leased(self, uuid):
+        with self._lock:
+            return uuid in self._leases
+
+    def get_stats(self):
+        """返回租约统计"""
+        with self._lock:
+            return {
+                'profiles': len(self._profiles),
+                'free': len(self._free),
+                'leased': len(self._leases)
+            }
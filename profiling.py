@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+可选的浏览热路径性能分析
+默认关闭；开启后（GUI 开关或环境变量 LINKEN_PROFILE=1）记录：
+- 每个工作者的 CPU 时间：cProfile 只在该工作者的任务步骤执行期间启用，
+  同一个共享事件循环中的多个工作者分别统计；安装了 yappi 时改用 yappi（按工作者打标签，包含所有线程）
+- 事件循环延迟：定时回调的计划时间与实际执行时间之差
+- 慢回调：asyncio 调试模式下执行时间超过阈值的回调
+每次运行的结果保存在 profiles/<运行ID>/ 下：每个工作者一个 .pstats 和 .speedscope.json，
+以及 slow_callbacks.log 和 summary.json。
+"""
+
+import asyncio
+import collections.abc
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = "profiles"
+ENV_FLAG = "LINKEN_PROFILE"
+
+EVENT_LOOP_LAG_SECONDS = metrics.get_metrics_registry().histogram(
+    "event_loop_lag_seconds", "事件循环定时回调的延迟",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+# yappi 模式下当前任务所属的工作者（contextvars 随任务传递）
+_current_worker = contextvars.ContextVar("profile_worker", default="loop")
+
+_active_session = None
+_session_lock = threading.Lock()
+
+
+def profiling_requested():
+    """环境变量是否要求开启性能分析"""
+    return os.environ.get(ENV_FLAG, "").lower() in ("1", "true", "yes", "on")
+
+
+def _safe_name(name):
+    return re.sub(r'[^\w.-]+', '_', str(name)) or "worker"
+
+
+def pstats_to_speedscope(stats, name):
+    """
+    把 pstats 统计转换为 speedscope 文件格式
+
+    pstats 只有调用者-被调用者两层关系，因此每个样本是 [调用者, 函数] 两层调用栈，
+    权重为该调用关系下函数自身的耗时（秒），在 speedscope 的 Sandwich / Left Heavy 视图中查看。
+    """
+    frames = []
+    frame_index = {}
+
+    def frame(func):
+        index = frame_index.get(func)
+        if index is None:
+            filename, line, funcname = func
+            index = frame_index[func] = len(frames)
+            frames.append({'name': funcname, 'file': filename, 'line': line})
+        return index
+
+    samples = []
+    weights = []
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers:
+            if tt > 0:
+                samples.append([frame(func)])
+                weights.append(tt)
+            continue
+        for caller, caller_stats in callers.items():
+            # cProfile 的调用者信息为 (cc, nc, tt, ct)，yappi 导出的为调用次数
+            edge_tt = caller_stats[2] if isinstance(caller_stats, tuple) else tt * caller_stats / max(nc, 1)
+            if edge_tt > 0:
+                samples.append([frame(caller), frame(func)])
+                weights.append(edge_tt)
+
+    return {
+        '$schema': "https://www.speedscope.app/file-format-schema.json",
+        'name': name,
+        'exporter': "linken-sphere-apple-browser profiling",
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': "sampled",
+            'name': name,
+            'unit': "seconds",
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+def top_functions(stats, limit=15):
+    """按自身耗时排序的前 limit 个函数"""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [{'function': f"{func[0]}:{func[1]}({func[2]})", 'calls': nc, 'tottime': round(tt, 6),
+             'cumtime': round(ct, 6)} for func, (cc, nc, tt, ct, callers) in rows]
+
+
+class LoopLagMonitor:
+    """测量事件循环延迟：每 interval 秒调度一次休眠，记录实际唤醒时间比计划晚了多少"""
+
+    def __init__(self, interval=0.25, warn_threshold=0.2):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - scheduled)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.warn_threshold:
+                logger.warning(f"⚠️ 事件循环延迟 {lag * 1000:.0f}ms")
+
+    def start(self):
+        """在当前事件循环中开始测量（必须在事件循环线程中调用）"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def summary(self):
+        return {
+            'samples': self.samples,
+            'mean_ms': round(self.total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            'max_ms': round(self.max_lag * 1000, 3),
+        }
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """收集 asyncio 调试模式输出的慢回调日志"""
+
+    def __init__(self, path):
+        super().__init__(level=logging.WARNING)
+        self.count = 0
+        self._file = logging.FileHandler(path, encoding='utf-8', delay=True)
+        self._file.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+
+    def emit(self, record):
+        if record.getMessage().startswith("Executing "):
+            self.count += 1
+            self._file.emit(record)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ProfilingSession:
+    """一次运行的性能分析：开始时安装各项记录，结束时写出结果"""
+
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, backend="auto", lag_interval=0.25,
+                 slow_callback_duration=0.1):
+        """
+        Args:
+            output_dir (str): 结果根目录（每次运行一个子目录）
+            backend (str): auto / cprofile / yappi（auto 在安装了 yappi 时使用 yappi）
+            lag_interval (float): 事件循环延迟采样间隔（秒）
+            slow_callback_duration (float): 慢回调阈值（秒）
+        """
+        if backend == "auto":
+            try:
+                import yappi  # noqa: F401
+                backend = "yappi"
+            except ImportError:
+                backend = "cprofile"
+        if backend not in ("cprofile", "yappi"):
+            raise ValueError(f"不支持的分析后端: {backend}")
+
+        self.backend = backend
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.run_dir = os.path.join(output_dir, self.run_id)
+        self.slow_callback_duration = slow_callback_duration
+        self.lag_monitor = LoopLagMonitor(interval=lag_interval)
+        self.loop = None
+        self.started_at = None
+        self._profilers = {}
+        self._yappi_tags = {}
+        self._slow_handler = None
+        self._previous_debug = None
+
+    # ---- 工作者 ----
+
+    def profiler_for(self, worker):
+        """cProfile 模式下获取工作者的分析器（首次使用时创建）"""
+        profiler = self._profilers.get(worker)
+        if profiler is None:
+            profiler = self._profilers[worker] = cProfile.Profile()
+        return profiler
+
+    def _yappi_tag(self):
+        worker = _current_worker.get()
+        tag = self._yappi_tags.get(worker)
+        if tag is None:
+            tag = self._yappi_tags[worker] = len(self._yappi_tags) + 1
+        return tag
+
+    # ---- 开始 / 结束 ----
+
+    def start(self, loop=None):
+        """
+        开始记录
+
+        Args:
+            loop: 要监测延迟和慢回调的事件循环（None 表示只记录 CPU 时间）
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.started_at = time.time()
+
+        if self.backend == "yappi":
+            import yappi
+            yappi.set_clock_type("cpu")
+            yappi.set_tag_callback(self._yappi_tag)
+            yappi.start()
+
+        if loop is not None:
+            self.loop = loop
+            self._slow_handler = _SlowCallbackHandler(os.path.join(self.run_dir, "slow_callbacks.log"))
+            logging.getLogger("asyncio").addHandler(self._slow_handler)
+            self._call_in_loop(self._install_loop_hooks)
+
+        logger.info(f"🔬 性能分析已开启 ({self.backend})，结果目录: {self.run_dir}")
+
+    def _install_loop_hooks(self):
+        loop = asyncio.get_running_loop()
+        self._previous_debug = (loop.get_debug(), loop.slow_callback_duration)
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.slow_callback_duration
+        self.lag_monitor.start()
+
+    def _remove_loop_hooks(self):
+        self.lag_monitor.stop()
+        if self._previous_debug is not None:
+            loop = asyncio.get_running_loop()
+            loop.set_debug(self._previous_debug[0])
+            loop.slow_callback_duration = self._previous_debug[1]
+
+    def _call_in_loop(self, func):
+        """在被监测的事件循环线程中执行 func 并等待完成"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return func()
+
+        async def _call():
+            return func()
+
+        return asyncio.run_coroutine_threadsafe(_call(), self.loop).result(timeout=30)
+
+    def stop(self):
+        """
+        停止记录并写出结果
+
+        Returns:
+            dict: 运行摘要（同时写入 summary.json）
+        """
+        if self.loop is not None:
+            # 在事件循环线程中停止，保证没有工作者步骤正在使用分析器
+            try:
+                self._call_in_loop(self._remove_loop_hooks)
+            except Exception as e:
+                logger.warning(f"移除事件循环监测失败: {e}")
+            logging.getLogger("asyncio").removeHandler(self._slow_handler)
+            self._slow_handler.close()
+
+        workers = self._dump_yappi() if self.backend == "yappi" else self._dump_cprofile()
+
+        summary = {
+            'run_id': self.run_id,
+            'backend': self.backend,
+            'duration_s': round(time.time() - self.started_at, 3),
+            'loop_lag': self.lag_monitor.summary(),
+            'slow_callbacks': self._slow_handler.count if self._slow_handler else 0,
+            'workers': workers,
+        }
+        with open(os.path.join(self.run_dir, "summary.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        logger.info(f"🔬 性能分析结果已保存: {self.run_dir} "
+                    f"(事件循环最大延迟 {summary['loop_lag']['max_ms']}ms, 慢回调 {summary['slow_callbacks']} 次)")
+        return summary
+
+    def _write_worker(self, worker, stats_path):
+        stats = pstats.Stats(stats_path)
+        speedscope_path = stats_path[:-len(".pstats")] + ".speedscope.json"
+        with open(speedscope_path, 'w', encoding='utf-8') as f:
+            json.dump(pstats_to_speedscope(stats, f"{self.run_id} {worker}"), f)
+        return {'pstats': stats_path, 'speedscope': speedscope_path,
+                'total_tt': round(stats.total_tt, 6), 'top': top_functions(stats)}
+
+    def _dump_cprofile(self):
+        workers = {}
+        for worker, profiler in self._profilers.items():
+            profiler.disable()
+            path = os.path.join(self.run_dir, f"{_safe_name(worker)}.pstats")
+            profiler.dump_stats(path)
+            try:
+                workers[worker] = self._write_worker(worker, path)
+            except (TypeError, ValueError) as e:
+                # 没有任何记录的分析器无法生成统计
+                logger.debug(f"工作者 {worker} 没有分析数据: {e}")
+        return workers
+
+    def _dump_yappi(self):
+        import yappi
+        yappi.stop()
+        workers = {}
+        for worker, tag in self._yappi_tags.items():
+            stats = yappi.get_func_stats(filter={"tag": tag})
+            if stats.empty():
+                continue
+            path = os.path.join(self.run_dir, f"{_safe_name(worker)}.pstats")
+            stats.save(path, type="pstat")
+            workers[worker] = self._write_worker(worker, path)
+        yappi.clear_stats()
+        return workers
+
+
+# ---- 工作者包装 ----
+
+class _ProfiledCoroutine(collections.abc.Coroutine):
+    """
+    包装工作者协程：每个任务步骤执行期间启用该工作者的分析器
+
+    没有开启性能分析时只多一次函数调用，因此可以始终包装，运行中途开启也能记录已在运行的工作者
+    """
+
+    __slots__ = ('_worker', '_coro')
+
+    def __init__(self, worker, coro):
+        self._worker = worker
+        self._coro = coro
+
+    def _step(self, method, *args):
+        session = _active_session
+        if session is None or session.backend != "cprofile":
+            return method(*args)
+        profiler = session.profiler_for(self._worker)
+        profiler.enable()
+        try:
+            return method(*args)
+        finally:
+            profiler.disable()
+
+    def send(self, value):
+        return self._step(self._coro.send, value)
+
+    def throw(self, *args):
+        return self._step(self._coro.throw, *args)
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+
+async def _tagged(worker, coro):
+    _current_worker.set(worker)
+    return await coro
+
+
+def profile_worker(worker, coro):
+    """
+    包装工作者协程，按工作者名称分别记录 CPU 时间
+
+    Args:
+        worker (str): 工作者名称（如 GUI 线程 ID）
+        coro: 工作者协程
+    """
+    return _ProfiledCoroutine(worker, _tagged(worker, coro))
+
+
+async def run_profiled(coro, worker="main"):
+    """环境变量 LINKEN_PROFILE 要求时在性能分析下运行协程（命令行入口使用）"""
+    if not profiling_requested():
+        return await coro
+    start_profiling(loop=asyncio.get_running_loop())
+    try:
+        return await profile_worker(worker, coro)
+    finally:
+        stop_profiling()
+
+
+def start_profiling(loop=None, **kwargs):
+    """开启性能分析（已开启时返回当前会话）"""
+    global _active_session
+    with _session_lock:
+        if _active_session is None:
+            session = ProfilingSession(**kwargs)
+            session.start(loop)
+            _active_session = session
+        return _active_session
+
+
+def stop_profiling():
+    """结束性能分析并写出结果，未开启时返回 None"""
+    global _active_session
+    with _session_lock:
+        session, _active_session = _active_session, None
+    if session is None:
+        return None
+    return session.stop()
+
+
+def is_profiling():
+    return _active_session is not None
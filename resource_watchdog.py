@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Chromium 资源看门狗
+长时间运行时同一个页面会一直被复用，Linken Sphere 内核的内存随之增长，最终拖慢所有会话甚至导致标签页崩溃。
+看门狗每 N 次页面访问采样一次：
+- JS 堆和 DOM 节点数：一次 CDP Performance.getMetrics 调用
+- 渲染进程常驻内存：通过调试端口找到浏览器进程，在进程表中取其渲染子进程的最大 RSS
+超过阈值（或连续采样失败，通常意味着标签页已崩溃）时由后端回收页面：新建页面、关闭旧页面，
+并记录回收事件（日志、browse_page_recycles_total 指标和 events 列表）。
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+import metrics
+from listening_ports import list_listening_ports
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_EVERY = 10
+DEFAULT_MAX_JS_HEAP_MB = 512
+DEFAULT_MAX_DOM_NODES = 150000
+DEFAULT_MAX_RENDERER_RSS_MB = 1536
+
+# 连续采样失败多少次视为页面无响应
+MAX_SAMPLE_FAILURES = 2
+
+_MB = 1024 * 1024
+
+PAGE_RECYCLES = metrics.get_metrics_registry().counter(
+    "browse_page_recycles", "看门狗回收页面的次数", ("reason",))
+PAGE_JS_HEAP_BYTES = metrics.get_metrics_registry().histogram(
+    "browse_page_js_heap_bytes", "采样时页面的 JS 堆使用量",
+    buckets=tuple(size * _MB for size in (32, 64, 128, 256, 512, 1024, 2048)))
+PAGE_DOM_NODES = metrics.get_metrics_registry().histogram(
+    "browse_page_dom_nodes", "采样时页面的 DOM 节点数",
+    buckets=(1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000))
+
+
+# ---- 进程表 ----
+
+def browser_pid_for_port(port):
+    """监听调试端口的浏览器进程 PID（找不到时返回 None）"""
+    listeners = list_listening_ports(min_port=port, max_port=port)
+    if listeners is not None:
+        for item in listeners:
+            if item.get('pid'):
+                return item['pid']
+        return None
+
+    try:
+        import psutil
+        for connection in psutil.net_connections(kind='tcp'):
+            if connection.status == psutil.CONN_LISTEN and connection.laddr and connection.laddr.port == port:
+                return connection.pid
+    except Exception as e:
+        logger.debug(f"通过 psutil 查找端口 {port} 的进程失败: {e}")
+    return None
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _proc_children():
+    """{ppid: [pid]}（从 /proc/<pid>/stat 读取）"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        stat = _read(f'/proc/{entry}/stat')
+        if not stat:
+            continue
+        # 进程名可能包含空格和括号，从最后一个 ')' 之后解析
+        fields = stat.rsplit(b')', 1)[-1].split()
+        if len(fields) > 1 and fields[1].isdigit():
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def renderer_rss_bytes(browser_pid):
+    """
+    浏览器进程的渲染子进程中最大的常驻内存（字节）
+
+    每个会话通常只有一个标签页，它的渲染进程就是最大的那个。
+    Linux 下读取 /proc，其他平台使用 psutil（未安装时返回 None）
+    """
+    if os.path.isdir('/proc/self'):
+        children = _proc_children()
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        largest = None
+        pending = list(children.get(browser_pid, ()))
+        while pending:
+            pid = pending.pop()
+            pending.extend(children.get(pid, ()))
+            cmdline = _read(f'/proc/{pid}/cmdline') or b''
+            if b'--type=renderer' not in cmdline:
+                continue
+            statm = _read(f'/proc/{pid}/statm')
+            if statm:
+                rss = int(statm.split()[1]) * page_size
+                largest = rss if largest is None else max(largest, rss)
+        return largest
+
+    try:
+        import psutil
+        largest = None
+        for child in psutil.Process(browser_pid).children(recursive=True):
+            try:
+                if '--type=renderer' in ' '.join(child.cmdline()):
+                    rss = child.memory_info().rss
+                    largest = rss if largest is None else max(largest, rss)
+            except psutil.Error:
+                continue
+        return largest
+    except ImportError:
+        return None
+    except Exception as e:
+        logger.debug(f"读取渲染进程内存失败: {e}")
+        return None
+
+
+# ---- 看门狗 ----
+
+class ResourceWatchdog:
+    """每个工作者一个实例：按访问次数采样页面资源，超过阈值时回收页面"""
+
+    def __init__(self, check_every=DEFAULT_CHECK_EVERY, max_js_heap_mb=DEFAULT_MAX_JS_HEAP_MB,
+                 max_dom_nodes=DEFAULT_MAX_DOM_NODES, max_renderer_rss_mb=DEFAULT_MAX_RENDERER_RSS_MB):
+        """
+        Args:
+            check_every (int): 每多少次页面访问采样一次（0 表示关闭看门狗）
+            max_js_heap_mb (int): JS 堆使用量上限（MB）
+            max_dom_nodes (int): DOM 节点数上限
+            max_renderer_rss_mb (int): 渲染进程常驻内存上限（MB）
+        """
+        self.check_every = check_every
+        self.max_js_heap = max_js_heap_mb * _MB
+        self.max_dom_nodes = max_dom_nodes
+        self.max_renderer_rss = max_renderer_rss_mb * _MB
+        self.visits = 0
+        self.failures = 0
+        self.events = []
+        self.last_sample = None
+        self._cdp_sessions = {}  # Playwright 页面 -> CDP 会话
+        self._browser_pids = {}  # 调试端口 -> 浏览器 PID
+        self._unsupported = set()  # 无法采样的页面（如测试中的模拟页面）
+
+    async def _cdp_send(self, page):
+        """
+        页面的 CDP 命令发送函数 send(method, params)，首次使用时启用 Performance 域
+
+        SeleniumPage 提供 cdp()，Playwright 页面通过 CDP 会话
+        """
+        send = self._cdp_sessions.get(page)
+        if send is None:
+            if hasattr(page, 'cdp'):
+                send = page.cdp
+            else:
+                send = (await page.context.new_cdp_session(page)).send
+            await send("Performance.enable", {})
+            self._cdp_sessions[page] = send
+        return send
+
+    def _renderer_rss(self, debug_port):
+        """渲染进程 RSS 合计（扫描 /proc 或 psutil，阻塞调用）"""
+        if not debug_port:
+            return None
+        pid = self._browser_pids.get(debug_port)
+        if pid is None or (os.path.isdir('/proc/self') and not os.path.isdir(f'/proc/{pid}')):
+            pid = self._browser_pids[debug_port] = browser_pid_for_port(debug_port)
+        return renderer_rss_bytes(pid) if pid else None
+
+    async def sample(self, page, debug_port=None):
+        """
+        采样页面资源
+
+        Returns:
+            {'js_heap_bytes', 'dom_nodes', 'renderer_rss_bytes'}
+        """
+        send = await self._cdp_send(page)
+        result = await send("Performance.getMetrics", {})
+        values = {item['name']: item['value'] for item in result.get('metrics', [])}
+        # 进程扫描放到线程中执行，不阻塞共享事件循环
+        rss = await asyncio.to_thread(self._renderer_rss, debug_port) if debug_port else None
+        sample = {
+            'js_heap_bytes': values.get('JSHeapUsedSize'),
+            'dom_nodes': values.get('Nodes'),
+            'renderer_rss_bytes': rss,
+        }
+        if sample['js_heap_bytes'] is not None:
+            PAGE_JS_HEAP_BYTES.observe(sample['js_heap_bytes'])
+        if sample['dom_nodes'] is not None:
+            PAGE_DOM_NODES.observe(sample['dom_nodes'])
+        return sample
+
+    def over_thresholds(self, sample):
+        """返回超过阈值的项目列表"""
+        reasons = []
+        if (sample.get('js_heap_bytes') or 0) > self.max_js_heap:
+            reasons.append('js_heap')
+        if (sample.get('dom_nodes') or 0) > self.max_dom_nodes:
+            reasons.append('dom_nodes')
+        if (sample.get('renderer_rss_bytes') or 0) > self.max_renderer_rss:
+            reasons.append('renderer_rss')
+        return reasons
+
+    async def after_visit(self, page, recycle, debug_port=None):
+        """
+        每次页面访问后调用
+
+        Args:
+            page: 当前页面
+            recycle: 异步函数 recycle(page)，返回新页面
+            debug_port (int): 浏览器调试端口（用于查找渲染进程，None 表示不采样 RSS）
+
+        Returns:
+            之后应使用的页面（未回收时为原页面）
+        """
+        if not self.check_every or page in self._unsupported:
+            return page
+        self.visits += 1
+        if self.visits % self.check_every:
+            return page
+
+        try:
+            sample = await self.sample(page, debug_port)
+        except (AttributeError, NotImplementedError) as e:
+            # 页面不支持 CDP（如非 Chromium 浏览器），不再对它采样
+            logger.debug(f"页面不支持资源采样: {e}")
+            self._unsupported.add(page)
+            return page
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"⚠️ 页面资源采样失败 ({self.failures}/{MAX_SAMPLE_FAILURES}): {e}")
+            if self.failures < MAX_SAMPLE_FAILURES:
+                return page
+            return await self._recycle(page, recycle, ['unresponsive'], None)
+
+        self.failures = 0
+        self.last_sample = sample
+        logger.debug(f"页面资源: {sample}")
+        reasons = self.over_thresholds(sample)
+        if not reasons:
+            return page
+        return await self._recycle(page, recycle, reasons, sample)
+
+    async def _recycle(self, page, recycle, reasons, sample):
+        self._cdp_sessions.pop(page, None)
+        self._unsupported.discard(page)
+        self.failures = 0
+        logger.warning(f"♻️ 回收页面 (原因: {', '.join(reasons)}, 采样: {sample})")
+        try:
+            new_page = await recycle(page)
+        except Exception as e:
+            logger.error(f"❌ 回收页面失败: {e}")
+            new_page = None
+
+        event = {'time': time.time(), 'visit': self.visits, 'reasons': reasons, 'sample': sample,
+                 'success': new_page is not None}
+        self.events.append(event)
+        for reason in reasons:
+            PAGE_RECYCLES.labels(reason).inc()
+        return new_page if new_page is not None else page
@@ -3,12 +3,18 @@
 扫描 Linken Sphere 可能的会话管理端口
 """
 
+import asyncio
 import socket
 import requests
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 def test_port(host: str, port: int) -> dict:
     """测试单个端口"""
     try:
@@ -102,6 +108,179 @@ def scan_ports(host: str = "127.0.0.1", start_port: int = 3000, end_port: int =
     
     return open_ports
 
+def _usable_concurrency(requested: int):
+    """
+    根据文件描述符上限确定可用的并发连接数（尽量先提高软限制）
+
+    Returns:
+        (并发连接数, 提高前的 (soft, hard) 或 None)，扫描结束后用 _restore_fd_limit 恢复
+    """
+    if resource is None:
+        return requested, None
+
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        previous = None
+        wanted = requested + 256
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            new_soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            if new_soft > soft:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard))
+                previous = (soft, hard)
+                soft = new_soft
+        if soft == resource.RLIM_INFINITY:
+            return requested, previous
+        return max(1, min(requested, soft - 256)), previous
+    except (ValueError, OSError):
+        return requested, None
+
+
+def _restore_fd_limit(previous):
+    """恢复扫描前的文件描述符软限制（不影响进程中其他代码的上限）"""
+    if previous is None:
+        return
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, previous)
+    except (ValueError, OSError) as e:
+        print(f"⚠️ 恢复文件描述符上限失败: {e}")
+
+
+async def _http_get(host: str, port: int, path: str, timeout: float, max_bytes: int = 65536) -> dict:
+    """发送一个最小的 HTTP/1.0 GET 请求，返回状态码和响应体（失败返回 None）"""
+
+    async def _exchange():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}:{port}\r\nAccept: application/json\r\n\r\n".encode())
+            await writer.drain()
+            # 头部和响应体可能分多次到达；HTTP/1.0 响应以关闭连接结束，读到 EOF 或字节上限为止
+            chunks, size = [], 0
+            while size < max_bytes:
+                chunk = await reader.read(max_bytes - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            return b"".join(chunks)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    try:
+        # 连接、发送和读取共用一个截止时间
+        raw = await asyncio.wait_for(_exchange(), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].split()
+    if len(status_line) < 2 or not status_line[0].startswith(b"HTTP/"):
+        return None
+    try:
+        status = int(status_line[1])
+    except ValueError:
+        return None
+    return {"status": status, "body": body.decode("utf-8", errors="replace")}
+
+
+async def fingerprint_port(host: str, port: int, timeout: float = 1.0) -> dict:
+    """
+    识别开放端口的类型
+
+    Returns:
+        {"kind": "cdp" | "linken_sphere_api" | "http" | "other", "http_status": ..., "http_response": ...}
+    """
+    # CDP 调试端口: /json/version 返回带 webSocketDebuggerUrl 的 JSON
+    version = await _http_get(host, port, "/json/version", timeout)
+    if version and version["status"] == 200 and "webSocketDebuggerUrl" in version["body"]:
+        return {"kind": "cdp", "http_status": 200, "http_response": version["body"][:100]}
+
+    # Linken Sphere API: /sessions 返回会话列表
+    sessions = await _http_get(host, port, "/sessions", timeout)
+    if sessions and sessions["status"] == 200:
+        try:
+            data = json.loads(sessions["body"])
+            if isinstance(data, list) and (not data or isinstance(data[0], dict) and "uuid" in data[0]):
+                return {"kind": "linken_sphere_api", "http_status": 200, "http_response": sessions["body"][:100]}
+        except ValueError:
+            pass
+
+    reply = sessions or version
+    if reply:
+        return {"kind": "http", "http_status": reply["status"], "http_response": reply["body"][:100]}
+    return {"kind": "other", "http_status": None, "http_response": ""}
+
+
+async def async_scan_ports(host: str = "127.0.0.1", start_port: int = 3000, end_port: int = 50000,
+                           concurrency: int = 1000, timeout: float = 0.5, fingerprint: bool = True,
+                           ports=None) -> list:
+    """
+    基于 asyncio 的非阻塞端口扫描
+
+    Args:
+        host: 目标主机
+        start_port: 起始端口
+        end_port: 结束端口（包含）
+        concurrency: 同时进行的连接数（受文件描述符上限约束）
+        timeout: 单次连接超时（秒）
+        fingerprint: 是否对开放端口做 HTTP 指纹识别
+        ports: 指定端口列表（提供时忽略端口范围）
+
+    Returns:
+        开放端口列表，每项包含 port/open/kind/http_status/http_response
+    """
+    loop = asyncio.get_running_loop()
+    family, _, _, _, address = (await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM))[0]
+    port_iter = iter(ports if ports is not None else range(start_port, end_port + 1))
+    open_ports = []
+
+    async def _probe(port):
+        # 直接使用非阻塞 socket，比 open_connection 少创建 transport/StreamReader
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (address[0], port) + tuple(address[2:])), timeout)
+            # 扫描本机临时端口段时可能出现 TCP 自连接（源端口 == 目标端口），不是真正的监听端口
+            if sock.getsockname()[1] == port:
+                return
+        except (OSError, asyncio.TimeoutError):
+            return
+        finally:
+            sock.close()
+
+        result = {"port": port, "open": True, "kind": "other", "http_status": None, "http_response": ""}
+        if fingerprint:
+            result.update(await fingerprint_port(host, port, max(timeout, 1.0)))
+        open_ports.append(result)
+
+    async def _worker():
+        # 所有 worker 共享同一个端口迭代器，同时进行的连接数即 worker 数
+        for port in port_iter:
+            await _probe(port)
+
+    workers, previous_limit = _usable_concurrency(concurrency)
+    try:
+        await asyncio.gather(*(_worker() for _ in range(workers)))
+    finally:
+        _restore_fd_limit(previous_limit)
+    return sorted(open_ports, key=lambda item: item["port"])
+
+
+def scan_ports_fast(host: str = "127.0.0.1", start_port: int = 3000, end_port: int = 50000, **kwargs) -> list:
+    """async_scan_ports 的同步入口"""
+    print(f"🔍 异步扫描 {host} 的端口范围 {start_port}-{end_port}")
+    start_time = time.time()
+    open_ports = asyncio.run(async_scan_ports(host, start_port, end_port, **kwargs))
+    print(f"⏱️ 扫描完成，耗时 {time.time() - start_time:.2f} 秒，发现 {len(open_ports)} 个开放端口")
+
+    for result in open_ports:
+        print(f"  ✅ 端口 {result['port']} [{result['kind']}] [HTTP: {result.get('http_status', 'N/A')}] "
+              f"{result.get('http_response', '')[:50]}")
+    return open_ports
+
 def test_session_endpoints(host: str, port: int):
     """测试会话相关的端点"""
     print(f"\n🧪 测试端口 {port} 的会话端点...")
@@ -159,8 +338,8 @@ def main():
     
     host = "127.0.0.1"
     
-    # 扫描端口
-    open_ports = scan_ports(host)
+    # 扫描端口（异步全范围扫描，并识别 Linken Sphere API / CDP 端口）
+    open_ports = scan_ports_fast(host)
     
     print(f"\n📊 扫描结果总结")
     print("=" * 60)
@@ -171,7 +350,7 @@ def main():
         for port_info in open_ports:
             port = port_info["port"]
             status = port_info.get("http_status", "N/A")
-            print(f"  - 端口 {port} [HTTP状态: {status}]")
+            print(f"  - 端口 {port} [{port_info.get('kind', 'other')}] [HTTP状态: {status}]")
         
         # 测试每个开放端口的会话端点
         for port_info in open_ports:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Selenium 浏览后端
+把 WebDriver 包装成与 Playwright 页面相同的异步接口，供 browse_engine.BrowseEngine 使用：
+所有阻塞的 WebDriver 调用（导航、等待、脚本执行）都在共享线程池中执行，
+滚动停顿在事件循环中分段等待，因此一个事件循环可以同时驱动多个 Selenium 会话，停止信号也能立即生效。
+每个滚动步骤只有一次 execute_script 调用（见 browse_engine.SCROLL_STEP_SCRIPT）。
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from browse_engine import BrowserBackend
+
+# 共享线程池大小（WebDriver 调用大部分时间在等待浏览器响应）
+DEFAULT_MAX_WORKERS = 32
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_selenium_executor():
+    """获取进程内共享的 WebDriver 调用线程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="selenium")
+        return _executor
+
+
+def to_execute_script(script):
+    """
+    把 Playwright 风格的脚本转换为 execute_script 的函数体
+
+    函数（如 "() => {...}" / "function (x) {...}"）以 arguments 调用并返回结果，
+    其他脚本视为表达式（如 "document.title"）直接返回其值
+    """
+    stripped = script.strip()
+    first_line = stripped.split('\n', 1)[0]
+    if stripped.startswith('function') or '=>' in first_line:
+        return f"return ({stripped}).apply(null, arguments);"
+    return f"return ({stripped});"
+
+
+def replace_tab(driver):
+    """打开新标签页、关闭当前标签页并切换到新标签页（阻塞）"""
+    old_handle = driver.current_window_handle
+    driver.switch_to.new_window('tab')
+    new_handle = driver.current_window_handle
+    driver.switch_to.window(old_handle)
+    driver.close()
+    driver.switch_to.window(new_handle)
+
+
+class SeleniumPage:
+    """WebDriver 的异步页面外观（接口与 BrowseEngine 使用的 Playwright 页面一致）"""
+
+    def __init__(self, driver, executor=None):
+        self.driver = driver
+        self.executor = executor or get_selenium_executor()
+        self._url = ""
+        self._scripts = {}  # 已转换的脚本缓存
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    @property
+    def url(self):
+        """最近一次导航的 URL（不额外请求 WebDriver）"""
+        return self._url
+
+    async def goto(self, url, wait_until=None, timeout=30000):
+        """导航到 URL（WebDriver 的 get 会等待页面 load 事件）"""
+        def _goto():
+            self.driver.set_page_load_timeout(timeout / 1000)
+            self.driver.get(url)
+
+        await self._call(_goto)
+        self._url = url
+
+    async def wait_for_load_state(self, state="load", timeout=10000):
+        """等待 document.readyState 变为 complete（Selenium 没有 networkidle，以此近似）"""
+        def _wait():
+            deadline = time.time() + timeout / 1000
+            while self.driver.execute_script("return document.readyState") != "complete":
+                if time.time() >= deadline:
+                    raise TimeoutError(f"等待页面加载超时 ({timeout}ms)")
+                time.sleep(0.2)
+
+        await self._call(_wait)
+
+    async def evaluate(self, script, arg=None):
+        """执行脚本，一次调用一次 WebDriver 往返"""
+        body = self._scripts.get(script)
+        if body is None:
+            body = self._scripts[script] = to_execute_script(script)
+        if arg is None:
+            return await self._call(self.driver.execute_script, body)
+        return await self._call(self.driver.execute_script, body, arg)
+
+    async def title(self):
+        return await self._call(lambda: self.driver.title)
+
+    async def cdp(self, method, params=None):
+        """执行 CDP 命令（供资源看门狗采样，仅 Chromium 内核的 WebDriver 支持）"""
+        return await self._call(self.driver.execute_cdp_cmd, method, params or {})
+
+
+class SeleniumBackend(BrowserBackend):
+    """通过 WebDriver 获取页面的后端"""
+
+    name = "selenium"
+
+    def __init__(self, driver_factory, on_release=None, executor=None, port=None):
+        """
+        Args:
+            driver_factory: 阻塞函数，返回 WebDriver（失败返回 None），在线程池中执行
+            on_release: 阻塞函数 on_release(driver)，默认 driver.quit()
+            executor: WebDriver 调用线程池（默认使用共享线程池）
+            port (int): 浏览器调试端口（未知时为 None，可在连接后设置）
+        """
+        self.driver_factory = driver_factory
+        self.on_release = on_release
+        self.executor = executor or get_selenium_executor()
+        self.port = port
+        self.driver = None
+        self.page = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        self.driver = await loop.run_in_executor(self.executor, self.driver_factory)
+        if self.driver is None:
+            return None
+        self.page = SeleniumPage(self.driver, self.executor)
+        return self.page
+
+    async def recycle_page(self, page):
+        """打开新标签页并关闭旧标签页，返回新标签页的页面"""
+        await page._call(replace_tab, page.driver)
+        self.page = SeleniumPage(page.driver, self.executor)
+        return self.page
+
+    async def release(self):
+        if self.driver is None:
+            return
+        driver, self.driver, self.page = self.driver, None, None
+        release = functools.partial(self.on_release, driver) if self.on_release else driver.quit
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, release)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+并发 Selenium 会话池
+通过 Linken Sphere API 批量启动 M 个会话，并行连接 M 个 WebDriver，
+每个大循环的页面访问放入共享工作队列，由所有 WebDriver 并发消费：
+- 每次访问前做一次轻量健康检查（一次 execute_script 往返）
+- 不健康或访问次数达到上限的 WebDriver 会断开重连，必要时重启会话
+- 无法恢复的 WebDriver 退出，它手上的访问放回队列由其他 WebDriver 完成
+- 每个 WebDriver 有自己的资源看门狗，页面内存超过阈值时换用新标签页
+- 每完成一个大循环写入检查点（名称为 pool-<工作者>），以 resume=True 运行时跳过已完成的大循环；
+  访问由多个 WebDriver 乱序完成，中断的大循环恢复时整轮重新开始
+浏览逻辑（导航、滚动、等待、重试）复用 browse_engine.BrowseEngine。
+"""
+
+import asyncio
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from profiling import profile_worker
+from resource_watchdog import ResourceWatchdog
+from selenium_backend import SeleniumPage, get_selenium_executor, replace_tab
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_SCRIPT = "return document.readyState"
+
+
+def attach_chrome(host, port):
+    """通过调试端口连接已运行的 Linken Sphere 浏览器"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_experimental_option("debuggerAddress", f"{host}:{port}")
+    return webdriver.Chrome(options=options)
+
+
+class PooledDriver:
+    """池中的一个 WebDriver 及其会话信息"""
+
+    __slots__ = ('uuid', 'name', 'debug_port', 'driver', 'page', 'visits', 'recycles', 'watchdog')
+
+    def __init__(self, uuid, name, debug_port, driver):
+        self.uuid = uuid
+        self.name = name
+        self.debug_port = debug_port
+        self.driver = driver
+        self.page = SeleniumPage(driver)
+        self.visits = 0
+        self.recycles = 0
+        self.watchdog = ResourceWatchdog()
+
+    @property
+    def label(self):
+        return f"{self.name or self.uuid[:8]}:{self.debug_port}"
+
+
+class SeleniumSessionPool:
+    """基于 LinkenSphereManager 的并发 Selenium 会话池"""
+
+    def __init__(self, manager, size=None, profile_names=None, host="127.0.0.1", debug_port_start=12345,
+                 start_concurrency=8, recycle_after=50, driver_factory=attach_chrome):
+        """
+        Args:
+            manager: LinkenSphereManager 实例
+            size (int): 会话数量，None 表示使用主机上的所有配置文件
+            profile_names: 只使用这些名称的配置文件（None 表示不限制）
+            host (str): 浏览器调试地址
+            debug_port_start (int): 第一个会话的调试端口，后续依次递增
+            start_concurrency (int): 启动会话和连接 WebDriver 的最大并发数
+            recycle_after (int): 每个 WebDriver 访问多少页面后重连（0 表示不限制）
+            driver_factory: 阻塞函数 driver_factory(host, port)，返回 WebDriver
+        """
+        self.manager = manager
+        self.size = size
+        self.profile_names = set(profile_names) if profile_names else None
+        self.host = host
+        self.debug_port_start = debug_port_start
+        self.start_concurrency = start_concurrency
+        self.recycle_after = recycle_after
+        self.driver_factory = driver_factory
+        self.workers = []
+        self.session_uuids = []
+        self.stats = {'visits': 0, 'recycles': 0, 'page_recycles': 0, 'retired': 0, 'requeued': 0, 'dropped': 0}
+
+    # ---- 启动与关闭（阻塞，在线程池中执行） ----
+
+    def select_profiles(self):
+        """选择要启动的配置文件"""
+        profiles = [p for p in self.manager.api.get_profiles() if p.get('uuid')]
+        if self.profile_names is not None:
+            profiles = [p for p in profiles if p.get('name') in self.profile_names]
+        if self.size is not None:
+            profiles = profiles[:self.size]
+        return profiles
+
+    def _attach(self, profile, debug_port):
+        try:
+            driver = self.driver_factory(self.host, debug_port)
+        except Exception as e:
+            logger.error(f"❌ 连接 WebDriver 失败 ({profile.get('name')}:{debug_port}): {e}")
+            return None
+        return PooledDriver(profile['uuid'], profile.get('name'), debug_port, driver)
+
+    def start(self):
+        """
+        批量启动会话并并行连接 WebDriver
+
+        Returns:
+            int: 成功连接的 WebDriver 数量
+        """
+        profiles = self.select_profiles()
+        if not profiles:
+            logger.error("没有可用的配置文件")
+            return 0
+
+        debug_ports = {p['uuid']: self.debug_port_start + i for i, p in enumerate(profiles)}
+        results = self.manager.api.start_sessions(list(debug_ports), concurrency=self.start_concurrency,
+                                                  debug_ports=debug_ports)
+        started = [p for p in profiles if results.get(p['uuid'], {}).get('success')]
+        self.session_uuids = [p['uuid'] for p in started]
+        # 已在运行的会话不一定使用请求的端口，以启动结果中的实际端口为准
+        actual_ports = {p['uuid']: results[p['uuid']].get('debug_port') or debug_ports[p['uuid']] for p in started}
+        for profile in started:
+            self.manager.active_sessions[profile['uuid']] = {'uuid': profile['uuid'],
+                                                             'debug_port': actual_ports[profile['uuid']]}
+
+        workers = max(1, min(self.start_concurrency, len(started)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ls-attach") as executor:
+            attached = executor.map(lambda p: self._attach(p, actual_ports[p['uuid']]), started)
+            self.workers = [worker for worker in attached if worker is not None]
+
+        logger.info(f"会话池就绪: {len(self.workers)}/{len(profiles)} 个 WebDriver 已连接")
+        return len(self.workers)
+
+    def _quit(self, worker):
+        try:
+            worker.driver.quit()
+        except Exception as e:
+            logger.warning(f"断开 WebDriver 失败 ({worker.label}): {e}")
+
+    def recycle(self, worker):
+        """
+        断开并重新连接 WebDriver，连接失败时重启会话后再试一次
+
+        Returns:
+            bool: 是否恢复成功
+        """
+        self._quit(worker)
+        for attempt in range(2):
+            if attempt > 0:
+                logger.warning(f"🔄 重启会话 {worker.label}")
+                try:
+                    self.manager.api.stop_session(worker.uuid)
+                    self.manager.api.start_session(worker.uuid, debug_port=worker.debug_port)
+                except Exception as e:
+                    logger.error(f"重启会话失败 ({worker.label}): {e}")
+                    return False
+            try:
+                worker.driver = self.driver_factory(self.host, worker.debug_port)
+            except Exception as e:
+                logger.warning(f"重新连接 WebDriver 失败 ({worker.label}): {e}")
+                continue
+            worker.page = SeleniumPage(worker.driver)
+            worker.visits = 0
+            worker.recycles += 1
+            self.stats['recycles'] += 1
+            logger.info(f"♻️ WebDriver 已重连 ({worker.label})")
+            return True
+        return False
+
+    def close(self):
+        """断开所有 WebDriver 并并发停止会话"""
+        for worker in self.workers:
+            self._quit(worker)
+        # 包含已退出会话池的 WebDriver 对应的会话
+        uuids, self.session_uuids = self.session_uuids, []
+        self.workers = []
+        if uuids:
+            results = self.manager.api.stop_sessions(uuids, concurrency=self.start_concurrency)
+            for uuid, result in results.items():
+                if result['success']:
+                    self.manager.active_sessions.pop(uuid, None)
+
+    # ---- 浏览（事件循环） ----
+
+    async def _blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_selenium_executor(), func, *args)
+
+    async def check_health(self, worker):
+        """一次脚本往返确认 WebDriver 和浏览器仍可用"""
+        try:
+            return await self._blocking(worker.driver.execute_script, HEALTH_CHECK_SCRIPT) is not None
+        except Exception as e:
+            logger.warning(f"⚠️ WebDriver 健康检查失败 ({worker.label}): {e}")
+            return False
+
+    async def _ensure_healthy(self, worker):
+        if self.recycle_after and worker.visits >= self.recycle_after:
+            logger.info(f"WebDriver 已访问 {worker.visits} 个页面，重连 ({worker.label})")
+            return await self._blocking(self.recycle, worker)
+        if await self.check_health(worker):
+            return True
+        return await self._blocking(self.recycle, worker)
+
+    async def _consume(self, engine, worker, queue):
+        """单个 WebDriver 从共享队列中取访问任务，直到队列为空且没有进行中的访问"""
+        metrics.ACTIVE_WORKERS.inc()
+        try:
+            await self._consume_queue(engine, worker, queue)
+        finally:
+            metrics.ACTIVE_WORKERS.dec()
+
+    @staticmethod
+    async def _next_visit(queue):
+        """
+        取下一个访问任务
+
+        队列为空时不立即退出：其他 WebDriver 进行中的访问可能因健康检查失败被放回队列，
+        等到取得任务或所有访问都已完成（queue.join）为止。
+
+        Returns:
+            URL；所有访问都已完成时返回 None
+        """
+        try:
+            return queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        getter = asyncio.ensure_future(queue.get())
+        finished = asyncio.ensure_future(queue.join())
+        try:
+            await asyncio.wait({getter, finished}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            finished.cancel()
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            return getter.result()
+        return None
+
+    async def _consume_queue(self, engine, worker, queue):
+        while not engine.stop_requested():
+            if not await engine.wait_if_paused():
+                return
+            url = await self._next_visit(queue)
+            if url is None:
+                return
+
+            # 每个取出的任务都要 task_done，放回队列的任务由 put_nowait 重新计数
+            try:
+                if engine.stop_requested():
+                    queue.put_nowait(url)
+                    return
+
+                if not await self._ensure_healthy(worker):
+                    logger.error(f"❌ WebDriver 无法恢复，退出会话池 ({worker.label})")
+                    self.stats['retired'] += 1
+                    self.stats['requeued'] += 1
+                    queue.put_nowait(url)
+                    self.workers.remove(worker)
+                    return
+
+                logger.info(f"[{worker.label}] 访问: {url}")
+                duration = await engine.browse_page(worker.page, url, engine.browse_duration)
+                logger.info(f"[{worker.label}] 页面浏览完成，实际耗时: {duration:.2f}秒")
+                worker.visits += 1
+                self.stats['visits'] += 1
+                await self._watch_resources(worker)
+            finally:
+                queue.task_done()
+
+    async def _watch_resources(self, worker):
+        """资源看门狗检查，超过阈值时换用新标签页"""
+        async def recycle_tab(page):
+            await self._blocking(replace_tab, worker.driver)
+            self.stats['page_recycles'] += 1
+            return SeleniumPage(worker.driver)
+
+        worker.page = await worker.watchdog.after_visit(worker.page, recycle_tab, worker.debug_port)
+
+    async def _refresh_links(self, engine):
+        """用第一个健康的 WebDriver 刷新链接列表"""
+        for worker in list(self.workers):
+            if await self._ensure_healthy(worker):
+                return await engine.refresh_links(worker.page)
+        return False
+
+    @staticmethod
+    def checkpoint_key(engine):
+        """会话池的检查点名称（与单会话运行的检查点分开），None 表示不写检查点"""
+        key = engine.checkpoint_key()
+        return f"pool-{key}" if key is not None else None
+
+    def has_checkpoint(self, engine):
+        """是否有未完成的会话池检查点可以恢复"""
+        key = self.checkpoint_key(engine)
+        return key is not None and engine.checkpoints.load(key)[0] is not None
+
+    async def browse(self, engine, resume=False):
+        """
+        双层循环：每个大循环刷新一次链接，把 8 × M 次访问放入共享队列由所有 WebDriver 并发完成
+
+        Args:
+            engine: BrowseEngine 实例（提供浏览逻辑、停止/暂停信号、重试统计和检查点存储）
+            resume (bool): 是否跳过检查点中已完成的大循环（否则清除旧检查点从头开始）
+
+        Returns:
+            bool: 是否正常结束
+        """
+        checkpoint_key = self.checkpoint_key(engine)
+        start_major = 0
+        if checkpoint_key is not None:
+            if resume:
+                # 检查点只在大循环完成时写入，恢复位置总是下一个大循环的开头
+                start_major, _ = engine.restore_checkpoint(checkpoint_key)
+            else:
+                engine.checkpoints.clear(checkpoint_key)
+
+        try:
+            for major_cycle in range(start_major, engine.major_cycles):
+                if engine.stop_requested() or not self.workers:
+                    break
+
+                engine.current_major_cycle = major_cycle + 1
+                logger.info(f"=== 大循环 {engine.current_major_cycle}/{engine.major_cycles} 开始 "
+                            f"({len(self.workers)} 个 WebDriver) ===")
+
+                if not await self._refresh_links(engine):
+                    logger.error("无法获取可用链接，跳过此大循环")
+                    continue
+
+                queue = asyncio.Queue()
+                for _ in range(engine.minor_cycles_per_major * len(self.workers)):
+                    queue.put_nowait(random.choice(engine.available_links)['url'])
+
+                await asyncio.gather(*(profile_worker(worker.label, self._consume(engine, worker, queue))
+                                       for worker in list(self.workers)))
+
+                if not queue.empty():
+                    self.stats['dropped'] += queue.qsize()
+                    logger.warning(f"{queue.qsize()} 次访问未完成（没有可用的 WebDriver 或收到停止信号）")
+                elif checkpoint_key is not None and not engine.stop_requested():
+                    engine.current_minor_cycle = engine.minor_cycles_per_major
+                    engine.save_checkpoint(checkpoint_key)
+
+                logger.info(f"=== 大循环 {engine.current_major_cycle}/{engine.major_cycles} 完成 ===")
+
+            # 全部完成后删除检查点；收到停止信号或 WebDriver 全部退出时保留，下次可以继续
+            if checkpoint_key is not None and self.workers and not engine.stop_requested():
+                engine.checkpoints.clear(checkpoint_key)
+        finally:
+            if checkpoint_key is not None:
+                engine.checkpoints.close(checkpoint_key)
+
+        logger.info(f"📊 会话池统计: {self.stats}")
+        engine.log_retry_stats()
+        return bool(self.workers) or engine.stop_requested()
+
+    async def run(self, engine, resume=False):
+        """启动会话池、执行浏览并关闭所有会话（resume 见 browse）"""
+        engine.follow_config()
+        try:
+            if not await self._blocking(self.start):
+                return False
+            return await self.browse(engine, resume=resume)
+        finally:
+            engine.unfollow_config()
+            await self._blocking(self.close)
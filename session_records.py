@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Linken Sphere 会话记录
+/sessions 返回的原始字典转换为紧凑的会话记录，并在快照中按 UUID 和状态建立索引，
+查找和轮换会话不再需要线性扫描
+"""
+
+import time
+from enum import Enum
+
+
+class SessionStatus(str, Enum):
+    """会话状态（值与 /sessions 返回的字符串一致）"""
+
+    STOPPED = 'stopped'
+    STARTING = 'starting'
+    RUNNING = 'running'
+    AUTOMATION_RUNNING = 'automationRunning'
+    STOPPING = 'stopping'
+    UNKNOWN = 'unknown'
+
+    @classmethod
+    def _missing_(cls, value):
+        # 兼容大小写不同或未文档化的状态字符串
+        text = str(value or '').lower()
+        if 'automation' in text:
+            return cls.AUTOMATION_RUNNING
+        if 'running' in text:
+            return cls.RUNNING
+        for member in cls:
+            if member.value.lower() == text:
+                return member
+        return cls.UNKNOWN
+
+    @property
+    def is_running(self):
+        """是否处于可连接的运行状态（包含 automationRunning）"""
+        return self in (SessionStatus.RUNNING, SessionStatus.AUTOMATION_RUNNING)
+
+
+class SessionRecord:
+    """单个会话/配置文件的紧凑记录"""
+
+    __slots__ = ('uuid', 'name', 'status', 'proxy_protocol', 'debug_port')
+
+    def __init__(self, uuid, name=None, status=SessionStatus.UNKNOWN, proxy_protocol=None, debug_port=None):
+        self.uuid = uuid
+        self.name = name
+        self.status = status
+        self.proxy_protocol = proxy_protocol
+        self.debug_port = debug_port
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 /sessions 返回的字典创建记录"""
+        proxy = data.get('proxy') or {}
+        return cls(
+            uuid=data.get('uuid'),
+            name=data.get('name'),
+            status=SessionStatus(data.get('status', 'unknown')),
+            proxy_protocol=proxy.get('protocol') if isinstance(proxy, dict) else None,
+            debug_port=cls._parse_port(data.get('debug_port'))
+        )
+
+    @staticmethod
+    def _parse_port(value):
+        """解析调试端口，缺失或无法识别的值（如 "auto"、字典）返回 None"""
+        try:
+            port = int(value)
+        except (TypeError, ValueError):
+            return None
+        return port if 0 < port < 65536 else None
+
+    def to_dict(self):
+        """转换回与 /sessions 兼容的字典（供旧代码使用）"""
+        return {
+            'uuid': self.uuid,
+            'name': self.name,
+            'status': self.status.value,
+            'proxy': {'protocol': self.proxy_protocol} if self.proxy_protocol else {},
+            'debug_port': self.debug_port
+        }
+
+    @property
+    def is_running(self):
+        return self.status.is_running
+
+    def __eq__(self, other):
+        if not isinstance(other, SessionRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.uuid)
+
+    def __repr__(self):
+        return f"SessionRecord({self.name!r}, {self.uuid!r}, {self.status.value})"
+
+
+class SessionSnapshot:
+    """某一时刻 /sessions 的快照，按 UUID 和状态建立索引"""
+
+    __slots__ = ('records', 'by_uuid', 'by_status', 'timestamp')
+
+    def __init__(self, records=(), timestamp=None):
+        self.records = tuple(records)
+        self.by_uuid = {}
+        self.by_status = {}
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+        for record in self.records:
+            if record.uuid:
+                self.by_uuid[record.uuid] = record
+            self.by_status.setdefault(record.status, []).append(record)
+
+    @classmethod
+    def from_sessions(cls, sessions, timestamp=None):
+        """从 /sessions 返回的原始列表创建快照"""
+        return cls((SessionRecord.from_dict(item) for item in sessions if isinstance(item, dict)), timestamp)
+
+    def get(self, uuid):
+        """按 UUID 查找会话，找不到返回 None"""
+        return self.by_uuid.get(uuid)
+
+    def status_of(self, uuid):
+        """返回会话状态，找不到返回 None"""
+        record = self.by_uuid.get(uuid)
+        return record.status if record else None
+
+    def with_status(self, *statuses):
+        """返回处于指定状态之一的会话列表"""
+        result = []
+        for status in statuses:
+            result.extend(self.by_status.get(SessionStatus(status), ()))
+        return result
+
+    @property
+    def running(self):
+        """所有运行中的会话（包含 automationRunning）"""
+        return self.with_status(SessionStatus.RUNNING, SessionStatus.AUTOMATION_RUNNING)
+
+    @property
+    def stopped(self):
+        return self.with_status(SessionStatus.STOPPED)
+
+    @property
+    def age(self):
+        """快照年龄（秒）"""
+        return time.time() - self.timestamp
+
+    def __contains__(self, uuid):
+        return uuid in self.by_uuid
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+运行中会话调度器
+替代 linken_sphere_playwright_browser 中的全局计数器，在多个 GUI 工作线程之间
+线程安全地分配运行中的会话，支持轮询、最近最少使用和按健康度加权三种策略
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = 'round_robin'
+LEAST_RECENTLY_USED = 'lru'
+HEALTH_WEIGHTED = 'health_weighted'
+STRATEGIES = (ROUND_ROBIN, LEAST_RECENTLY_USED, HEALTH_WEIGHTED)
+
+
+class SessionHealth:
+    """单个会话的健康度统计（指数滑动平均）"""
+
+    __slots__ = ('latency', 'error_rate', 'active', 'samples', 'last_used')
+
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.0
+        self.active = 0
+        self.samples = 0
+        self.last_used = 0.0
+
+    def weight(self, reference_latency):
+        """权重越高越优先：低延迟、低错误率、当前分配少"""
+        latency_factor = 1.0 if self.latency is None else reference_latency / (reference_latency + self.latency)
+        return max(0.01, 1.0 - self.error_rate) * latency_factor / (1 + self.active)
+
+
+class SessionScheduler:
+    """
+    线程安全的会话调度器
+
+    分配操作在锁内完成且为 O(1)：轮询用循环队列，LRU 用 OrderedDict，
+    健康加权用"两次随机选择取较优"（power of two choices）。
+    会话集合只在 update() 发现成员变化时才重建。
+    """
+
+    def __init__(self, strategy=ROUND_ROBIN, alpha=0.2, reference_latency=3.0):
+        """
+        Args:
+            strategy (str): 默认策略 round_robin / lru / health_weighted
+            alpha (float): 健康度滑动平均系数
+            reference_latency (float): 计算延迟权重的参考延迟（秒）
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"不支持的调度策略: {strategy}")
+
+        self.strategy = strategy
+        self.alpha = alpha
+        self.reference_latency = reference_latency
+
+        self._lock = threading.Lock()
+        self._sessions = {}             # {uuid: SessionRecord}
+        self._uuids = []                # 用于随机抽样
+        self._ring = deque()            # 轮询顺序
+        self._lru = OrderedDict()       # 最久未使用的在前
+        self._health = {}               # {uuid: SessionHealth}
+
+    def update(self, sessions):
+        """
+        同步当前运行中的会话集合
+
+        Args:
+            sessions: 可迭代的 SessionRecord（通常为 SessionSnapshot.running）
+        """
+        sessions = {s.uuid: s for s in sessions if s.uuid}
+        with self._lock:
+            if sessions.keys() == self._sessions.keys():
+                self._sessions = sessions
+                return
+
+            added = [uuid for uuid in sessions if uuid not in self._sessions]
+            self._sessions = sessions
+            self._uuids = list(sessions)
+            self._ring = deque(uuid for uuid in self._ring if uuid in sessions)
+            self._ring.extend(added)
+
+            for uuid in list(self._lru):
+                if uuid not in sessions:
+                    del self._lru[uuid]
+            for uuid in added:
+                # 新会话排在 LRU 最前面，优先被使用
+                self._lru[uuid] = None
+                self._lru.move_to_end(uuid, last=False)
+                self._health.setdefault(uuid, SessionHealth())
+
+            for uuid in list(self._health):
+                if uuid not in sessions and self._health[uuid].active == 0:
+                    del self._health[uuid]
+
+    def acquire(self, strategy=None, prefer=None):
+        """
+        分配一个会话
+
+        Args:
+            strategy (str): 本次使用的策略（默认使用调度器的默认策略）
+            prefer (str): 优先使用的会话UUID（仍在运行时直接返回）
+
+        Returns:
+            SessionRecord，没有运行中的会话时返回 None
+        """
+        strategy = strategy or self.strategy
+        with self._lock:
+            if not self._sessions:
+                return None
+
+            if prefer and prefer in self._sessions:
+                uuid = prefer
+            elif strategy == LEAST_RECENTLY_USED:
+                uuid = next(iter(self._lru))
+            elif strategy == HEALTH_WEIGHTED:
+                uuid = self._pick_weighted()
+            else:
+                uuid = self._ring[0]
+                self._ring.rotate(-1)
+
+            self._lru.move_to_end(uuid)
+            health = self._health.setdefault(uuid, SessionHealth())
+            health.active += 1
+            health.last_used = time.time()
+            return self._sessions[uuid]
+
+    def _pick_weighted(self):
+        if len(self._uuids) == 1:
+            return self._uuids[0]
+        first, second = random.sample(self._uuids, 2)
+        reference = self.reference_latency
+        return first if self._health[first].weight(reference) >= self._health[second].weight(reference) else second
+
+    def release(self, uuid):
+        """归还分配（工作线程结束时调用）"""
+        with self._lock:
+            health = self._health.get(uuid)
+            if health is not None and health.active > 0:
+                health.active -= 1
+
+    def record_result(self, uuid, latency=None, success=True):
+        """
+        记录一次导航结果，用于健康加权
+
+        Args:
+            uuid (str): 会话UUID
+            latency (float): 导航耗时（秒）
+            success (bool): 是否成功
+        """
+        with self._lock:
+            health = self._health.get(uuid)
+            if health is None:
+                return
+            health.samples += 1
+            health.error_rate += self.alpha * ((0.0 if success else 1.0) - health.error_rate)
+            if latency is not None:
+                health.latency = latency if health.latency is None else health.latency + self.alpha * (latency - health.latency)
+
+    def get_stats(self):
+        """返回每个会话的健康度统计"""
+        with self._lock:
+            return {
+                uuid: {
+                    'latency': health.latency,
+                    'error_rate': health.error_rate,
+                    'active': health.active,
+                    'samples': health.samples,
+                    'weight': health.weight(self.reference_latency)
+                }
+                for uuid, health in self._health.items()
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_session_scheduler():
+    """获取进程内共享的会话调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SessionScheduler()
+        return _scheduler
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Linken Sphere 会话状态监视器
+统一轮询 /sessions，对比前后快照，把每个会话的状态变化推送给异步订阅者，
+等待方按截止时间等待状态变化，而不是各自 sleep 后重新拉取全部会话
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from cdp_connection_pool import get_shared_loop
+from session_records import SessionSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class SessionWatcher:
+    """
+    会话状态监视器
+
+    轮询间隔自适应：有等待方或刚发生状态变化时使用 min_interval，
+    之后每次无变化的轮询按 backoff 倍数放慢，直到 max_interval。
+    """
+
+    def __init__(self, api, min_interval=0.5, max_interval=10.0, backoff=1.5):
+        """
+        Args:
+            api: LinkenSphereAPI 实例（使用其 get_sessions 方法）
+            min_interval (float): 最短轮询间隔（秒）
+            max_interval (float): 最长轮询间隔（秒）
+            backoff (float): 无变化时轮询间隔的放大倍数
+        """
+        self.api = api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+        self.loop = None
+        self._task = None
+        self._wakeup = None
+        self._interval = min_interval
+
+        self.snapshot = None        # 最近一次 SessionSnapshot
+        self._subscribers = []      # [(uuid 或 None, asyncio.Queue)]
+        self._waiters = 0
+
+        self.stats = {'polls': 0, 'transitions': 0, 'errors': 0}
+
+    # ---- 生命周期 ----
+
+    def start(self, loop=None):
+        """在指定事件循环（默认共享循环）中启动轮询"""
+        if self._task is not None and not self._task.done():
+            return self
+
+        self.loop = loop or get_shared_loop()
+
+        def _start():
+            self._wakeup = asyncio.Event()
+            self._task = self.loop.create_task(self._run())
+
+        if self._in_loop():
+            _start()
+        else:
+            self.loop.call_soon_threadsafe(_start)
+        return self
+
+    def stop(self):
+        """停止轮询"""
+        if self.loop is None:
+            return
+        if self._in_loop():
+            if self._task:
+                self._task.cancel()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self._task and self._task.cancel())
+
+    def _in_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    # ---- 轮询 ----
+
+    async def _run(self):
+        while True:
+            changed = await self._poll()
+
+            if changed or self._waiters:
+                self._interval = self.min_interval
+            else:
+                self._interval = min(self.max_interval, self._interval * self.backoff)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self):
+        """拉取一次 /sessions 并发布状态变化，返回是否有变化"""
+        try:
+            sessions = await self.loop.run_in_executor(None, self.api.get_sessions)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"会话状态轮询失败: {e}")
+            return False
+
+        self.stats['polls'] += 1
+        now = time.time()
+        current = SessionSnapshot.from_sessions(sessions, now)
+        previous = self.snapshot.by_uuid if self.snapshot else {}
+        self.snapshot = current
+
+        # 第一次轮询时所有会话都以 None → 当前状态 的形式发布
+        transitions = []
+        for uuid, record in current.by_uuid.items():
+            old = previous.get(uuid)
+            old_status = old.status.value if old else None
+            if old_status != record.status.value:
+                transitions.append(self._transition(uuid, record.name, old_status, record.status.value, now))
+
+        for uuid, record in previous.items():
+            if uuid not in current:
+                transitions.append(self._transition(uuid, record.name, record.status.value, None, now))
+
+        for event in transitions:
+            self.stats['transitions'] += 1
+            logger.debug(f"会话 {event['uuid'][:8]}... 状态: {event['old_status']} → {event['new_status']}")
+            for uuid, queue in self._subscribers:
+                if uuid is None or uuid == event['uuid']:
+                    queue.put_nowait(event)
+
+        return bool(transitions)
+
+    @staticmethod
+    def _transition(uuid, name, old_status, new_status, timestamp):
+        return {
+            'uuid': uuid,
+            'name': name,
+            'old_status': old_status,
+            'new_status': new_status,
+            'timestamp': timestamp
+        }
+
+    def poke(self):
+        """请求立即轮询一次"""
+        if self.loop is None or self._wakeup is None:
+            return
+        if self._in_loop():
+            self._wakeup.set()
+        else:
+            self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ---- 订阅 ----
+
+    def subscribe(self, uuid=None):
+        """
+        订阅状态变化（必须在监视器所在的事件循环中调用）
+
+        Args:
+            uuid (str): 只订阅指定会话；为空时订阅全部
+
+        Returns:
+            asyncio.Queue，元素为 {'uuid', 'name', 'old_status', 'new_status', 'timestamp'}
+        """
+        queue = asyncio.Queue()
+        self._subscribers.append((uuid, queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        """取消订阅"""
+        self._subscribers = [(u, q) for u, q in self._subscribers if q is not queue]
+
+    async def wait_for_status(self, uuid, statuses, timeout=30):
+        """
+        等待会话进入指定状态之一（必须在监视器所在的事件循环中调用）
+
+        Args:
+            uuid (str): 会话UUID
+            statuses (Iterable[str]): 目标状态
+            timeout (float): 截止时间（秒）
+
+        Returns:
+            str: 达到的状态；超时返回 None
+        """
+        statuses = set(statuses)
+        current = self.get_status(uuid)
+        if current in statuses:
+            return current
+
+        queue = self.subscribe(uuid)
+        self._waiters += 1
+        self.poke()
+        deadline = self.loop.time() + timeout
+        try:
+            while True:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    event = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+                if event['new_status'] in statuses:
+                    return event['new_status']
+        finally:
+            self._waiters -= 1
+            self.unsubscribe(queue)
+
+    def wait_for_status_sync(self, uuid, statuses, timeout=30):
+        """wait_for_status 的同步版本，供普通线程调用"""
+        future = asyncio.run_coroutine_threadsafe(self.wait_for_status(uuid, statuses, timeout), self.loop)
+        return future.result()
+
+    # ---- 快照 ----
+
+    def get_snapshot(self, max_age=None):
+        """
+        返回最近一次的会话快照
+
+        Args:
+            max_age (float): 快照允许的最大年龄（秒）；超过时返回 None
+
+        Returns:
+            SessionSnapshot 或 None
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        if max_age is not None and snapshot.age > max_age:
+            return None
+        return snapshot
+
+    def get_status(self, uuid):
+        """返回最近快照中会话的状态字符串，未知时返回 None"""
+        status = self.snapshot.status_of(uuid) if self.snapshot else None
+        return status.value if status else None
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_session_watcher(api):
+    """获取（并启动）指定 API 地址的共享会话监视器"""
+    with _watchers_lock:
+        watcher = _watchers.get(api.base_url)
+        if watcher is None:
+            watcher = _watchers[api.base_url] = SessionWatcher(api).start()
+        return watcher
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Simple icon creator using only Pillow
-Creates both Windows (.ico) and basic PNG icons
+Creates Windows (.ico), macOS (.icns) and PNG icons
 """
 
 import os
@@ -108,62 +108,17 @@ def create_icon_image(size):
     return img
 
 def create_all_icons():
-    """Create all required icon sizes"""
+    """Create all required icons (PNG, ICO and ICNS) through the shared icon pipeline"""
     if not install_pillow():
         return False
     
     print("🎨 Creating icons...")
     
-    # Standard icon sizes
-    sizes = [16, 32, 48, 64, 128, 256, 512]
-    images = []
+    # The master image is drawn once and resized in parallel; results are cached by source hash
+    from icon_pipeline import generate_icons
+    written = generate_icons()
     
-    for size in sizes:
-        try:
-            img = create_icon_image(size)
-            img.save(f'app_icon_{size}.png')
-            images.append(img)
-            print(f"✅ Created app_icon_{size}.png")
-        except Exception as e:
-            print(f"❌ Failed to create {size}px icon: {e}")
-    
-    # Create Windows ICO file
-    try:
-        if images:
-            # Use sizes that work well for ICO
-            ico_images = [img for img in images if img.size[0] <= 256]
-            if ico_images:
-                ico_images[0].save('app_icon.ico', format='ICO', 
-                                 sizes=[(img.width, img.height) for img in ico_images])
-                print("✅ Created app_icon.ico (Windows)")
-            else:
-                print("❌ No suitable images for ICO creation")
-        else:
-            print("❌ No images available for ICO creation")
-    except Exception as e:
-        print(f"❌ ICO creation failed: {e}")
-    
-    # Create a high-quality PNG for macOS (can be converted to ICNS later)
-    try:
-        if images:
-            # Save the largest image as the main icon
-            largest_img = max(images, key=lambda x: x.size[0])
-            largest_img.save('app_icon.png')
-            print("✅ Created app_icon.png (main icon)")
-    except Exception as e:
-        print(f"❌ Main PNG creation failed: {e}")
-    
-    # Clean up individual size files
-    try:
-        for size in sizes:
-            png_file = f'app_icon_{size}.png'
-            if os.path.exists(png_file):
-                os.remove(png_file)
-        print("🗑️ Cleaned up intermediate files")
-    except:
-        pass
-    
-    return True
+    return 'png' in written
 
 def create_simple_fallback_icon():
     """Create a very simple fallback icon if Pillow fails"""
@@ -198,14 +153,17 @@ def main():
                 size = os.path.getsize('app_icon.ico')
                 print(f"  - app_icon.ico ({size} bytes) - Windows icon")
             
+            if os.path.exists('app_icon.icns'):
+                size = os.path.getsize('app_icon.icns')
+                print(f"  - app_icon.icns ({size} bytes) - macOS icon")
+            
             if os.path.exists('app_icon.png'):
                 size = os.path.getsize('app_icon.png')
                 print(f"  - app_icon.png ({size} bytes) - Main icon")
             
             print("\n💡 Usage:")
             print("  - Windows: Use app_icon.ico in your application")
-            print("  - macOS: Convert app_icon.png to .icns using:")
-            print("    sips -s format icns app_icon.png --out app_icon.icns")
+            print("  - macOS: Use app_icon.icns")
             print("  - Linux: Use app_icon.png")
             
         else:
@@ -14,11 +14,36 @@ import sys
 import platform
 from datetime import datetime
 
-# 尝试导入主程序
-try:
-    from linken_sphere_playwright_browser import LinkenSphereAppleBrowser
-except ImportError:
-    LinkenSphereAppleBrowser = None
+from config_service import get_config_service, validate_config
+from profile_leases import ProfileLeaseManager
+
+# 主程序模块（Playwright、requests 等）较重，延迟到第一次使用时再导入，窗口可以立即显示
+LinkenSphereAppleBrowser = None
+run_in_shared_loop = None
+LinkenSphereAPI = None
+get_session_watcher = None
+_browser_import_error = None
+_browser_import_lock = threading.Lock()
+
+
+def load_browser_modules():
+    """导入主程序模块（只导入一次，线程安全），成功返回 True"""
+    global LinkenSphereAppleBrowser, run_in_shared_loop, LinkenSphereAPI, get_session_watcher, _browser_import_error
+    with _browser_import_lock:
+        if LinkenSphereAppleBrowser is None and _browser_import_error is None:
+            try:
+                from linken_sphere_playwright_browser import LinkenSphereAppleBrowser as browser_class
+                from cdp_connection_pool import run_in_shared_loop as shared_loop_runner
+                from linken_sphere_api import LinkenSphereAPI as api_class
+                from session_watcher import get_session_watcher as watcher_getter
+            except ImportError as e:
+                _browser_import_error = e
+            else:
+                LinkenSphereAppleBrowser = browser_class
+                run_in_shared_loop = shared_loop_runner
+                LinkenSphereAPI = api_class
+                get_session_watcher = watcher_getter
+        return LinkenSphereAppleBrowser is not None
 
 class SimpleLinkenGUI:
     def __init__(self):
@@ -33,19 +58,29 @@ class SimpleLinkenGUI:
             'max_retries': 3,
             'linken_api_port': 36555,
             'debug_port': 12345,
-            'max_threads': 2
+            'max_threads': 2,
+            'metrics_port': 9464,  # 本地指标端点端口，0 表示不启用
+            'resume_runs': True  # 按配置文件从上次中断的检查点继续
         }
         
         # 状态
         self.browser_threads = {}
         self.thread_counter = 0
         self.is_running = False
-        self.available_profiles = []  # 可用的配置文件列表
-        self.used_profiles = set()    # 已使用的配置文件UUID
-        
+        self.profile_leases = ProfileLeaseManager(ttl=120)  # 配置文件租约（替代已使用集合）
+        self.profile_refresh_thread = None
+        self.profile_watch_future = None  # 跟随共享会话监视器的协程
+        self.profile_sweep_interval = 30  # 没有会话变化时回收过期租约的间隔（秒）
+        self.batch_starting = False  # 是否有批量启动会话正在进行
+        self.config_service = get_config_service()
+
         self.create_widgets()
         self.load_config()
-        self.refresh_profiles()  # 获取可用的配置文件
+        # 配置文件被修改时实时应用（浏览时长、重试间隔由各线程自行跟随，线程数在这里调整）
+        self.config_service.subscribe(self.on_config_changed)
+        self.config_service.start_watching()
+        self.refresh_profiles()  # 在后台获取可用的配置文件
+        self.start_metrics_endpoint()
         
     def setup_window(self):
         """设置主窗口"""
@@ -200,6 +235,10 @@ class SimpleLinkenGUI:
         
         tk.Button(button_frame, text="🗑️ 清理", command=self.cleanup_finished_threads,
                  bg='#6c757d', fg='white', font=('Arial', 10, 'bold'), width=8).pack(side=tk.LEFT, padx=5)
+
+        self.profile_button = tk.Button(button_frame, text="🔬 分析", command=self.toggle_profiling,
+                                        bg='#6f42c1', fg='white', font=('Arial', 10, 'bold'), width=8)
+        self.profile_button.pack(side=tk.LEFT, padx=5)
     
     def create_status_section(self, parent):
         """创建状态区域"""
@@ -256,60 +295,176 @@ class SimpleLinkenGUI:
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=(2, 5))
     
     def load_config(self):
-        """加载配置"""
+        """加载配置（由配置服务校验，无效字段保留默认值）"""
         try:
-            if os.path.exists("linken_sphere_config.json"):
-                with open("linken_sphere_config.json", 'r', encoding='utf-8') as f:
-                    saved_config = json.load(f)
-                    self.config.update(saved_config)
+            if os.path.exists(self.config_service.path):
+                errors = self.config_service.load()
+                self.config.update(self.config_service.snapshot())
 
                 # 更新GUI
-                self.browse_duration_var.set(str(self.config['browse_duration']))
-                self.major_cycles_var.set(str(self.config['major_cycles']))
-                self.minor_cycles_var.set(str(self.config['minor_cycles_per_major']))
-                self.max_threads_var.set(str(self.config['max_threads']))
+                self.update_config_vars()
 
+                for error in errors:
+                    self.log_message(f"⚠️ 配置无效，已忽略: {error}")
                 self.log_message("✅ 配置已加载")
         except Exception as e:
             self.log_message(f"⚠️ 加载配置失败: {e}")
 
-    def refresh_profiles(self):
-        """刷新可用的配置文件列表"""
+    def update_config_vars(self):
+        """把配置显示到输入框"""
+        self.browse_duration_var.set(str(self.config['browse_duration']))
+        self.major_cycles_var.set(str(self.config['major_cycles']))
+        self.minor_cycles_var.set(str(self.config['minor_cycles_per_major']))
+        self.max_threads_var.set(str(self.config['max_threads']))
+
+    def on_config_changed(self, changes):
+        """配置服务通知配置变化（可能在轮询线程中调用，转到主线程处理）"""
         try:
-            import requests
-            response = requests.get("http://127.0.0.1:36555/sessions", timeout=5)
-            if response.status_code == 200:
-                self.available_profiles = response.json()
-                self.log_message(f"🔍 发现 {len(self.available_profiles)} 个配置文件")
-
-                # 显示配置文件信息
-                for profile in self.available_profiles:
-                    name = profile.get('name', 'Unknown')
-                    uuid = profile.get('uuid', 'Unknown')
-                    self.log_message(f"  📋 {name} ({uuid[:8]}...)")
+            self.root.after(0, lambda: self.apply_config_changes(changes))
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def apply_config_changes(self, changes):
+        """应用配置变化：更新显示，线程数变化时实时调整运行中的线程"""
+        self.config.update({key: new for key, (old, new) in changes.items() if new is not None})
+        self.update_config_vars()
+        summary = ", ".join(f"{key}: {old} → {new}" for key, (old, new) in sorted(changes.items()))
+        self.log_message(f"🔄 配置已更新 ({summary})")
+        if 'max_threads' in changes:
+            self.apply_thread_limit()
+
+    def apply_thread_limit(self):
+        """按 max_threads 调整运行中的线程：减少时停止最新创建的线程（进度保存在检查点），增加时为空闲槽位启动会话"""
+        if not self.is_running:
+            return
+        active = [t for t in self.browser_threads.values() if t['status'] in ['running', 'starting']]
+        excess = len(active) - self.config['max_threads']
+        if excess > 0:
+            for thread_info in active[-excess:]:
+                thread_info['status'] = 'stopping'
+                thread_info['stop_event'].set()
+                thread_info['pause_event'].set()
+            self.log_message(f"⏹️ 线程数上限降为 {self.config['max_threads']}，已停止 {excess} 个线程")
+            self.update_display()
+        elif excess < 0 and not self.batch_starting:
+            self.log_message(f"➕ 线程数上限升为 {self.config['max_threads']}，启动新线程")
+            self.fill_thread_slots()
+
+    def start_metrics_endpoint(self):
+        """在后台线程中启动本地指标端点（不阻塞窗口显示）"""
+        port = self.config.get('metrics_port', 0)
+        if not port:
+            return
 
+        def _start():
+            from metrics import start_metrics_server
+            server = start_metrics_server(port=port)
+            if server:
+                self.log_message(f"📈 指标端点: http://127.0.0.1:{port}/metrics")
+
+        threading.Thread(target=_start, name="metrics-start", daemon=True).start()
+
+    def toggle_profiling(self):
+        """开启/关闭性能分析（结果按运行保存在 profiles/ 目录下）"""
+        def _toggle():
+            import profiling
+            if profiling.is_profiling():
+                summary = profiling.stop_profiling()
+                if summary:
+                    self.log_message(f"🔬 性能分析已保存: {os.path.join(profiling.DEFAULT_OUTPUT_DIR, summary['run_id'])} "
+                                     f"(事件循环最大延迟 {summary['loop_lag']['max_ms']}ms, "
+                                     f"慢回调 {summary['slow_callbacks']} 次)")
+                self.root.after(0, lambda: self.profile_button.config(text="🔬 分析"))
             else:
-                self.log_message("⚠️ 无法获取配置文件列表")
-                self.available_profiles = []
+                from cdp_connection_pool import get_shared_loop
+                profiling.start_profiling(loop=get_shared_loop())
+                self.log_message("🔬 性能分析已开启")
+                self.root.after(0, lambda: self.profile_button.config(text="🔬 结束分析"))
+
+        # 写出结果可能需要几秒，不阻塞界面
+        threading.Thread(target=_toggle, name="profiling-toggle", daemon=True).start()
+
+    def refresh_profiles(self):
+        """在后台线程中订阅共享会话监视器（不阻塞GUI），已订阅时请求立即轮询一次"""
+        if self.profile_watch_future and not self.profile_watch_future.done():
+            if get_session_watcher is not None:
+                get_session_watcher(LinkenSphereAPI(api_port=self.config['linken_api_port'])).poke()
+            return
+        if self.profile_refresh_thread and self.profile_refresh_thread.is_alive():
+            return
+
+        self.profile_refresh_thread = threading.Thread(target=self._refresh_profiles_worker, daemon=True)
+        self.profile_refresh_thread.start()
+
+    def _refresh_profiles_worker(self):
+        """导入模块并在监视器的事件循环中跟随会话变化"""
+        try:
+            if not load_browser_modules():
+                raise ImportError(_browser_import_error)
+            watcher = get_session_watcher(LinkenSphereAPI(api_port=self.config['linken_api_port']))
         except Exception as e:
             self.log_message(f"⚠️ 获取配置文件失败: {e}")
-            self.available_profiles = []
+            return
 
-    def get_next_available_profile(self):
-        """获取下一个可用的配置文件"""
-        if not self.available_profiles:
-            self.refresh_profiles()
+        self.profile_watch_future = asyncio.run_coroutine_threadsafe(self._follow_session_watcher(watcher), watcher.loop)
 
-        # 查找未使用的配置文件
-        for profile in self.available_profiles:
-            uuid = profile.get('uuid')
-            if uuid and uuid not in self.used_profiles:
-                self.used_profiles.add(uuid)
-                return profile
+    async def _follow_session_watcher(self, watcher):
+        """
+        随 /sessions 的状态变化同步配置文件列表并回收过期租约
+        （使用监视器已有的轮询结果，不再单独轮询 /sessions）
+        """
+        queue = watcher.subscribe()
+        try:
+            if watcher.snapshot is not None:
+                self._apply_profile_snapshot(watcher.snapshot)
+            while True:
+                try:
+                    await asyncio.wait_for(queue.get(), self.profile_sweep_interval)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    # 同一次轮询的多个变化只同步一次
+                    while not queue.empty():
+                        queue.get_nowait()
+                    self._apply_profile_snapshot(watcher.snapshot)
+
+                expired = self.profile_leases.expire_stale()
+                if expired:
+                    self.log_message(f"⏲️ 已回收 {len(expired)} 个过期的配置文件租约")
+        finally:
+            watcher.unsubscribe(queue)
+
+    def _apply_profile_snapshot(self, snapshot):
+        """把会话快照同步到租约管理器"""
+        profiles = [record.to_dict() for record in snapshot.records]
+        known = {p.get('uuid') for p in self.profile_leases.profiles}
+        self.profile_leases.update_profiles(profiles)
+
+        # 只在配置文件列表发生变化时输出详细信息
+        if {p.get('uuid') for p in profiles} != known:
+            self.log_message(f"🔍 发现 {len(profiles)} 个配置文件")
+            for profile in profiles:
+                name = profile.get('name') or 'Unknown'
+                uuid = profile.get('uuid') or 'Unknown'
+                self.log_message(f"  📋 {name} ({uuid[:8]}...)")
+
+    def get_next_available_profile(self, holder=None):
+        """获取下一个可用的配置文件（O(1) 租约获取，不发起网络请求）"""
+        profile = self.profile_leases.acquire(holder)
+        if profile is None and not self.profile_leases.profiles:
+            # 列表尚未加载，触发后台刷新
+            self.refresh_profiles()
+        return profile
+
+    async def heartbeat_profile_lease(self, profile_uuid, lease_id, stop_event):
+        """工作线程运行期间定期续约配置文件"""
+        interval = self.profile_leases.ttl / 3
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            if not self.profile_leases.heartbeat(profile_uuid, lease_id):
+                self.log_message(f"⚠️ 配置文件 {profile_uuid[:8]}... 的租约已失效")
+                return
 
-        # 如果所有配置文件都在使用，返回None
-        return None
-    
     def save_config(self):
         """保存配置"""
         try:
@@ -318,10 +473,12 @@ class SimpleLinkenGUI:
             self.config['major_cycles'] = int(self.major_cycles_var.get())
             self.config['minor_cycles_per_major'] = int(self.minor_cycles_var.get())
             self.config['max_threads'] = int(self.max_threads_var.get())
-            
-            with open("linken_sphere_config.json", 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-            
+
+            # 校验后原子写入，运行中的线程会收到变化通知
+            errors = self.config_service.update(self.config)
+            if errors:
+                raise ValueError("; ".join(errors))
+
             self.log_message("✅ 配置已保存")
         except Exception as e:
             messagebox.showerror("错误", f"保存配置失败: {e}")
@@ -336,15 +493,14 @@ class SimpleLinkenGUI:
         if file_path:
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    imported_config = json.load(f)
+                    imported_config, errors = validate_config(json.load(f))
                 
                 self.config.update(imported_config)
+                for error in errors:
+                    self.log_message(f"⚠️ 导入的配置无效，已忽略: {error}")
                 
                 # 更新GUI
-                self.browse_duration_var.set(str(self.config['browse_duration']))
-                self.major_cycles_var.set(str(self.config['major_cycles']))
-                self.minor_cycles_var.set(str(self.config['minor_cycles_per_major']))
-                self.max_threads_var.set(str(self.config['max_threads']))
+                self.update_config_vars()
                 
                 self.log_message(f"📁 配置已导入: {os.path.basename(file_path)}")
             except Exception as e:
@@ -375,16 +531,90 @@ class SimpleLinkenGUI:
     
     def start_automation(self):
         """开始自动化"""
-        if LinkenSphereAppleBrowser is None:
-            messagebox.showerror("错误", "无法导入 LinkenSphereAppleBrowser 模块")
+        if not load_browser_modules():
+            messagebox.showerror("错误", f"无法导入 LinkenSphereAppleBrowser 模块: {_browser_import_error}")
             return
         
         try:
             self.save_config()  # 保存当前配置
-            self.create_new_thread()
-            self.log_message("🚀 自动化已开始")
+            self.fill_thread_slots(interactive=True)
         except Exception as e:
             messagebox.showerror("错误", f"启动失败: {e}")
+
+    def fill_thread_slots(self, interactive=False):
+        """
+        为所有空闲的线程槽位分配配置文件，然后批量启动会话
+
+        Args:
+            interactive (bool): 没有空闲槽位或配置文件时是否弹窗提示（否则只记录日志）
+        """
+        def warn(message):
+            if interactive:
+                messagebox.showwarning("警告", message)
+            else:
+                self.log_message(f"⚠️ {message}")
+
+        active = len([t for t in self.browser_threads.values() if t['status'] in ['running', 'starting']])
+        slots = self.config['max_threads'] - active
+        if slots <= 0:
+            warn(f"已达到最大线程数 ({self.config['max_threads']})")
+            return
+
+        profiles = []
+        for _ in range(slots):
+            profile = self.get_next_available_profile()
+            if not profile:
+                break
+            profiles.append(profile)
+
+        if not profiles:
+            warn("没有可用的配置文件。请确保有足够的 Linken Sphere 配置文件。")
+            return
+
+        # 每个会话分配独立的调试端口
+        base_port = self.config['debug_port'] + self.thread_counter
+        debug_ports = {profile['uuid']: base_port + i for i, profile in enumerate(profiles)}
+
+        self.batch_starting = True
+        self.log_message(f"🚀 正在批量启动 {len(profiles)} 个会话...")
+        threading.Thread(target=self.batch_start_sessions, args=(profiles, debug_ports), daemon=True).start()
+
+    def batch_start_sessions(self, profiles, debug_ports):
+        """后台批量启动会话，完成后在主线程中为启动成功的会话创建线程"""
+        try:
+            api = LinkenSphereAPI(api_port=self.config['linken_api_port'])
+            results = api.start_sessions(list(debug_ports), concurrency=len(debug_ports), debug_ports=debug_ports)
+        except Exception as e:
+            self.log_message(f"❌ 批量启动会话失败: {e}")
+            results = {}
+
+        def _spawn_threads():
+            self.batch_starting = False
+            started = 0
+            for profile in profiles:
+                uuid = profile['uuid']
+                result = results.get(uuid, {})
+                if result.get('success'):
+                    session_data = {}
+                    if isinstance(result.get('response'), dict):
+                        session_data.update(result['response'])
+                    # 已在运行的会话以 /sessions 报告的实际端口为准
+                    session_data.update(uuid=uuid, debug_port=result.get('debug_port') or debug_ports[uuid])
+                    self.create_new_thread(profile=profile, session_data=session_data)
+                    started += 1
+                else:
+                    # 启动失败，释放配置文件
+                    self.profile_leases.release(uuid, profile.get('lease_id'))
+                    reason = result.get('error') or result.get('status', 'unknown')
+                    self.log_message(f"❌ 会话启动失败: {profile.get('name', 'Unknown')} ({reason})")
+
+            if started:
+                self.log_message(f"🚀 自动化已开始 ({started}/{len(profiles)} 个会话)")
+
+        try:
+            self.root.after(0, _spawn_threads)
+        except (tk.TclError, RuntimeError):
+            self.batch_starting = False
     
     def stop_all_automation(self):
         """停止所有自动化"""
@@ -403,14 +633,23 @@ class SimpleLinkenGUI:
         # 等待一段时间后检查线程状态
         self.root.after(2000, self.check_thread_status)
     
-    def create_new_thread(self):
-        """创建新线程"""
+    def create_new_thread(self, profile=None, session_data=None):
+        """
+        创建新线程
+
+        Args:
+            profile (dict): 已分配的配置文件（为空时自动分配）
+            session_data (dict): 已批量启动的会话信息（为空时由线程自行启动会话）
+        """
         if len([t for t in self.browser_threads.values() if t['status'] in ['running', 'starting']]) >= self.config['max_threads']:
+            if profile:
+                self.profile_leases.release(profile.get('uuid'), profile.get('lease_id'))
             messagebox.showwarning("警告", f"已达到最大线程数 ({self.config['max_threads']})")
             return
 
         # 获取下一个可用的配置文件
-        profile = self.get_next_available_profile()
+        if profile is None:
+            profile = self.get_next_available_profile()
         if not profile:
             messagebox.showwarning("警告", "没有可用的配置文件。请确保有足够的 Linken Sphere 配置文件。")
             return
@@ -427,7 +666,9 @@ class SimpleLinkenGUI:
             'pause_event': threading.Event(),
             'thread': None,
             'profile_uuid': profile_uuid,
-            'profile_name': profile_name
+            'profile_name': profile_name,
+            'lease_id': profile.get('lease_id'),
+            'session_data': session_data
         }
 
         # 初始状态为运行（不暂停）
@@ -461,7 +702,9 @@ class SimpleLinkenGUI:
                 browse_duration=self.config['browse_duration'],
                 major_cycles=self.config['major_cycles'],
                 max_retries=self.config['max_retries'],
-                profile_uuid=profile_uuid  # 传递指定的配置文件UUID
+                profile_uuid=profile_uuid,  # 传递指定的配置文件UUID
+                session_data=thread_info.get('session_data'),
+                session_strategy=self.config.get('session_strategy')
             )
 
             thread_info['status'] = 'running'
@@ -469,23 +712,17 @@ class SimpleLinkenGUI:
             self.update_display()
 
             # 运行自动化，带有停止和暂停控制
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            try:
-                # 创建一个可控制的运行任务
-                task = loop.create_task(self.run_browser_with_control(browser, thread_info))
-                loop.run_until_complete(task)
-            finally:
-                loop.close()
+            # 在共享事件循环中运行，复用同一个 Playwright 驱动和 CDP 连接
+            # 始终按线程包装，运行中途开启性能分析也能分别记录每个线程
+            from profiling import profile_worker
+            run_in_shared_loop(profile_worker(thread_id, self.run_browser_with_control(browser, thread_info)))
 
         except Exception as e:
             self.log_message(f"❌ {thread_id} 运行失败: {e}")
             thread_info['status'] = 'error'
         finally:
             # 释放配置文件
-            if profile_uuid in self.used_profiles:
-                self.used_profiles.remove(profile_uuid)
+            self.profile_leases.release(profile_uuid, thread_info.get('lease_id'))
 
             if thread_info['status'] != 'error':
                 thread_info['status'] = 'finished'
@@ -497,21 +734,27 @@ class SimpleLinkenGUI:
         """带控制的真实浏览器运行"""
         stop_event = thread_info['stop_event']
         pause_event = thread_info['pause_event']
+        heartbeat = asyncio.ensure_future(
+            self.heartbeat_profile_lease(thread_info['profile_uuid'], thread_info.get('lease_id'), stop_event)
+        )
 
         try:
-            # 修改浏览器实例以支持控制信号
+            # 修改浏览器实例以支持控制信号，并跟随配置文件的实时修改
+            browser.config_service = self.config_service
             browser.stop_event = stop_event
             browser.pause_event = pause_event
             browser.thread_info = thread_info
             browser.gui_log_callback = self.log_message
             browser.gui_update_callback = self.update_display
 
-            # 运行真实的浏览器自动化
-            await browser.run()
+            # 运行真实的浏览器自动化（同一配置文件上次被中断时从检查点继续）
+            await browser.run(resume=self.config.get('resume_runs', True))
 
         except Exception as e:
             self.log_message(f"❌ {thread_info['id']} 浏览器运行异常: {e}")
             raise
+        finally:
+            heartbeat.cancel()
     
     def cleanup_finished_threads(self):
         """清理已完成的线程"""
@@ -700,15 +943,24 @@ class SimpleLinkenGUI:
     
     def on_closing(self):
         """窗口关闭"""
+        if 'profiling' in sys.modules and sys.modules['profiling'].is_profiling():
+            sys.modules['profiling'].stop_profiling()
         if self.is_running:
             if messagebox.askokcancel("确认退出", "程序正在运行，确定退出吗？"):
                 self.stop_all_automation()
                 self.save_config()
+                self.stop_config_watch()
                 self.root.destroy()
         else:
             self.save_config()
+            self.stop_config_watch()
             self.root.destroy()
 
+    def stop_config_watch(self):
+        """停止监视配置文件"""
+        self.config_service.unsubscribe(self.on_config_changed)
+        self.config_service.stop_watching()
+
 def main():
     """主函数"""
     app = SimpleLinkenGUI()
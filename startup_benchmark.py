@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+GUI 入口启动耗时基准
+使用 python -X importtime 在独立进程中导入各 GUI 入口模块，解析导入耗时并与预算比较，
+列出最耗时的模块，便于发现被提前导入的重量级依赖（Playwright、requests、PIL 等）。
+超出预算时以非零状态码退出，可在构建前作为检查步骤运行。
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+# 默认检查的 GUI 入口
+ENTRY_POINTS = ("simple_linken_gui", "linken_sphere_gui", "apple_browser_gui")
+
+# 导入预算（毫秒）
+DEFAULT_BUDGET_MS = 300
+
+# 不应在窗口显示前导入的重量级模块
+HEAVY_MODULES = ("playwright", "selenium", "requests", "PIL", "linken_sphere_playwright_browser",
+                 "linken_sphere_api", "cdp_connection_pool", "browse_engine")
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        [{'module', 'self_us', 'cumulative_us', 'depth'}]
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                'module': module,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(indent) - 1) // 2
+            })
+    return entries
+
+
+def measure_entry_point(module, python=sys.executable, cwd=None):
+    """
+    在新进程中导入模块并统计导入耗时
+
+    Returns:
+        {'module', 'total_ms', 'top', 'heavy', 'error'}
+    """
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True, timeout=120
+    )
+    entries = parse_importtime(result.stderr)
+
+    target = next((e for e in reversed(entries) if e['module'] == module), None)
+    imported = {e['module'].split('.')[0] for e in entries}
+    top = sorted(entries, key=lambda e: e['self_us'], reverse=True)[:10]
+
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"退出码 {result.returncode}"
+
+    return {
+        'module': module,
+        'total_ms': round(target['cumulative_us'] / 1000, 1) if target else None,
+        'top': [{'module': e['module'], 'self_ms': round(e['self_us'] / 1000, 1)} for e in top],
+        'heavy': sorted(name for name in HEAVY_MODULES if name in imported),
+        'error': error
+    }
+
+
+def check_budget(results, budget_ms):
+    """返回超出预算或提前导入了重量级模块的入口列表"""
+    failures = []
+    for result in results:
+        if result['error'] or result['total_ms'] is None:
+            failures.append(f"{result['module']}: 导入失败 ({result['error']})")
+        elif result['total_ms'] > budget_ms:
+            failures.append(f"{result['module']}: {result['total_ms']}ms 超出预算 {budget_ms}ms")
+        if result['heavy']:
+            failures.append(f"{result['module']}: 启动时导入了 {', '.join(result['heavy'])}")
+    return failures
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="GUI 入口导入耗时基准")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS), help="要检查的入口模块")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="导入预算（毫秒）")
+    parser.add_argument("--json", action="store_true", help="输出 JSON 结果")
+    args = parser.parse_args()
+
+    results = [measure_entry_point(module) for module in args.modules]
+    failures = check_budget(results, args.budget)
+
+    if args.json:
+        print(json.dumps({'budget_ms': args.budget, 'results': results, 'failures': failures},
+                         ensure_ascii=False, indent=2))
+    else:
+        print("⏱️ GUI 入口导入耗时")
+        print("=" * 50)
+        for result in results:
+            total = f"{result['total_ms']}ms" if result['total_ms'] is not None else "失败"
+            print(f"📦 {result['module']}: {total}")
+            for item in result['top'][:5]:
+                print(f"   - {item['module']}: {item['self_ms']}ms")
+        print("=" * 50)
+        if failures:
+            for failure in failures:
+                print(f"❌ {failure}")
+        else:
+            print(f"✅ 所有入口都在预算 {args.budget}ms 以内")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
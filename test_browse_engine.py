@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+浏览引擎测试脚本
+使用模拟页面和后端验证双层循环、重试统计、停止信号和后端资源释放
+"""
+
+import asyncio
+import threading
+
+from browse_engine import BrowseEngine, BrowserBackend, ExistingSessionBackend
+
+
+class FakePage:
+    """模拟 Playwright 页面：页面高度等于视口高度，不需要滚动"""
+
+    def __init__(self, fail_goto=0):
+        self.visits = []
+        self.fail_goto = fail_goto
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        if self.fail_goto > 0:
+            self.fail_goto -= 1
+            raise RuntimeError("net::ERR_CONNECTION_RESET")
+        self.visits.append(url)
+
+    async def wait_for_load_state(self, state, timeout=None):
+        pass
+
+    async def evaluate(self, script, arg=None):
+        if 'maxScroll' in script:
+            return {'done': True, 'position': arg[0], 'maxScroll': 0}
+        if 'querySelectorAll' in script:
+            return [
+                {'url': 'https://www.apple.com/jp/iphone/', 'text': 'iPhone'},
+                {'url': 'https://www.apple.com/jp/iphone/', 'text': 'iPhone'},
+                {'url': 'https://www.apple.com/jp/search/', 'text': '検索'},
+            ]
+        return None
+
+
+class FakeBackend(BrowserBackend):
+    name = "fake"
+
+    def __init__(self, page):
+        self.page = page
+        self.released = False
+
+    async def acquire(self):
+        return self.page
+
+    async def release(self):
+        self.released = True
+
+
+def test_dual_loop():
+    """测试双层循环访问次数、链接去重过滤和后端释放"""
+    print("1. 双层循环测试:")
+    engine = BrowseEngine(browse_duration=0, major_cycles=2, retry_delay=0)
+    page = FakePage()
+    backend = FakeBackend(page)
+
+    assert asyncio.run(engine.run_with_backend(backend))
+    assert backend.released
+    # 每个大循环：1 次返回主页 + 8 次页面访问
+    assert len(page.visits) == 2 * (1 + 8)
+    assert engine.available_links == [{'url': 'https://www.apple.com/jp/iphone/', 'text': 'iPhone'}]
+    print("✅ 双层循环正确")
+
+
+def test_retry_and_stop():
+    """测试导航重试统计，以及停止信号让循环立即退出"""
+    print("2. 重试与停止测试:")
+    engine = BrowseEngine(browse_duration=0, major_cycles=1, max_retries=3, retry_delay=0)
+    page = FakePage(fail_goto=1)
+    assert asyncio.run(engine.safe_goto(page, "https://www.apple.com/jp/"))
+    assert engine.retry_stats['successful_retries'] == 1
+
+    engine.stop_event = threading.Event()
+    engine.stop_event.set()
+    page = FakePage()
+    assert asyncio.run(engine.run_with_backend(FakeBackend(page)))
+    assert page.visits == []
+    print("✅ 重试与停止正确")
+
+
+def test_existing_session_ports():
+    """测试运行中会话的候选端口顺序：会话端口优先，其次配置范围，最后常用端口"""
+    print("3. 候选端口测试:")
+    backend = ExistingSessionBackend("uuid-1", port_resolver=lambda uuid: 9223,
+                                     debug_port_start=12345, debug_port_range=2)
+    ports = asyncio.run(backend.candidate_ports())
+    assert ports[:3] == [9223, 12345, 12346]
+    assert ports.count(9223) == 1
+    print("✅ 候选端口顺序正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 浏览引擎测试")
+    print("=" * 50)
+    test_dual_loop()
+    test_retry_and_stop()
+    test_existing_session_ports()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
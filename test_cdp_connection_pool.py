@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+CDP 连接注册表测试脚本
+用模拟的 Playwright 驱动验证按端口的引用计数复用、健康检查失败后重连、
+空闲超时回收，以及共享事件循环
+"""
+
+import asyncio
+
+from cdp_connection_pool import CDPConnectionRegistry, get_registry, run_in_shared_loop
+
+
+class FakeCDPSession:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def send(self, method, params=None):
+        if not self.browser.responsive:
+            raise Exception("Target closed")
+        return {'product': 'Chrome/120'}
+
+    async def detach(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.connected = True
+        self.responsive = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_browser_cdp_session(self):
+        return FakeCDPSession(self)
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    async def connect_over_cdp(self, endpoint, timeout=None):
+        browser = FakeBrowser(endpoint)
+        self.browsers.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+def make_registry(**kwargs):
+    registry = CDPConnectionRegistry(**kwargs)
+    registry._playwright = FakePlaywright()
+    return registry
+
+
+def test_refcount_reuse():
+    """测试同一端口的连接被复用，引用计数随 acquire/release 变化"""
+    print("1. 引用计数复用测试:")
+
+    async def scenario():
+        registry = make_registry()
+        first = await registry.acquire(12345)
+        second = await registry.acquire("12345")
+        other = await registry.acquire(12346)
+        assert first is second and first is not other
+        assert first.endpoint == "http://127.0.0.1:12345"
+        assert registry._entries[12345].refcount == 2
+
+        await registry.release(first)
+        await registry.release(second)
+        # 引用计数归零后保留连接，等待下一次复用
+        assert registry._entries[12345].refcount == 0 and not first.closed
+        assert await registry.acquire(12345) is first
+
+        await registry.release(other, discard=True)
+        assert other.closed and 12346 not in registry._entries
+        # 未知的 Browser 直接忽略
+        await registry.release(FakeBrowser("http://127.0.0.1:1"))
+
+        stats = dict(registry.stats)
+        await registry.close_all()
+        assert first.closed and registry._playwright is None
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats == {'connects': 2, 'reuses': 2, 'health_failures': 0, 'closed': 1}, stats
+    print(f"✅ 复用正确: {stats}")
+
+
+def test_health_check():
+    """测试断开或没有响应的连接在复用前被发现并重新连接"""
+    print("2. 健康检查测试:")
+
+    async def scenario():
+        registry = make_registry(health_check_interval=0)
+        first = await registry.acquire(12345)
+        await registry.release(first)
+
+        # CDP 往返失败
+        first.responsive = False
+        second = await registry.acquire(12345)
+        assert second is not first and first.closed
+        await registry.release(second)
+
+        # 连接已断开，复用前重新连接
+        second.connected = False
+        third = await registry.acquire(12345)
+        assert third is not second
+
+        # 使用期间断开的连接在 release 时直接关闭
+        third.connected = False
+        await registry.release(third)
+        assert 12345 not in registry._entries
+
+        stats = dict(registry.stats)
+        await registry.close_all()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats['health_failures'] == 2 and stats['connects'] == 3, stats
+    print(f"✅ 不健康的连接被替换: {stats}")
+
+
+def test_idle_reaper():
+    """测试引用计数为零且空闲超时的连接被回收，使用中的连接保留"""
+    print("3. 空闲回收测试:")
+
+    async def scenario():
+        registry = make_registry(idle_timeout=0.5)
+        idle = await registry.acquire(12345)
+        busy = await registry.acquire(12346)
+        await registry.release(idle)
+
+        await asyncio.sleep(1.2)
+        assert idle.closed and 12345 not in registry._entries
+        assert not busy.closed and 12346 in registry._entries
+
+        await registry.release(busy)
+        await asyncio.sleep(1.2)
+        assert busy.closed and not registry._entries
+        # 没有连接后回收任务退出
+        assert registry._reaper_task.done()
+        await registry.close_all()
+
+    asyncio.run(scenario())
+    print("✅ 空闲连接被回收")
+
+
+def test_shared_loop_registry():
+    """测试不同线程通过共享事件循环拿到同一个注册表"""
+    print("4. 共享事件循环测试:")
+
+    async def current_registry():
+        return get_registry()
+
+    first = run_in_shared_loop(current_registry())
+    second = run_in_shared_loop(current_registry())
+    assert first is second
+    assert asyncio.run(current_registry()) is not first
+    print("✅ 共享事件循环使用同一个注册表")
+
+
+def main():
+    test_refcount_reuse()
+    test_health_check()
+    test_idle_reaper()
+    test_shared_loop_registry()
+    print("\n🎉 所有 CDP 连接注册表测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+检查点测试脚本
+验证崩溃后从检查点继续浏览、不完整记录被跳过，以及检查点文件的压缩
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+
+from browse_engine import BrowseEngine
+from checkpoints import CheckpointStore
+
+HOMEPAGE = "https://www.apple.com/jp/"
+
+
+class SimulatedCrash(BaseException):
+    """模拟进程崩溃（不会被重试机制捕获）"""
+
+
+class CrashingPage:
+    """第 crash_at 次导航时崩溃的模拟页面"""
+
+    def __init__(self, crash_at=None):
+        self.visits = []
+        self.crash_at = crash_at
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        if self.crash_at is not None and len(self.visits) + 1 == self.crash_at:
+            raise SimulatedCrash()
+        self.visits.append(url)
+
+    async def wait_for_load_state(self, state, timeout=None):
+        pass
+
+    async def evaluate(self, script, arg=None):
+        if 'maxScroll' in script:
+            return {'done': True, 'position': arg[0], 'maxScroll': 0}
+        if 'querySelectorAll' in script:
+            return [{'url': 'https://www.apple.com/jp/mac/', 'text': 'Mac'}]
+        return None
+
+
+def make_engine(store):
+    engine = BrowseEngine(browse_duration=0, major_cycles=2, retry_delay=0)
+    engine.checkpoints = store
+    engine.worker_name = "profile-1"
+    engine.session_uuid = "session-uuid"
+    return engine
+
+
+def test_resume_after_crash():
+    """测试崩溃后以 resume=True 运行从中断的位置继续，正常结束后删除检查点"""
+    print("1. 崩溃后继续测试:")
+    work_dir = tempfile.mkdtemp()
+    try:
+        store = CheckpointStore(work_dir)
+
+        # 第二个大循环的第 3 次页面访问时崩溃（导航序号：1 主页 + 8 页面 + 1 主页 + 2 页面 + 1）
+        crashed = CrashingPage(crash_at=13)
+        try:
+            asyncio.run(make_engine(store).browse_cycles(crashed))
+            raise AssertionError("应该崩溃")
+        except SimulatedCrash:
+            pass
+
+        checkpoint, links = store.load("profile-1")
+        assert (checkpoint['major_cycle'], checkpoint['minor_cycle']) == (2, 2)
+        assert checkpoint['catalog_version'] == 2 and checkpoint['session_uuid'] == "session-uuid"
+        assert links == [{'url': 'https://www.apple.com/jp/mac/', 'text': 'Mac'}]
+
+        engine = make_engine(store)
+        assert engine.has_checkpoint()
+        resumed = CrashingPage()
+        assert asyncio.run(engine.browse_cycles(resumed, resume=True))
+        # 使用检查点中的链接目录，不再返回主页，只完成剩余的 6 次访问
+        assert len(resumed.visits) == 6 and HOMEPAGE not in resumed.visits
+        assert engine.retry_stats['total_retries'] >= 13
+        assert not os.path.exists(store.path("profile-1"))
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 从中断位置继续，完成后删除检查点")
+
+
+def test_torn_record_and_compaction():
+    """测试跳过写了一半的记录，压缩后保留最新的链接目录和检查点"""
+    print("2. 不完整记录与压缩测试:")
+    work_dir = tempfile.mkdtemp()
+    try:
+        store = CheckpointStore(work_dir, compact_after=5)
+        store.save_catalog("w", 1, [{'url': 'a', 'text': 'A'}])
+        for minor in range(1, 9):
+            store.save("w", 1, minor, 1, {'total_retries': minor})
+        store.close("w")
+        with open(store.path("w"), 'ab') as f:
+            f.write(b'{"type":"visit","major_cy')
+
+        checkpoint, links = store.load("w")
+        assert checkpoint['minor_cycle'] == 8 and links == [{'url': 'a', 'text': 'A'}]
+
+        # 重新打开时去掉不完整的一行；行数达到上限，本次写入压缩为目录 + 检查点两行
+        store.save("w", 2, 1, 1, {'total_retries': 9})
+        with open(store.path("w"), 'rb') as f:
+            assert len(f.read().splitlines()) == 2
+        store.save("w", 2, 2, 1, {'total_retries': 9})
+        checkpoint, links = store.load("w")
+        assert (checkpoint['major_cycle'], checkpoint['minor_cycle']) == (2, 2) and links
+
+        engine = BrowseEngine(major_cycles=3)
+        engine.checkpoints = store
+        engine.worker_name = "w"
+        assert engine.restore_checkpoint("w") == (1, 2)
+        store.clear("w")
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 不完整记录被跳过，压缩后内容正确")
+
+
+def test_compaction_on_catalog():
+    """测试由目录记录触发的压缩保留最新的检查点及其使用的旧版本目录"""
+    print("3. 目录触发压缩测试:")
+    work_dir = tempfile.mkdtemp()
+    try:
+        store = CheckpointStore(work_dir, compact_after=5)
+        store.save_catalog("w", 1, [{'url': 'a', 'text': 'A'}])
+        for minor in range(1, 5):
+            store.save("w", 1, minor, 1, {'total_retries': 0})
+        # 第 6 行是新目录，触发压缩
+        store.save_catalog("w", 2, [{'url': 'b', 'text': 'B'}])
+        with open(store.path("w"), 'rb') as f:
+            assert len(f.read().splitlines()) == 3
+
+        checkpoint, links = store.load("w")
+        assert (checkpoint['major_cycle'], checkpoint['minor_cycle']) == (1, 4)
+        assert links == [{'url': 'a', 'text': 'A'}]
+
+        store.save("w", 2, 1, 2, {'total_retries': 0})
+        checkpoint, links = store.load("w")
+        assert checkpoint['catalog_version'] == 2 and links == [{'url': 'b', 'text': 'B'}]
+        store.clear("w")
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 压缩后检查点和链接目录都被保留")
+
+
+def main():
+    test_resume_after_crash()
+    test_torn_record_and_compaction()
+    test_compaction_on_catalog()
+    print("\n🎉 所有检查点测试通过")
+
+
+if __name__ == "__main__":
+    main()
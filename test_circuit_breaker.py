@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+熔断器测试脚本
+验证熔断器的状态转换（关闭 → 打开 → 半开 → 关闭/打开）、半开状态只放行一个探测请求，
+以及探测请求因其他异常结束时释放探测名额
+"""
+
+import time
+
+from linken_sphere_api import CircuitBreaker, CircuitOpenError, LinkenSphereAPI
+
+
+def make_breaker():
+    # 打开时长固定为 0.05 秒
+    return CircuitBreaker(failure_threshold=3, base_delay=0.05, max_delay=0.05)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.before_request() is False
+        breaker.record_failure()
+
+
+def test_open_at_threshold():
+    """测试连续失败达到阈值时打开熔断，打开期间拒绝请求"""
+    print("1. 达到阈值打开测试:")
+    breaker = make_breaker()
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # 成功一次后重新计数
+    breaker.record_success()
+    open_breaker(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    try:
+        breaker.before_request()
+        raise AssertionError("熔断打开时应拒绝请求")
+    except CircuitOpenError:
+        pass
+    assert breaker.get_metrics()['rejected'] == 1
+    assert not breaker.allow_retry()
+    print("✅ 达到阈值后打开并拒绝请求")
+
+
+def test_half_open_single_probe():
+    """测试打开时长到期后进入半开状态，只放行一个探测请求"""
+    print("2. 半开探测测试:")
+    breaker = make_breaker()
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert breaker.before_request() is True
+    try:
+        breaker.before_request()
+        raise AssertionError("半开状态只允许一个探测请求")
+    except CircuitOpenError:
+        pass
+    print("✅ 半开状态只放行一个探测请求")
+
+
+def test_probe_outcome():
+    """测试探测成功关闭熔断，探测失败再次打开"""
+    print("3. 探测结果测试:")
+    breaker = make_breaker()
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.before_request() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.before_request() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_request() is False
+    transitions = breaker.get_metrics()['transitions']
+    assert transitions == {'closed->open': 1, 'open->half_open': 2, 'half_open->open': 1, 'half_open->closed': 1}
+    print(f"✅ 状态转换正确: {transitions}")
+
+
+def test_probe_released_on_other_error():
+    """测试探测请求因非网络异常结束时释放探测名额，熔断器不会卡在半开状态"""
+    print("4. 探测名额释放测试:")
+    api = LinkenSphereAPI()
+    api.breaker = make_breaker()
+    open_breaker(api.breaker)
+    time.sleep(0.06)
+
+    try:
+        api._make_request_with_timeout('GET', '/sessions', timeout=1)
+        raise AssertionError("应该抛出 ValueError")
+    except ValueError:
+        pass
+
+    assert api.breaker.state == CircuitBreaker.HALF_OPEN
+    assert api.breaker.before_request() is True
+    api.breaker.record_success()
+    assert api.breaker.state == CircuitBreaker.CLOSED
+
+    # 已记录结果后释放探测名额不影响状态
+    api.breaker.release_probe()
+    assert api.breaker.state == CircuitBreaker.CLOSED
+    print("✅ 探测名额被释放，下一个请求可以继续探测")
+
+
+def main():
+    test_open_at_threshold()
+    test_half_open_single_probe()
+    test_probe_outcome()
+    test_probe_released_on_other_error()
+    print("\n🎉 所有熔断器测试通过")
+
+
+if __name__ == "__main__":
+    main()
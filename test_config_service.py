@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+配置服务测试脚本
+验证配置校验、按修改时间热重载、变化通知，以及浏览引擎实时跟随配置
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from browse_engine import BrowseEngine
+from config_service import ConfigService, validate_config
+
+
+def write_config(path, config):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+
+def test_validation():
+    """测试类型、范围和可选值校验，未知字段原样保留"""
+    print("1. 配置校验测试:")
+    valid, errors = validate_config({
+        'browse_duration': 30,
+        'max_threads': 0,
+        'retry_delay': 2.5,
+        'max_retries': True,
+        'log_level': 'VERBOSE',
+        'session_strategy': None,
+        'custom_key': [1, 2],
+    })
+    assert valid == {'browse_duration': 30, 'retry_delay': 2.5, 'session_strategy': None, 'custom_key': [1, 2]}
+    assert len(errors) == 3
+    assert validate_config([1, 2])[0] == {}
+    print("✅ 无效字段被拒绝，有效字段保留")
+
+
+def test_hot_reload():
+    """测试轮询发现文件修改后重新加载并通知，无效值保留原值，update 原子写入且不重复通知"""
+    print("2. 热重载测试:")
+    work_dir = tempfile.mkdtemp()
+    path = os.path.join(work_dir, "config.json")
+    try:
+        write_config(path, {'browse_duration': 60, 'max_threads': 3})
+        service = ConfigService(path, poll_interval=0.05)
+        assert service.load() == []
+
+        received = []
+        changed = threading.Event()
+
+        def on_change(changes):
+            received.append(changes)
+            changed.set()
+
+        service.subscribe(on_change)
+        service.start_watching()
+        try:
+            write_config(path, {'browse_duration': 20, 'max_threads': -1, 'retry_delay': 1})
+            # 保证修改时间或大小有变化
+            os.utime(path, ns=(0, 10 ** 9))
+            assert changed.wait(2)
+        finally:
+            service.stop_watching()
+
+        assert received[0] == {'browse_duration': (60, 20), 'retry_delay': (None, 1)}
+        assert service.get('max_threads') == 3
+        assert service.last_errors
+
+        received.clear()
+        assert service.update({'max_threads': 'many'})
+        assert service.update({'max_threads': 8}) == []
+        assert received == [{'max_threads': (3, 8)}]
+        assert not service.reload_if_changed()
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f)['max_threads'] == 8
+        assert not os.path.exists(path + ".tmp")
+
+        # 写了一半的 JSON 不影响当前配置
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"browse_duration": ')
+        assert service.reload_if_changed()
+        assert service.get('browse_duration') == 20
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 修改被发现并通知，无效值不生效")
+
+
+def test_engine_follows_config():
+    """测试浏览引擎在运行期间实时使用新的浏览时长和重试间隔"""
+    print("3. 引擎跟随配置测试:")
+    work_dir = tempfile.mkdtemp()
+    try:
+        service = ConfigService(os.path.join(work_dir, "config.json"))
+        service.update({'browse_duration': 45, 'max_threads': 2})
+
+        engine = BrowseEngine(browse_duration=60, retry_delay=5)
+        engine.config_service = service
+        engine.follow_config()
+        assert engine.browse_duration == 45
+
+        service.update({'browse_duration': 10, 'retry_delay': 0.5})
+        assert (engine.browse_duration, engine.retry_delay) == (10, 0.5)
+
+        engine.unfollow_config()
+        service.update({'browse_duration': 99})
+        assert engine.browse_duration == 10
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 引擎实时使用新配置")
+
+
+def main():
+    test_validation()
+    test_hot_reload()
+    test_engine_follows_config()
+    print("\n🎉 所有配置服务测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+登录网络服务测试脚本
+使用本地模拟的认证服务器，验证后台请求、结果队列和服务器健康缓存
+"""
+
+import http.server
+import json
+import threading
+import time
+
+import douyin_network_service
+from douyin_network_service import DouyinNetworkService, SERVER_OK, SERVER_UNREACHABLE
+
+STATUS_REQUESTS = []
+
+
+class FakeAuthHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        STATUS_REQUESTS.append(self.path)
+        body = json.dumps({'service': 'douyin'}).encode()
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSecurityManager:
+    """只提供网络服务需要的接口"""
+
+    def __init__(self, server_url):
+        self.server_url = server_url
+        self.sessions = []
+
+    def verify_user_remote(self, username, password, session=None):
+        self.sessions.append(session)
+        return password == 'secret'
+
+
+def _wait_results(service, count, timeout=5):
+    """模拟 Tk 的 after 轮询，直到处理了 count 个结果"""
+    handled = 0
+    deadline = time.time() + timeout
+    while handled < count and time.time() < deadline:
+        handled += service.process_results()
+        time.sleep(0.01)
+    return handled
+
+
+def test_status_cached():
+    """测试服务器状态检查结果被缓存"""
+    print("1. 服务器状态缓存测试:")
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FakeAuthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    douyin_network_service._health_cache.clear()
+    STATUS_REQUESTS.clear()
+
+    statuses = []
+    service = DouyinNetworkService(FakeSecurityManager(url))
+    try:
+        service.check_server_status(lambda status, error: statuses.append(status))
+        assert _wait_results(service, 1) == 1
+        # 第二个窗口直接使用缓存
+        other = DouyinNetworkService(FakeSecurityManager(url))
+        other.check_server_status(lambda status, error: statuses.append(status))
+        assert _wait_results(other, 1) == 1
+        other.shutdown()
+    finally:
+        service.shutdown()
+        server.shutdown()
+
+    assert statuses == [SERVER_OK, SERVER_OK]
+    assert STATUS_REQUESTS == ['/api/status']
+    print("✅ 服务器状态缓存正确")
+
+
+def test_verify_and_status_concurrent():
+    """测试验证与状态检查并行执行，验证复用服务的连接池"""
+    print("2. 并行验证测试:")
+    douyin_network_service._health_cache.clear()
+    manager = FakeSecurityManager("http://127.0.0.1:9")
+    service = DouyinNetworkService(manager, status_timeout=1)
+    results = {}
+    try:
+        service.check_server_status(lambda status, error: results.setdefault('status', status))
+        service.verify_user('alice', 'secret', lambda ok, error: results.setdefault('good', ok))
+        service.verify_user('alice', 'wrong', lambda ok, error: results.setdefault('bad', ok))
+        assert _wait_results(service, 3) == 3
+    finally:
+        service.shutdown()
+
+    assert results == {'status': SERVER_UNREACHABLE, 'good': True, 'bad': False}
+    assert all(session is service.session for session in manager.sessions)
+    print("✅ 并行验证正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 登录网络服务测试")
+    print("=" * 50)
+    test_status_cached()
+    test_verify_and_status_concurrent()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+抖音安全管理模块测试脚本
+验证机器密钥缓存和凭据的保存/加载
+"""
+
+import base64
+import hashlib
+import os
+import tempfile
+import time
+
+# 配置目录放到临时目录，避免写入真实的用户目录
+os.environ['HOME'] = tempfile.mkdtemp(prefix='douyin_security_test_')
+os.environ['APPDATA'] = os.environ['HOME']
+
+import douyin_security_manager
+from douyin_security_manager import DouyinSecurityManager
+
+
+def test_machine_key_cached():
+    """测试机器密钥在进程内只派生一次"""
+    print("1. 机器密钥缓存测试:")
+    douyin_security_manager._machine_key_cache.clear()
+    manager = DouyinSecurityManager()
+
+    key = manager._get_machine_key()
+    start_time = time.perf_counter()
+    for _ in range(20):
+        assert manager._get_machine_key() == key
+    elapsed = time.perf_counter() - start_time
+
+    assert len(douyin_security_manager._machine_key_cache) == 1
+    assert DouyinSecurityManager()._get_machine_key() == key
+    assert elapsed < 0.05, f"缓存命中耗时过长: {elapsed:.3f}s"
+    print("✅ 机器密钥缓存正确")
+
+
+def test_credentials_round_trip():
+    """测试凭据保存后可以正确加载"""
+    print("2. 凭据保存/加载测试:")
+    manager = DouyinSecurityManager()
+    assert manager.save_credentials('alice', 'secret')
+    assert manager.load_credentials() == {'username': 'alice', 'password': 'secret'}
+    assert manager.clear_credentials()
+    print("✅ 凭据保存/加载正确")
+
+
+def _legacy_encrypt(data, key):
+    """旧版逐字节 XOR 实现，用于验证文件格式兼容"""
+    key_bytes = hashlib.sha256(key.encode()).digest()
+    encrypted = bytearray()
+    for i, byte in enumerate(data.encode('utf-8')):
+        encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
+    return base64.b64encode(encrypted).decode()
+
+
+def test_simple_cipher_compatible():
+    """测试批量 XOR 与旧版逐字节实现输出完全一致"""
+    print("3. XOR 加密兼容性测试:")
+    manager = DouyinSecurityManager()
+    samples = ["", "a", "x" * 32, "用户数据" * 100, '{"users": {"admin": {"password": "douyin123456"}}}' * 500]
+    for text in samples:
+        encrypted = manager._simple_encrypt(text, "douyin_users_key_2024")
+        assert encrypted == _legacy_encrypt(text, "douyin_users_key_2024")
+        assert manager._simple_decrypt(encrypted, "douyin_users_key_2024") == text
+    assert manager._simple_decrypt("not base64!!", "k") == ""
+    print("✅ XOR 加密兼容")
+
+
+def test_local_users_index():
+    """测试本地用户索引：内存查找、原子写入和按修改时间失效"""
+    print("4. 本地用户索引测试:")
+    manager = DouyinSecurityManager()
+    assert manager.verify_user_local('admin', 'douyin123456')
+    assert not manager.verify_user_local('admin', 'wrong')
+    assert not manager.verify_user_local('nobody', 'douyin123456')
+    manager._users_writer.join(timeout=5)
+    assert os.path.exists(manager.auth_file)
+    assert not [name for name in os.listdir(manager.config_dir) if name.endswith('.tmp')]
+
+    # 另一个实例修改文件后，检查间隔过去即可看到新用户
+    other = DouyinSecurityManager()
+    users_data = {'users': dict(other._load_local_users_data()['users'], bob={'password': 'pw'})}
+    assert other._save_local_users_data(users_data)
+    manager._users_checked_at = 0
+    assert manager.verify_user_local('bob', 'pw')
+    assert all(isinstance(digest, bytes) for digest in manager._users_index.values())
+    print("✅ 本地用户索引正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 抖音安全管理模块测试")
+    print("=" * 50)
+    test_machine_key_cached()
+    test_credentials_round_trip()
+    test_simple_cipher_compatible()
+    test_local_users_index()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+图标流水线测试脚本
+验证一次渲染即可写出 PNG/ICO/ICNS，且源未变化时直接使用缓存
+"""
+
+import os
+import shutil
+import tempfile
+
+from icon_pipeline import ICNS_SIZES, ICO_SIZES, IconPipeline
+
+
+def test_write_all_formats():
+    """测试所有格式从同一组图像写出"""
+    print("1. 多格式输出测试:")
+    from PIL import Image
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        pipeline = IconPipeline(cache_dir=os.path.join(work_dir, "cache"))
+        written = pipeline.write_all(work_dir)
+        assert set(written) == {'png', 'ico', 'icns'}
+
+        with Image.open(written['ico']) as ico:
+            assert set(ico.info['sizes']) == {(size, size) for size in ICO_SIZES}
+        with Image.open(written['icns']) as icns:
+            assert max(size[0] for size in icns.info['sizes']) * 2 >= max(ICNS_SIZES)
+        with Image.open(written['png']) as png:
+            assert png.size == (512, 512)
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ PNG/ICO/ICNS 生成正确")
+
+
+def test_cache_by_source_hash():
+    """测试源文件未变化时跳过渲染，内容变化时重新渲染"""
+    print("2. 源哈希缓存测试:")
+    from PIL import Image
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(work_dir, "source.png")
+        Image.new('RGBA', (300, 300), (255, 0, 0, 255)).save(source)
+        cache_dir = os.path.join(work_dir, "cache")
+
+        first = IconPipeline(source=source, cache_dir=cache_dir, parallel=False)
+        first.images()
+        assert not first.cache_hit
+
+        second = IconPipeline(source=source, cache_dir=cache_dir, parallel=False)
+        assert second.images()[16].size == (16, 16)
+        assert second.cache_hit
+
+        Image.new('RGBA', (300, 300), (0, 0, 255, 255)).save(source)
+        third = IconPipeline(source=source, cache_dir=cache_dir, parallel=False)
+        third.images()
+        assert not third.cache_hit
+        assert third.images()[64].getpixel((32, 32))[2] == 255
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 缓存按源哈希命中/失效")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 图标流水线测试")
+    print("=" * 50)
+    test_write_all_formats()
+    test_cache_by_source_hash()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
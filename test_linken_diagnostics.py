@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+统一诊断引擎测试脚本
+使用本地模拟的 Linken Sphere API 和调试端口，验证并发探测、去重、缓存和报告结构
+"""
+
+import http.server
+import json
+import threading
+
+from linken_diagnostics import DiagnosticsEngine
+
+REQUEST_COUNTS = {}
+
+
+class FakeHandler(http.server.BaseHTTPRequestHandler):
+    """同时模拟 /sessions 和 /json/version"""
+
+    def do_GET(self):
+        REQUEST_COUNTS[self.path] = REQUEST_COUNTS.get(self.path, 0) + 1
+        port = self.server.server_address[1]
+        if self.path == '/sessions':
+            body = [{'uuid': 'aaaa1111', 'status': 'running', 'debug_port': port}]
+        elif self.path == '/json/version':
+            body = {'Browser': 'Chrome/120', 'webSocketDebuggerUrl': f'ws://127.0.0.1:{port}/devtools/browser/x'}
+        elif self.path == '/json':
+            body = [{'type': 'page'}]
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FakeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_dedupe_and_cache():
+    """测试相同探测只发送一次，并在缓存窗口内复用结果"""
+    print("1. 去重与缓存测试:")
+    server = _start_server()
+    port = server.server_address[1]
+    REQUEST_COUNTS.clear()
+    try:
+        with DiagnosticsEngine(api_ports=(), debug_ports=(), timeout=2) as engine:
+            futures = [engine.probe(port, '/json/version') for _ in range(10)]
+            assert all(f.result()['ok'] for f in futures)
+            assert engine.probe(port, '/json/version').result()['json']['Browser'] == 'Chrome/120'
+        assert REQUEST_COUNTS['/json/version'] == 1
+    finally:
+        server.shutdown()
+    print("✅ 去重与缓存正确")
+
+
+def test_report():
+    """测试完整报告：API 端口、会话返回的调试端口和 CDP 识别"""
+    print("2. 诊断报告测试:")
+    server = _start_server()
+    port = server.server_address[1]
+    try:
+        with DiagnosticsEngine(api_ports=(port,), debug_ports=(), timeout=2) as engine:
+            report = engine.run()
+    finally:
+        server.shutdown()
+
+    summary = report['summary']
+    assert summary['healthy']
+    assert summary['api_ports'] == [port]
+    assert summary['sessions'] == 1 and summary['running_sessions'] == 1
+    assert report['api'][port]['/status']['status'] == 404
+    json.dumps(report, default=str)
+    print("✅ 诊断报告正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 统一诊断引擎测试")
+    print("=" * 50)
+    test_dedupe_and_cache()
+    test_report()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+本机监听端口发现测试脚本
+验证 /proc/net/tcp(6) 的解析，以及在 Linux 上能找到当前进程打开的监听端口
+"""
+
+import socket
+import sys
+
+from listening_ports import list_listening_ports, parse_proc_net_tcp
+
+SAMPLE_TCP = """  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 0100007F:2406 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 41234 1 0000000000000000 100 0 0 10 0
+   1: 0100007F:C146 0100007F:2406 01 00000000:00000000 00:00000000 00000000  1000        0 41299 1 0000000000000000 20 4 30 10 -1
+   2: 00000000:8E9B 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 41300 1 0000000000000000 100 0 0 10 0
+"""
+
+SAMPLE_TCP6 = """  sl  local_address                         remote_address                        st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000000000000000000001000000:9C40 00000000000000000000000000000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 51234 1 0000000000000000 100 0 0 10 0
+"""
+
+
+def test_parse_ipv4():
+    """测试 IPv4 监听条目解析（忽略非 LISTEN 状态）"""
+    print("1. IPv4 解析测试:")
+    listeners = parse_proc_net_tcp(SAMPLE_TCP)
+    assert [(item['address'], item['port'], item['inode']) for item in listeners] == [
+        ('127.0.0.1', 9222, 41234),
+        ('0.0.0.0', 36507, 41300),
+    ]
+    print("✅ IPv4 解析正确")
+
+
+def test_parse_ipv6():
+    """测试 IPv6 监听条目解析"""
+    print("2. IPv6 解析测试:")
+    listeners = parse_proc_net_tcp(SAMPLE_TCP6)
+    assert [(item['address'], item['port']) for item in listeners] == [('::1', 40000)]
+    print("✅ IPv6 解析正确")
+
+
+def test_live_listener():
+    """测试能发现当前进程的监听端口及其 PID"""
+    print("3. 实时监听端口测试:")
+    if not sys.platform.startswith('linux'):
+        print("⏭️ 非 Linux 平台，跳过")
+        return
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+    port = server.getsockname()[1]
+    try:
+        listeners = list_listening_ports(port, port)
+        assert listeners is not None
+        assert any(item['port'] == port and item['address'] == '127.0.0.1' for item in listeners)
+    finally:
+        server.close()
+    print("✅ 找到监听端口")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 监听端口发现测试")
+    print("=" * 50)
+    test_parse_ipv4()
+    test_parse_ipv6()
+    test_live_listener()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+指标注册表测试脚本
+验证文本格式输出、HTTP 端点、浏览引擎的指标记录和热路径开销
+"""
+
+import asyncio
+import time
+import urllib.request
+
+import metrics
+from browse_engine import BrowseEngine
+from metrics import MetricsRegistry, start_metrics_server, stop_metrics_server
+
+
+class FakePage:
+    async def goto(self, url, wait_until=None, timeout=None):
+        pass
+
+    async def wait_for_load_state(self, state, timeout=None):
+        pass
+
+    async def evaluate(self, script, arg=None):
+        return {'done': True, 'position': 0, 'maxScroll': 0}
+
+
+def test_exposition_format():
+    """测试计数器、仪表和直方图的文本格式"""
+    print("1. 文本格式测试:")
+    registry = MetricsRegistry()
+    retries = registry.counter("retries", "重试次数", ("operation",))
+    retries.labels('导航到').inc()
+    retries.labels('导航到').inc(2)
+    registry.gauge("workers", "工作者").set(3)
+    latency = registry.histogram("latency_seconds", "耗时", ("endpoint",), buckets=(0.1, 1.0))
+    latency.labels('/sessions').observe(0.05)
+    latency.labels('/sessions').observe(0.5)
+    latency.labels('/sessions').observe(5)
+
+    text = registry.render()
+    assert '# TYPE retries counter' in text
+    assert 'retries_total{operation="导航到"} 3' in text
+    assert 'workers 3' in text
+    assert 'latency_seconds_bucket{endpoint="/sessions",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="/sessions",le="1"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="/sessions",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{endpoint="/sessions"} 3' in text
+    assert registry.counter("retries", "重试次数", ("operation",)) is retries
+    print("✅ 文本格式正确")
+
+
+def test_http_endpoint_and_engine():
+    """测试 HTTP 端点导出浏览引擎记录的导航、滚动和迟到指标"""
+    print("2. HTTP 端点测试:")
+    engine = BrowseEngine(browse_duration=0, retry_delay=0)
+    assert asyncio.run(engine.safe_goto(FakePage(), "https://www.apple.com/jp/"))
+    asyncio.run(engine.precise_browse_page(FakePage(), 0))
+
+    server = start_metrics_server(port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith("text/plain")
+            text = response.read().decode('utf-8')
+    finally:
+        stop_metrics_server()
+
+    assert 'browse_navigation_seconds_count{outcome="success"}' in text
+    assert 'browse_scroll_seconds_count' in text
+    assert 'browse_visit_lateness_seconds_count' in text
+    assert '# TYPE chromium_rss_bytes gauge' in text
+    print("✅ HTTP 端点正确")
+
+
+def test_hot_path_cost():
+    """测试热路径记录的开销"""
+    print("3. 热路径开销测试:")
+    child = metrics.NAVIGATION_SECONDS.labels("success")
+    count = 100000
+    start = time.perf_counter()
+    for _ in range(count):
+        child.observe(0.3)
+    per_call = (time.perf_counter() - start) / count
+    assert per_call < 20e-6
+    print(f"✅ 每次记录 {per_call * 1e9:.0f} ns")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 指标注册表测试")
+    print("=" * 50)
+    test_exposition_format()
+    test_http_endpoint_and_engine()
+    test_hot_path_cost()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+配置文件租约测试脚本
+验证租约获取/释放、续约和过期回收
+"""
+
+import time
+
+from profile_leases import ProfileLeaseManager
+
+PROFILES = [{'uuid': f'profile-{i}', 'name': f'Profile {i}'} for i in range(3)]
+
+
+def test_acquire_and_release():
+    """测试获取和释放"""
+    print("1. 获取/释放测试:")
+    leases = ProfileLeaseManager(ttl=60)
+    leases.update_profiles(PROFILES)
+
+    acquired = [leases.acquire('worker') for _ in range(3)]
+    assert [p['uuid'] for p in acquired] == ['profile-0', 'profile-1', 'profile-2']
+    assert leases.acquire('worker') is None
+
+    assert leases.release('profile-1', acquired[1]['lease_id'])
+    assert leases.acquire('worker')['uuid'] == 'profile-1'
+    print(f"✅ 租约统计: {leases.get_stats()}")
+
+
+def test_expiry_and_heartbeat():
+    """测试过期回收和续约"""
+    print("2. 过期回收测试:")
+    leases = ProfileLeaseManager(ttl=0.2)
+    leases.update_profiles(PROFILES[:2])
+
+    kept = leases.acquire('alive')
+    crashed = leases.acquire('crashed')
+    time.sleep(0.12)
+    assert leases.heartbeat(kept['uuid'], kept['lease_id'])
+    time.sleep(0.12)
+
+    assert leases.expire_stale() == [crashed['uuid']]
+    assert leases.is_leased(kept['uuid'])
+
+    # 过期后被重新获取的配置文件不能被原持有方释放
+    again = leases.acquire('new-worker')
+    assert again['uuid'] == crashed['uuid']
+    assert not leases.release(crashed['uuid'], crashed['lease_id'])
+    assert leases.is_leased(crashed['uuid'])
+    print("✅ 过期租约已回收，续约的租约保持有效")
+
+
+def test_profile_list_changes():
+    """测试配置文件列表变化"""
+    print("3. 列表变化测试:")
+    leases = ProfileLeaseManager()
+    leases.update_profiles(PROFILES)
+    held = leases.acquire('worker')
+
+    leases.update_profiles([p for p in PROFILES if p['uuid'] != 'profile-2'])
+    assert leases.get_stats() == {'profiles': 2, 'free': 1, 'leased': 1}
+    assert leases.release(held['uuid'], held['lease_id'])
+    assert leases.get_stats()['free'] == 2
+    print("✅ 列表变化处理正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 配置文件租约测试")
+    print("=" * 50)
+    test_acquire_and_release()
+    test_expiry_and_heartbeat()
+    test_profile_list_changes()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
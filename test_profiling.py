@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+性能分析测试脚本
+验证按工作者分别记录 CPU 时间、事件循环延迟和慢回调，以及 pstats / speedscope 输出
+"""
+
+import asyncio
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import time
+
+import profiling
+
+
+def busy_worker_function():
+    """占用 CPU 的函数（只在工作者 A 中调用）"""
+    total = 0
+    for i in range(200000):
+        total += i * i
+    return total
+
+
+async def worker_a():
+    for _ in range(3):
+        busy_worker_function()
+        await asyncio.sleep(0)
+
+
+async def worker_b():
+    await asyncio.sleep(0.3)
+    # 阻塞事件循环，制造延迟和慢回调
+    time.sleep(0.15)
+
+
+def test_per_worker_profiles():
+    """测试每个工作者分别输出 pstats / speedscope，并记录事件循环延迟和慢回调"""
+    print("1. 按工作者分析测试:")
+    work_dir = tempfile.mkdtemp()
+    try:
+        async def run():
+            profiling.start_profiling(loop=asyncio.get_running_loop(), output_dir=work_dir,
+                                      backend="cprofile", lag_interval=0.05)
+            await asyncio.gather(profiling.profile_worker("A", worker_a()),
+                                 profiling.profile_worker("B", worker_b()))
+            await asyncio.sleep(0.1)
+            return profiling.stop_profiling()
+
+        summary = asyncio.run(run())
+        assert not profiling.is_profiling()
+        assert set(summary['workers']) == {'A', 'B'}
+        assert summary['slow_callbacks'] >= 1
+        assert summary['loop_lag']['max_ms'] >= 100
+
+        top_a = [row['function'] for row in summary['workers']['A']['top']]
+        top_b = [row['function'] for row in summary['workers']['B']['top']]
+        assert any('busy_worker_function' in name for name in top_a)
+        assert not any('busy_worker_function' in name for name in top_b)
+
+        run_dir = os.path.join(work_dir, summary['run_id'])
+        assert os.path.exists(os.path.join(run_dir, "summary.json"))
+        assert os.path.getsize(os.path.join(run_dir, "slow_callbacks.log")) > 0
+        pstats.Stats(os.path.join(run_dir, "A.pstats"))
+        with open(os.path.join(run_dir, "A.speedscope.json"), encoding='utf-8') as f:
+            speedscope = json.load(f)
+        profile = speedscope['profiles'][0]
+        assert len(profile['samples']) == len(profile['weights'])
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 每个工作者分别记录，延迟和慢回调已捕获")
+
+
+def test_disabled_by_default():
+    """测试未开启时包装后的协程行为不变，也不产生分析数据"""
+    print("2. 默认关闭测试:")
+
+    async def compute():
+        await asyncio.sleep(0)
+        return busy_worker_function()
+
+    assert asyncio.run(profiling.profile_worker("A", compute())) == busy_worker_function()
+    assert asyncio.run(profiling.run_profiled(compute())) == busy_worker_function()
+    assert not profiling.is_profiling()
+    print("✅ 默认关闭")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 性能分析测试")
+    print("=" * 50)
+    test_per_worker_profiles()
+    test_disabled_by_default()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
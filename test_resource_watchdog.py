@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+资源看门狗测试脚本
+验证按访问次数采样、超过阈值或无响应时回收页面，以及不支持 CDP 的页面被跳过
+"""
+
+import asyncio
+import os
+
+import resource_watchdog
+from resource_watchdog import ResourceWatchdog
+
+
+class FakeCDPPage:
+    """通过 cdp() 返回指定 Performance 指标的模拟页面"""
+
+    def __init__(self, js_heap_mb=50, dom_nodes=1000, fail=False):
+        self.js_heap_mb = js_heap_mb
+        self.dom_nodes = dom_nodes
+        self.fail = fail
+        self.calls = []
+
+    async def cdp(self, method, params=None):
+        self.calls.append(method)
+        if self.fail:
+            raise RuntimeError("Target crashed")
+        if method == "Performance.getMetrics":
+            return {'metrics': [{'name': 'JSHeapUsedSize', 'value': self.js_heap_mb * 1024 * 1024},
+                                {'name': 'Nodes', 'value': self.dom_nodes}]}
+        return {}
+
+
+class PlainPage:
+    """没有 CDP 的页面（如非 Chromium 浏览器）"""
+
+
+def test_recycle_on_threshold():
+    """测试每 N 次访问采样一次，超过阈值时回收页面并记录事件"""
+    print("1. 超过阈值回收测试:")
+    watchdog = ResourceWatchdog(check_every=3, max_js_heap_mb=100, max_dom_nodes=5000)
+    recycled = []
+
+    async def recycle(page):
+        recycled.append(page)
+        return FakeCDPPage()
+
+    async def run():
+        page = FakeCDPPage(js_heap_mb=50)
+        for _ in range(3):
+            page = await watchdog.after_visit(page, recycle)
+        assert not recycled
+        assert page.calls.count("Performance.getMetrics") == 1
+        assert page.calls.count("Performance.enable") == 1
+
+        page.js_heap_mb = 300
+        page.dom_nodes = 9000
+        old_page = page
+        for _ in range(3):
+            page = await watchdog.after_visit(page, recycle)
+        return old_page, page
+
+    old_page, page = asyncio.run(run())
+    assert recycled == [old_page] and page is not old_page
+    event = watchdog.events[-1]
+    assert event['reasons'] == ['js_heap', 'dom_nodes'] and event['success']
+    assert resource_watchdog.PAGE_RECYCLES.labels('js_heap').value >= 1
+    print("✅ 超过阈值的页面已回收")
+
+
+def test_unresponsive_and_unsupported():
+    """测试连续采样失败时回收，不支持 CDP 的页面被跳过"""
+    print("2. 无响应和不支持测试:")
+    watchdog = ResourceWatchdog(check_every=1)
+
+    async def recycle(page):
+        return FakeCDPPage()
+
+    async def run():
+        crashed = FakeCDPPage(fail=True)
+        first = await watchdog.after_visit(crashed, recycle)
+        second = await watchdog.after_visit(first, recycle)
+        plain = PlainPage()
+        skipped = [await watchdog.after_visit(plain, recycle) for _ in range(3)]
+        return crashed, first, second, plain, skipped
+
+    crashed, first, second, plain, skipped = asyncio.run(run())
+    assert first is crashed
+    assert second is not crashed
+    assert watchdog.events[-1]['reasons'] == ['unresponsive']
+    assert all(page is plain for page in skipped)
+    assert len(watchdog.events) == 1
+    print("✅ 无响应页面已回收，不支持的页面被跳过")
+
+
+def test_renderer_rss():
+    """测试在进程表中查找渲染子进程的内存（本进程没有渲染子进程）"""
+    print("3. 渲染进程内存测试:")
+    if not os.path.isdir('/proc/self'):
+        print("⏭️ 没有 /proc，跳过")
+        return
+    assert resource_watchdog.renderer_rss_bytes(os.getpid()) is None
+    print("✅ 进程表扫描正常")
+
+
+def main():
+    test_recycle_on_threshold()
+    test_unresponsive_and_unsupported()
+    test_renderer_rss()
+    print("\n🎉 所有资源看门狗测试通过")
+
+
+if __name__ == "__main__":
+    main()
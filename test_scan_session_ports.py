@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+会话端口扫描测试脚本
+在本机启动模拟的 Linken Sphere /sessions 接口和 CDP 调试端口，验证异步扫描的端口分类，
+以及扫描结束后恢复文件描述符上限
+"""
+
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scan_session_ports
+from scan_session_ports import async_scan_ports, fingerprint_port
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按 server.routes 返回固定 JSON 的 HTTP 处理器"""
+
+    def do_GET(self):
+        body = self.server.routes.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(routes):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.routes = routes
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def closed_port():
+    """一个当前没有监听的本机端口"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_scan_classification():
+    """测试扫描结果区分 Linken Sphere API、CDP 调试端口和普通 HTTP 服务"""
+    print("1. 端口分类测试:")
+    servers = [
+        start_stub({"/sessions": [{"uuid": "profile-1", "name": "Profile 1", "status": "running"}]}),
+        start_stub({"/json/version": {"Browser": "Chrome/120",
+                                      "webSocketDebuggerUrl": "ws://127.0.0.1/devtools/browser/x"}}),
+        start_stub({"/": {"ok": True}}),
+    ]
+    try:
+        api_port, cdp_port, http_port = (server.server_address[1] for server in servers)
+        ports = [api_port, cdp_port, http_port, closed_port()]
+        results = asyncio.run(async_scan_ports("127.0.0.1", ports=ports, concurrency=4, timeout=1.0))
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    kinds = {result["port"]: result["kind"] for result in results}
+    assert kinds == {api_port: "linken_sphere_api", cdp_port: "cdp", http_port: "http"}, kinds
+    assert all(result["open"] and result["http_status"] for result in results)
+    print(f"✅ 分类正确: {kinds}")
+
+
+def test_split_response():
+    """测试头部和响应体分两次发送时仍能读到完整响应并识别为 CDP 端口"""
+    print("2. 分段响应测试:")
+    body = json.dumps({"Browser": "Chrome/120", "webSocketDebuggerUrl": "ws://127.0.0.1/devtools/browser/x"})
+
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        writer.write(body.encode())
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return [await fingerprint_port("127.0.0.1", port) for _ in range(5)]
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    results = asyncio.run(scenario())
+    assert all(result["kind"] == "cdp" for result in results), results
+    print("✅ 分段到达的响应被完整读取")
+
+
+def test_fd_limit_restored():
+    """测试扫描前提高的文件描述符软限制在扫描后恢复"""
+    print("3. 文件描述符上限恢复测试:")
+    if resource is None:
+        print("⏭️ 当前系统不支持 resource 模块，跳过")
+        return
+
+    original = resource.getrlimit(resource.RLIMIT_NOFILE)
+    soft, hard = original
+    low_soft = 512 if soft == resource.RLIM_INFINITY else min(soft, 512)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (low_soft, hard))
+        workers, previous = scan_session_ports._usable_concurrency(600)
+        if previous is not None:
+            assert resource.getrlimit(resource.RLIMIT_NOFILE)[0] > low_soft
+        scan_session_ports._restore_fd_limit(previous)
+        assert resource.getrlimit(resource.RLIMIT_NOFILE) == (low_soft, hard)
+
+        asyncio.run(async_scan_ports("127.0.0.1", ports=[closed_port()], concurrency=600, timeout=0.2))
+        assert resource.getrlimit(resource.RLIMIT_NOFILE) == (low_soft, hard)
+        assert workers >= 1
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, original)
+    print("✅ 扫描后恢复原来的上限")
+
+
+def main():
+    test_scan_classification()
+    test_split_response()
+    test_fd_limit_restored()
+    print("\n🎉 所有端口扫描测试通过")
+
+
+if __name__ == "__main__":
+    main()
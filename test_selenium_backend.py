@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Selenium 后端测试脚本
+使用模拟 WebDriver 验证脚本转换、每个滚动步骤一次脚本调用，以及浏览引擎通过 Selenium 后端完成循环
+"""
+
+import asyncio
+
+from browse_engine import SCROLL_STEP_SCRIPT, BrowseEngine
+from selenium_backend import SeleniumBackend, SeleniumPage, to_execute_script
+
+
+class FakeDriver:
+    """模拟 WebDriver：记录导航和脚本调用，max_scroll 为可滚动的高度"""
+
+    def __init__(self, max_scroll=0):
+        self.max_scroll = max_scroll
+        self.visits = []
+        self.scripts = []
+        self.quit_called = False
+        self.title = "Apple (日本)"
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        self.visits.append(url)
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        if 'readyState' in script:
+            return "complete"
+        if 'maxScroll' in script:
+            position, distance = args[0]
+            max_scroll = self.max_scroll
+            if position >= max_scroll:
+                return {'done': True, 'position': position, 'maxScroll': max_scroll}
+            return {'done': False, 'position': min(position + distance, max_scroll), 'maxScroll': max_scroll}
+        if 'querySelectorAll' in script:
+            return [{'url': 'https://www.apple.com/jp/mac/', 'text': 'Mac'}]
+        return None
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_script_conversion():
+    """测试函数脚本和表达式脚本的转换"""
+    print("1. 脚本转换测试:")
+    assert to_execute_script("() => 1") == "return (() => 1).apply(null, arguments);"
+    assert to_execute_script("document.title") == "return (document.title);"
+    assert to_execute_script(SCROLL_STEP_SCRIPT).endswith(".apply(null, arguments);")
+    print("✅ 脚本转换正确")
+
+
+def test_scroll_one_call_per_step():
+    """测试每个滚动步骤只有一次 execute_script 调用"""
+    print("2. 滚动批量调用测试:")
+    engine = BrowseEngine(browse_duration=0, retry_delay=0)
+    driver = FakeDriver(max_scroll=200)
+    assert asyncio.run(engine._scroll_to_bottom(SeleniumPage(driver)))
+
+    steps = [script for script in driver.scripts if 'maxScroll' in script]
+    assert steps and len(steps) == len(driver.scripts)
+    print(f"✅ {len(steps)} 个滚动步骤，共 {len(driver.scripts)} 次脚本调用")
+
+
+def test_engine_with_selenium_backend():
+    """测试浏览引擎通过 Selenium 后端完成循环并释放 WebDriver"""
+    print("3. Selenium 后端循环测试:")
+    engine = BrowseEngine(browse_duration=0, major_cycles=1, retry_delay=0)
+    driver = FakeDriver()
+    backend = SeleniumBackend(driver_factory=lambda: driver)
+
+    assert asyncio.run(engine.run_with_backend(backend))
+
+    assert driver.quit_called
+    assert len(driver.visits) == 1 + 8
+    assert driver.visits[1:] == ['https://www.apple.com/jp/mac/'] * 8
+    print("✅ Selenium 后端循环正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 Selenium 后端测试")
+    print("=" * 50)
+    test_script_conversion()
+    test_scroll_one_call_per_step()
+    test_engine_with_selenium_backend()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Selenium 会话池测试脚本
+使用模拟 API 和 WebDriver 验证批量启动、共享队列分配访问、健康检查重连和关闭会话
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from browse_engine import BrowseEngine
+from checkpoints import CheckpointStore
+from selenium_pool import SeleniumSessionPool
+
+
+class FakeDriver:
+    """模拟 WebDriver：页面不需要滚动，broken 时健康检查失败"""
+
+    def __init__(self, port, broken=False):
+        self.port = port
+        self.broken = broken
+        self.visits = []
+        self.quit_called = False
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        self.visits.append(url)
+
+    def execute_script(self, script, *args):
+        if self.broken:
+            raise RuntimeError("chrome not reachable")
+        if 'readyState' in script:
+            return "complete"
+        if 'maxScroll' in script:
+            return {'done': True, 'position': 0, 'maxScroll': 0}
+        if 'querySelectorAll' in script:
+            return [{'url': 'https://www.apple.com/jp/ipad/', 'text': 'iPad'}]
+        return None
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeAPI:
+    def __init__(self, count):
+        self.profiles = [{'uuid': f"uuid-{i}", 'name': f"profile-{i}"} for i in range(count)]
+        self.started = {}
+        self.stopped = []
+
+    def get_profiles(self):
+        return self.profiles
+
+    def start_sessions(self, uuids, concurrency=8, debug_ports=None):
+        self.started.update(debug_ports)
+        return {uuid: {'success': True, 'status': 'running'} for uuid in uuids}
+
+    def stop_sessions(self, uuids, concurrency=8):
+        self.stopped.extend(uuids)
+        return {uuid: {'success': True, 'status': 'stopped'} for uuid in uuids}
+
+
+class FakeManager:
+    def __init__(self, count):
+        self.api = FakeAPI(count)
+        self.active_sessions = {}
+
+
+def make_factory(broken_ports=()):
+    drivers = []
+
+    def factory(host, port):
+        # 每个端口第一次连接的 WebDriver 可以设为损坏，重连后恢复
+        broken = port in broken_ports and not any(d.port == port for d in drivers)
+        driver = FakeDriver(port, broken=broken)
+        drivers.append(driver)
+        return driver
+
+    return factory, drivers
+
+
+def test_pool_start_and_queue():
+    """测试批量启动会话、访问分配到所有 WebDriver、关闭时停止所有会话"""
+    print("1. 会话池队列测试:")
+    manager = FakeManager(3)
+    factory, drivers = make_factory()
+    pool = SeleniumSessionPool(manager, size=2, driver_factory=factory)
+    engine = BrowseEngine(browse_duration=0, major_cycles=1, retry_delay=0)
+
+    assert asyncio.run(pool.run(engine))
+    assert manager.api.started == {'uuid-0': 12345, 'uuid-1': 12346}
+    assert pool.stats['visits'] == 8 * 2
+    # 第一个 WebDriver 还负责刷新链接（访问一次主页）
+    assert sum(len(driver.visits) for driver in drivers) == 8 * 2 + 1
+    assert all(driver.visits for driver in drivers)
+    assert all(driver.quit_called for driver in drivers)
+    assert sorted(manager.api.stopped) == ['uuid-0', 'uuid-1']
+    assert manager.active_sessions == {}
+    print("✅ 访问由所有 WebDriver 共同完成")
+
+
+def test_unhealthy_driver_recycled():
+    """测试健康检查失败的 WebDriver 被重连"""
+    print("2. 健康检查重连测试:")
+    manager = FakeManager(2)
+    factory, drivers = make_factory(broken_ports={12346})
+    pool = SeleniumSessionPool(manager, driver_factory=factory)
+    engine = BrowseEngine(browse_duration=0, major_cycles=1, retry_delay=0)
+
+    assert asyncio.run(pool.run(engine))
+    assert pool.stats['recycles'] == 1
+    assert pool.stats['visits'] == 8 * 2
+    assert len(drivers) == 3
+    broken = [driver for driver in drivers if driver.broken]
+    assert len(broken) == 1 and broken[0].quit_called and not broken[0].visits
+    print("✅ 损坏的 WebDriver 已重连")
+
+
+def test_requeued_visit_completed():
+    """测试 WebDriver 取走最后一个访问后无法恢复时，访问被放回队列并由仍在等待的 WebDriver 完成"""
+    print("3. 放回队列测试:")
+    pool = SeleniumSessionPool(FakeManager(2), driver_factory=make_factory()[0])
+    good = SimpleNamespace(label="good", page="good-page", visits=0)
+    bad = SimpleNamespace(label="bad", page="bad-page", visits=0)
+    pool.workers = [bad, good]
+
+    async def ensure_healthy(worker):
+        # 损坏的 WebDriver 在另一个 WebDriver 发现队列为空之后才判定无法恢复
+        await asyncio.sleep(0.05)
+        return worker is good
+
+    async def watch_resources(worker):
+        pass
+
+    visited = []
+
+    async def browse_page(page, url, duration):
+        visited.append((page, url))
+        return 0.0
+
+    pool._ensure_healthy = ensure_healthy
+    pool._watch_resources = watch_resources
+    engine = BrowseEngine(browse_duration=0, retry_delay=0)
+    engine.browse_page = browse_page
+
+    async def scenario():
+        queue = asyncio.Queue()
+        queue.put_nowait("https://www.apple.com/jp/mac/")
+        await asyncio.gather(pool._consume(engine, bad, queue), pool._consume(engine, good, queue))
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert queue.empty()
+    assert visited == [("good-page", "https://www.apple.com/jp/mac/")]
+    assert pool.stats['requeued'] == 1 and pool.stats['retired'] == 1 and pool.stats['visits'] == 1
+    assert pool.workers == [good]
+    print("✅ 放回队列的访问由其他 WebDriver 完成")
+
+
+def test_pool_checkpoint_resume():
+    """测试会话池按大循环写检查点，中断后以 resume=True 运行跳过已完成的大循环"""
+    print("4. 会话池检查点测试:")
+    work_dir = tempfile.mkdtemp()
+    try:
+        store = CheckpointStore(work_dir)
+
+        def make_engine():
+            engine = BrowseEngine(browse_duration=0, major_cycles=3, retry_delay=0)
+            engine.checkpoints = store
+            engine.worker_name = "profile-1"
+            return engine
+
+        # 第一次运行在第二个大循环刷新链接时收到停止信号
+        engine = make_engine()
+        engine.stop_event = threading.Event()
+        refresh_links = engine.refresh_links
+
+        async def refresh_then_stop(page):
+            if engine.current_major_cycle == 2:
+                engine.stop_event.set()
+                return False
+            return await refresh_links(page)
+
+        engine.refresh_links = refresh_then_stop
+        pool = SeleniumSessionPool(FakeManager(2), driver_factory=make_factory()[0])
+        assert asyncio.run(pool.run(engine))
+        assert pool.stats['visits'] == 8 * 2
+        checkpoint, _ = store.load("pool-profile-1")
+        assert (checkpoint['major_cycle'], checkpoint['minor_cycle']) == (1, 8)
+
+        # 恢复运行只完成剩余的两个大循环，正常结束后删除检查点
+        engine = make_engine()
+        pool = SeleniumSessionPool(FakeManager(2), driver_factory=make_factory()[0])
+        assert pool.has_checkpoint(engine)
+        assert asyncio.run(pool.run(engine, resume=True))
+        assert pool.stats['visits'] == 8 * 2 * 2
+        assert not os.path.exists(store.path("pool-profile-1"))
+    finally:
+        shutil.rmtree(work_dir)
+    print("✅ 会话池从下一个大循环继续")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 Selenium 会话池测试")
+    print("=" * 50)
+    test_pool_start_and_queue()
+    test_unhealthy_driver_recycled()
+    test_requeued_visit_completed()
+    test_pool_checkpoint_resume()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
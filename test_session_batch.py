@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+批量启动/停止会话测试脚本
+用模拟的 start_session 和 /sessions 结果验证有限并发、状态确认，
+以及已在运行的会话使用 /sessions 报告的实际调试端口
+"""
+
+import threading
+import time
+
+from linken_sphere_api import LinkenSphereAPI
+from session_records import SessionSnapshot
+
+
+class FakeAPI(LinkenSphereAPI):
+    """不发送网络请求的 API 客户端"""
+
+    def __init__(self, sessions, start_errors=None, stop_errors=None):
+        super().__init__()
+        self.sessions = sessions
+        self.start_errors = start_errors or {}
+        self.stop_errors = stop_errors or {}
+        self.start_calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._calls_lock = threading.Lock()
+
+    def _enter(self):
+        with self._calls_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self._calls_lock:
+            self.in_flight -= 1
+
+    def start_session(self, profile_id, headless=False, debug_port=None):
+        self._enter()
+        self.start_calls.append((profile_id, debug_port))
+        if profile_id in self.start_errors:
+            raise Exception(self.start_errors[profile_id])
+        return {'uuid': profile_id}
+
+    def _make_request_with_timeout(self, method, endpoint, data=None, timeout=30):
+        self._enter()
+        if data['uuid'] in self.stop_errors:
+            raise Exception(self.stop_errors[data['uuid']])
+        return {'uuid': data['uuid']}
+
+    def get_snapshot(self):
+        return SessionSnapshot.from_sessions(self.sessions)
+
+
+def test_run_batch_concurrency():
+    """测试批量操作的并发上限和结果对应关系"""
+    print("1. 有限并发测试:")
+    api = FakeAPI([])
+    uuids = [f'p{i}' for i in range(10)]
+
+    def func(uuid):
+        api._enter()
+        return {'uuid': uuid}
+
+    results = api._run_batch(func, uuids, concurrency=3)
+    assert list(results) == uuids
+    assert all(results[uuid]['uuid'] == uuid for uuid in uuids)
+    assert api.max_in_flight <= 3
+    assert api._run_batch(func, [], concurrency=3) == {}
+    print(f"✅ 最大并发 {api.max_in_flight}，结果与 UUID 对应")
+
+
+def test_start_sessions_ports():
+    """测试启动结果的状态和实际调试端口"""
+    print("2. 批量启动测试:")
+    api = FakeAPI(
+        sessions=[
+            {'uuid': 'new', 'status': 'running'},
+            # 启动返回 409，会话早已在其他端口运行
+            {'uuid': 'busy', 'status': 'automationRunning', 'debug_port': 13000},
+            # 启动失败，会话在运行但没有报告调试端口
+            {'uuid': 'unknown-port', 'status': 'running'},
+            {'uuid': 'broken', 'status': 'stopped'},
+        ],
+        start_errors={'busy': '409 Conflict', 'unknown-port': '409 Conflict', 'broken': '500 Server Error'},
+    )
+    debug_ports = {'new': 12345, 'busy': 12346, 'unknown-port': 12347, 'broken': 12348}
+    results = api.start_sessions(['new', 'busy', 'new', 'unknown-port', 'broken'], concurrency=2,
+                                 debug_ports=debug_ports)
+
+    # 重复的 UUID 只启动一次
+    assert sorted(api.start_calls) == sorted(debug_ports.items())
+    assert results['new']['success'] and results['new']['debug_port'] == 12345
+    assert results['busy']['success'] and results['busy']['debug_port'] == 13000
+    assert results['busy']['status'] == 'automationRunning'
+    assert not results['unknown-port']['success'] and results['unknown-port']['debug_port'] is None
+    assert not results['broken']['success'] and results['broken']['status'] == 'stopped'
+    print("✅ 已在运行的会话使用实际调试端口，无法确定端口时视为失败")
+
+
+def test_stop_sessions():
+    """测试批量停止：请求失败但会话已停止也视为成功"""
+    print("3. 批量停止测试:")
+    api = FakeAPI(
+        sessions=[
+            {'uuid': 'a', 'status': 'stopped'},
+            {'uuid': 'b', 'status': 'stopped'},
+            {'uuid': 'c', 'status': 'running'},
+        ],
+        stop_errors={'b': 'Read timed out', 'c': 'Read timed out'},
+    )
+    results = api.stop_sessions(['a', 'b', 'c'], concurrency=3)
+    assert results['a']['success'] and results['a']['response'] == {'uuid': 'a'}
+    assert results['b']['success'] and 'timed out' in results['b']['error']
+    assert not results['c']['success'] and results['c']['status'] == 'running'
+    print("✅ 停止结果以 /sessions 状态为准")
+
+
+def main():
+    test_run_batch_concurrency()
+    test_start_sessions_ports()
+    test_stop_sessions()
+    print("\n🎉 所有批量会话测试通过")
+
+
+if __name__ == "__main__":
+    main()
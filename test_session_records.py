@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+会话记录与快照索引测试脚本
+验证 /sessions 数据转换、UUID/状态索引和未知状态的兼容处理
+"""
+
+from session_records import SessionRecord, SessionSnapshot, SessionStatus
+
+SAMPLE_SESSIONS = [
+    {'uuid': 'aaaa1111-0000', 'name': 'Profile A', 'status': 'running', 'proxy': {'protocol': 'socks5'}, 'debug_port': 12345},
+    {'uuid': 'bbbb2222-0000', 'name': 'Profile B', 'status': 'automationRunning', 'proxy': {'protocol': 'http'}},
+    {'uuid': 'cccc3333-0000', 'name': 'Profile C', 'status': 'stopped'},
+    {'uuid': 'dddd4444-0000', 'name': 'Profile D', 'status': 'somethingNew'},
+]
+
+
+def test_status_parsing():
+    """测试状态字符串解析"""
+    print("1. 状态解析测试:")
+    assert SessionStatus('running') is SessionStatus.RUNNING
+    assert SessionStatus('automationRunning').is_running
+    assert SessionStatus('AutomationRunning') is SessionStatus.AUTOMATION_RUNNING
+    assert SessionStatus('somethingNew') is SessionStatus.UNKNOWN
+    assert not SessionStatus('stopped').is_running
+    print("✅ 状态解析正确")
+
+
+def test_snapshot_indexes():
+    """测试快照的UUID和状态索引"""
+    print("2. 快照索引测试:")
+    snapshot = SessionSnapshot.from_sessions(SAMPLE_SESSIONS)
+
+    assert len(snapshot) == 4
+    assert 'cccc3333-0000' in snapshot
+    assert snapshot.get('aaaa1111-0000').debug_port == 12345
+    assert snapshot.get('bbbb2222-0000').proxy_protocol == 'http'
+    assert snapshot.get('missing') is None
+    assert [r.uuid for r in snapshot.running] == ['aaaa1111-0000', 'bbbb2222-0000']
+    assert [r.uuid for r in snapshot.stopped] == ['cccc3333-0000']
+    assert snapshot.status_of('dddd4444-0000') is SessionStatus.UNKNOWN
+    print("✅ 快照索引正确")
+
+
+def test_record_round_trip():
+    """测试记录与字典之间的转换"""
+    print("3. 记录转换测试:")
+    record = SessionRecord.from_dict(SAMPLE_SESSIONS[0])
+    data = record.to_dict()
+
+    assert data['uuid'] == 'aaaa1111-0000'
+    assert data['status'] == 'running'
+    assert data['proxy'] == {'protocol': 'socks5'}
+    assert SessionRecord.from_dict(data) == record
+    assert not hasattr(record, '__dict__')
+    print("✅ 记录转换正确")
+
+
+def test_invalid_debug_port():
+    """测试无法识别的调试端口按未知处理，而不是让整个快照解析失败"""
+    print("4. 调试端口解析测试:")
+    ports = {'auto': None, '12346': 12346, 12347.0: 12347, 0: None, -1: None, 70000: None, '': None}
+    for value, expected in ports.items():
+        assert SessionRecord.from_dict({'uuid': 'x', 'debug_port': value}).debug_port == expected, value
+    assert SessionRecord.from_dict({'uuid': 'x', 'debug_port': {'port': 1}}).debug_port is None
+    assert SessionRecord.from_dict({'uuid': 'x', 'debug_port': [12345]}).debug_port is None
+
+    snapshot = SessionSnapshot.from_sessions(SAMPLE_SESSIONS + [{'uuid': 'eeee5555-0000', 'debug_port': 'auto'}])
+    assert len(snapshot) == 5 and snapshot.get('eeee5555-0000').debug_port is None
+    print("✅ 无效端口视为 None")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 会话记录测试")
+    print("=" * 50)
+    test_status_parsing()
+    test_snapshot_indexes()
+    test_record_round_trip()
+    test_invalid_debug_port()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
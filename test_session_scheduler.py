@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+会话调度器测试脚本
+验证多线程并发分配的均匀性和健康加权策略
+"""
+
+import threading
+from collections import Counter
+
+from session_records import SessionSnapshot
+from session_scheduler import SessionScheduler
+
+RUNNING = SessionSnapshot.from_sessions(
+    [{'uuid': f'session-{i}', 'name': f'Profile {i}', 'status': 'running'} for i in range(5)]
+).running
+
+
+def test_round_robin_concurrent():
+    """测试多线程并发轮询分配"""
+    print("1. 并发轮询测试:")
+    scheduler = SessionScheduler()
+    scheduler.update(RUNNING)
+    counts = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(200):
+            uuid = scheduler.acquire().uuid
+            with lock:
+                counts[uuid] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(counts.values()) == {320}, counts
+    print(f"✅ 分配均匀: {dict(counts)}")
+
+
+def test_health_weighted_avoids_failing_session():
+    """测试健康加权策略避开失败率高的会话"""
+    print("2. 健康加权测试:")
+    scheduler = SessionScheduler(strategy='health_weighted')
+    scheduler.update(RUNNING)
+    for _ in range(30):
+        scheduler.record_result('session-0', latency=20.0, success=False)
+
+    counts = Counter()
+    for _ in range(500):
+        uuid = scheduler.acquire().uuid
+        counts[uuid] += 1
+        scheduler.release(uuid)
+
+    assert counts['session-0'] < 500 / len(RUNNING) / 2, counts
+    print(f"✅ 故障会话被降权: {dict(counts)}")
+
+
+def test_prefer_and_membership_changes():
+    """测试优先会话和会话集合变化"""
+    print("3. 成员变化测试:")
+    scheduler = SessionScheduler(strategy='lru')
+    assert scheduler.acquire() is None
+    scheduler.update(RUNNING)
+    assert scheduler.acquire(prefer='session-3').uuid == 'session-3'
+
+    scheduler.update(RUNNING[:2])
+    assert {scheduler.acquire().uuid for _ in range(4)} == {'session-0', 'session-1'}
+    print("✅ 成员变化处理正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 会话调度器测试")
+    print("=" * 50)
+    test_round_robin_concurrent()
+    test_health_weighted_avoids_failing_session()
+    test_prefer_and_membership_changes()
+    print("=" * 50)
+    print("🎉 所有测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+会话状态监视器测试脚本
+用模拟的 /sessions 结果驱动轮询，验证订阅队列收到状态变化、取消订阅、
+异步/同步等待状态以及等待超时
+"""
+
+import asyncio
+import threading
+
+from session_watcher import SessionWatcher
+
+
+class FakeAPI:
+    """/sessions 结果可随时修改的模拟 API"""
+
+    def __init__(self, statuses):
+        self.statuses = dict(statuses)
+        self.fail = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def set_status(self, uuid, status):
+        with self._lock:
+            if status is None:
+                self.statuses.pop(uuid, None)
+            else:
+                self.statuses[uuid] = status
+
+    def get_sessions(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("API is not available")
+        with self._lock:
+            return [{'uuid': uuid, 'name': uuid.upper(), 'status': status} for uuid, status in self.statuses.items()]
+
+
+def make_watcher(api):
+    return SessionWatcher(api, min_interval=0.02, max_interval=0.05)
+
+
+async def next_event(queue):
+    return await asyncio.wait_for(queue.get(), 2)
+
+
+def test_subscriber_queue():
+    """测试订阅者收到首次快照、状态变化和会话消失事件，取消订阅后不再收到"""
+    print("1. 订阅队列测试:")
+
+    async def scenario():
+        api = FakeAPI({'a': 'stopped', 'b': 'running'})
+        watcher = make_watcher(api)
+        all_events = watcher.subscribe()
+        only_a = watcher.subscribe('a')
+        watcher.start(asyncio.get_running_loop())
+        try:
+            first = {(await next_event(all_events))['uuid'] for _ in range(2)}
+            assert first == {'a', 'b'}
+            assert (await next_event(only_a))['old_status'] is None
+
+            api.set_status('a', 'starting')
+            watcher.poke()
+            event = await next_event(only_a)
+            assert (event['uuid'], event['old_status'], event['new_status']) == ('a', 'stopped', 'starting')
+            assert (await next_event(all_events))['new_status'] == 'starting'
+
+            watcher.unsubscribe(only_a)
+            api.set_status('a', None)
+            watcher.poke()
+            event = await next_event(all_events)
+            assert (event['uuid'], event['new_status']) == ('a', None)
+            assert only_a.empty()
+
+            # 轮询失败只计数，不发布事件
+            api.fail = True
+            errors = watcher.stats['errors']
+            while watcher.stats['errors'] == errors:
+                watcher.poke()
+                await asyncio.sleep(0.01)
+            assert all_events.empty()
+            assert watcher.get_status('b') == 'running' and watcher.get_status('a') is None
+        finally:
+            watcher.stop()
+        return dict(watcher.stats)
+
+    stats = asyncio.run(scenario())
+    assert stats['transitions'] == 4, stats
+    print(f"✅ 状态变化按订阅推送: {stats}")
+
+
+def test_wait_for_status():
+    """测试等待会话进入目标状态，以及等待超时后释放订阅"""
+    print("2. 异步等待测试:")
+
+    async def scenario():
+        api = FakeAPI({'a': 'starting'})
+        watcher = make_watcher(api)
+        watcher.start(asyncio.get_running_loop())
+        try:
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.1, api.set_status, 'a', 'automationRunning')
+            status = await watcher.wait_for_status('a', {'running', 'automationRunning'}, timeout=2)
+            assert status == 'automationRunning'
+
+            # 已处于目标状态时直接返回
+            assert await watcher.wait_for_status('a', {'automationRunning'}, timeout=0) == 'automationRunning'
+
+            start = loop.time()
+            assert await watcher.wait_for_status('a', {'stopped'}, timeout=0.2) is None
+            assert 0.15 <= loop.time() - start < 1
+            assert watcher._waiters == 0 and watcher._subscribers == []
+        finally:
+            watcher.stop()
+
+    asyncio.run(scenario())
+    print("✅ 等待到达目标状态，超时返回 None")
+
+
+def test_wait_for_status_sync():
+    """测试普通线程通过共享事件循环同步等待"""
+    print("3. 同步等待测试:")
+    api = FakeAPI({'a': 'running'})
+    watcher = make_watcher(api).start()
+    try:
+        timer = threading.Timer(0.1, api.set_status, args=('a', 'stopped'))
+        timer.start()
+        assert watcher.wait_for_status_sync('a', {'stopped'}, timeout=2) == 'stopped'
+        assert watcher.wait_for_status_sync('missing', {'running'}, timeout=0.1) is None
+        assert watcher.get_snapshot(max_age=5) is not None
+    finally:
+        watcher.stop()
+    print("✅ 同步等待正确")
+
+
+def main():
+    test_subscriber_queue()
+    test_wait_for_status()
+    test_wait_for_status_sync()
+    print("\n🎉 所有会话监视器测试通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,25 @@ class GitHubUploader:
         self.project_files = [
             "simple_linken_gui.py",
             "linken_sphere_playwright_browser.py", 
+            "browse_engine.py",
+            "selenium_backend.py",
+            "selenium_pool.py",
             "linken_sphere_api.py",
+            "cdp_connection_pool.py",
+            "session_watcher.py",
+            "session_records.py",
+            "session_scheduler.py",
+            "profile_leases.py",
+            "metrics.py",
+            "profiling.py",
+            "resource_watchdog.py",
+            "listening_ports.py",
+            "checkpoints.py",
+            "config_service.py",
             "build_cross_platform.py",
             "simple_icon_creator.py",
+            "icon_pipeline.py",
+            "build_cache.py",
             "test_cross_platform_compatibility.py",
             "requirements.txt",
             "app_icon.ico",